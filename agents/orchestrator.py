@@ -0,0 +1,745 @@
+# agents/orchestrator.py
+import asyncio
+import uuid
+import re
+import contextvars
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Callable, Optional, Tuple
+from crewai import Agent, Task, Crew, Process
+from crewai.llm import LLM
+from crewai.tasks.conditional_task import ConditionalTask
+from crewai.tools import BaseTool
+from dotenv import load_dotenv
+
+from config.settings import settings
+from database.factory import create_storage
+from tools.research_tools import WebSearchTool
+from tools.result_store import result_store_session
+from utils import precritic
+from utils.async_runner import run_async
+from utils.cassette import replaying, with_cassette
+from utils.compaction import compact_text
+from utils.llm_cache import with_response_cache
+from utils.model_router import role_profile, with_fallback, with_model_health
+from utils.query_index import QueryIndex, parse_timestamp
+from utils.rate_limiter import with_rate_limit
+from utils.streaming import TokenStream, current_stream, suspended, with_streaming
+from utils.tracing import span, with_tracing
+
+load_dotenv()
+
+_llms: Dict[tuple, LLM] = {}
+_llms_lock = threading.Lock()
+
+
+def _build_llm(model: str, temperature: float, max_tokens: Optional[int]) -> LLM:
+    if not os.getenv("GOOGLE_API_KEY") and not replaying():
+        raise ValueError("Gemini LLM not properly initialized. Check your GOOGLE_API_KEY.")
+    llm = LLM(
+        model=f"gemini/{model}",
+        api_key=os.getenv("GOOGLE_API_KEY") or "replay",
+        temperature=temperature,
+        max_output_tokens=max_tokens,
+        # A hung request fails over instead of stalling the phase (google-genai takes milliseconds)
+        client_params={"http_options": {"timeout": int(settings.MODEL_TIMEOUT * 1000)}}
+    )
+    llm = with_cassette(with_model_health(llm))
+    # Replayed calls cost no quota, so they skip the limiter
+    if not replaying():
+        llm = with_rate_limit(llm)
+    return with_streaming(with_tracing(with_response_cache(llm)))
+
+
+def get_llm(model: Optional[str] = None, temperature: Optional[float] = None,
+            max_tokens: Optional[int] = None) -> LLM:
+    """Return the process-wide Gemini LLM for these generation settings (defaults from settings)"""
+    key = (model or settings.MODEL, settings.MODEL_TEMPERATURE if temperature is None else temperature, max_tokens)
+    with _llms_lock:
+        if key not in _llms:
+            _llms[key] = _build_llm(*key)
+        return _llms[key]
+
+
+def get_gemini_llm() -> LLM:
+    """Return the process-wide default Gemini LLM (settings.MODEL)"""
+    return get_llm()
+
+
+def get_role_llm(role: str) -> LLM:
+    """Return the LLM for an agent role ("research", "summary" or "critique").
+
+    It uses the role's configured model and fails over to the model's
+    configured fallback while the primary is degraded.
+    """
+    profile = role_profile(role)
+    key = ("role", role, profile.key(), profile.fallback)
+    # Built before taking the lock, which get_llm takes too
+    fallback = get_llm(profile.fallback, profile.temperature, profile.max_tokens) if profile.fallback else None
+    with _llms_lock:
+        if key not in _llms:
+            llm = _build_llm(*profile.key())
+            _llms[key] = with_fallback(llm, fallback) if fallback is not None else llm
+        return _llms[key]
+
+
+PHASES = ("research", "summary", "critique")
+PIPELINE_MODES = ("phased", "single_crew")
+PHASE_MESSAGES = {
+    "research": "🔍 **Phase 1/3: Research** - Gathering information...",
+    "summary": "📝 **Phase 2/3: Summarization** - Condensing findings...",
+    "critique": "✅ **Phase 3/3: Quality Assurance** - Validating results..."
+}
+# Error text that failed sessions stored as outputs before phases were checkpointed
+LEGACY_FAILURE_PREFIXES = ("Research failed:", "Unable to generate summary", "Unable to provide critique")
+# "- item", "* item", "• item", "1. item", "2) item"
+_LIST_ITEM = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+(.+)$")
+
+
+def console_notify(level: str, message: str):
+    """Print orchestrator progress for headless runs"""
+    print(f"[{level}] {message}")
+
+
+class ResearchOrchestrator:
+    def __init__(self, fanout_subtopics: int = settings.FANOUT_SUBTOPICS,
+                 notify: Optional[Callable[[str, str], None]] = None,
+                 llm=None, db=None, search_tool: Optional[BaseTool] = None,
+                 pipeline_mode: Optional[str] = None):
+        # llm, db and search_tool default to the real services; benchmarks pass mocks
+        self.search_tool = search_tool or WebSearchTool()
+        # One LLM per agent role (see utils/model_router); an explicit llm serves every role
+        self.llms = {phase: llm or get_role_llm(phase) for phase in PHASES}
+        self.llm = self.llms["research"]
+        self.db = db or create_storage()  # Initialize database client
+        self.query_index = QueryIndex()  # Recent completed queries, loaded lazily
+        self._query_index_loaded = False
+        self.fanout_subtopics = fanout_subtopics
+        # "phased": one crew per phase; "single_crew": one crew chaining the tasks (see _run_single_crew)
+        self.pipeline_mode = pipeline_mode or settings.PIPELINE_MODE
+        if self.pipeline_mode not in PIPELINE_MODES:
+            raise ValueError(f"Unknown pipeline mode {self.pipeline_mode!r} (expected one of {PIPELINE_MODES})")
+        # notify(level, message) reports progress; defaults to stdout
+        self.notify = notify or console_notify
+    
+    # ... (all your agent creation methods remain the same)
+    def create_researcher_agent(self) -> Agent:
+        return Agent(
+            role="Senior Research Analyst",
+            goal="Gather comprehensive, accurate, and up-to-date information on research topics. Be concise and focus on key insights.",
+            backstory="""You are an expert research analyst with years of experience in 
+            gathering and synthesizing information from diverse sources. You excel at 
+            identifying credible sources, extracting key insights, and providing 
+            well-structured research reports. You are particularly good at being concise.""",
+            tools=[self.search_tool],
+            verbose=True,
+            allow_delegation=False,
+            llm=self.llms["research"],
+            max_iter=settings.RESEARCHER_MAX_ITER
+        )
+    
+    def create_summarizer_agent(self) -> Agent:
+        return Agent(
+            role="Content Summarizer",
+            goal="Condense research findings into clear, concise summaries while preserving key insights. Be very concise.",
+            backstory="""You are a skilled technical writer and editor who excels at 
+            distilling complex information into easily understandable formats. You have 
+            a talent for identifying core concepts and presenting them logically in a concise manner.""",
+            verbose=True,
+            allow_delegation=False,
+            llm=self.llms["summary"],
+            max_iter=settings.SUMMARIZER_MAX_ITER
+        )
+    
+    def create_critic_agent(self) -> Agent:
+        return Agent(
+            role="Quality Assurance Critic",
+            goal="Validate research quality, identify gaps, and ensure factual accuracy. Provide concise feedback.",
+            backstory="""You are a meticulous quality assurance expert with a background 
+            in academic research and fact-checking. You have zero tolerance for 
+            inaccuracies and always push for comprehensive coverage while being concise.""",
+            verbose=True,
+            allow_delegation=False,
+            llm=self.llms["critique"],
+            max_iter=settings.CRITIC_MAX_ITER
+        )
+    
+    # ... (all your task creation methods remain the same)
+    def create_research_task(self, agent, query: str, context: List[Dict] = None) -> Task:
+        prior = ""
+        if context:
+            prior = "\n            Earlier research on closely related queries (build on it and focus your searches on what it does not cover):\n"
+            for item in context:
+                prior += f"            - {item['query']}: {item['summary'][:1000]}\n"
+        return Task(
+            description=f"""
+            Conduct focused research on: {query}
+            
+            IMPORTANT: Be concise and focus on the most important information.
+            
+            Requirements:
+            - Use the web search tool to gather current information (max 2-3 searches)
+            - Focus on recent and credible sources
+            - Extract only key facts, trends, and insights
+            - Organize information logically but concisely
+            - Provide source references
+            
+            Provide a concise research report with:
+            1. Brief executive summary
+            2. Key findings with evidence
+            3. Important trends
+            4. Source credibility assessment
+            5. Potential implications
+            
+            Keep your response under 500 words.
+            {prior}""",
+            agent=agent,
+            expected_output="Concise research report with key insights (under 500 words)"
+        )
+    
+    def compact(self, text: str, max_tokens: int, label: str, stats: Optional[Dict[str, Any]] = None) -> str:
+        """Compact `text` to `max_tokens`, recording token counts under stats[label]"""
+        compacted, tokens_before, tokens_after = compact_text(text, max_tokens)
+        if stats is not None:
+            stats[label] = {"tokens_before": tokens_before, "tokens_after": tokens_after}
+        return compacted
+    
+    def create_summarization_task(self, agent, research_data: Optional[str], stats: Optional[Dict[str, Any]] = None,
+                                  context: Optional[List[Task]] = None) -> Task:
+        # Without research_data the findings come from the `context` tasks' outputs
+        if research_data is None:
+            findings = "Summarize the research findings provided as context CONCISELY."
+        else:
+            research_data = self.compact(research_data, settings.SUMMARY_RESEARCH_TOKENS, "summary_research", stats)
+            findings = f"Summarize the following research findings CONCISELY:\n            \n            {research_data}"
+            
+        return Task(
+            description=f"""
+            {findings}
+            
+            Create a very concise summary that:
+            - Highlights only the most important insights
+            - Preserves key details but be brief
+            - Uses clear, accessible language
+            - Maintains factual accuracy
+            
+            Structure your summary with:
+            - Main conclusion (1-2 sentences)
+            - Key supporting points (3-4 bullet points)
+            - Important implications
+            
+            Keep your entire response under 200 words.
+            """,
+            agent=agent,
+            expected_output="Very concise summary (under 200 words)",
+            context=context
+        )
+    
+    def create_critique_task(self, agent, summary: Optional[str], original_research: Optional[str],
+                             stats: Optional[Dict[str, Any]] = None, context: Optional[List[Task]] = None,
+                             checks: str = "", condition: Optional[Callable[[Any], bool]] = None) -> Task:
+        # Without summary/original_research both come from the `context` tasks' outputs.
+        # checks are the pre-critic's findings; a condition makes the task skippable (see _run_single_crew)
+        if summary is None or original_research is None:
+            material = "Provide CONCISE critique of the research summary provided as context, checked against the research report it was written from."
+        else:
+            summary = self.compact(summary, settings.CRITIQUE_SUMMARY_TOKENS, "critique_summary", stats)
+            original_research = self.compact(original_research, settings.CRITIQUE_RESEARCH_TOKENS, "critique_research", stats)
+            material = f"""Provide CONCISE critique of this research summary:
+            
+            SUMMARY:
+            {summary}
+            
+            ORIGINAL RESEARCH (excerpt):
+            {original_research}"""
+        if checks:
+            material += f"\n            \n            Automated checks flagged (verify these first): {checks}"
+        
+        task_class, extra = (ConditionalTask, {"condition": condition}) if condition else (Task, {})
+        return task_class(
+            description=f"""
+            {material}
+            
+            Provide brief quality assessment evaluating:
+            - Accuracy: Does summary match research?
+            - Completeness: Any key points missing?
+            - Clarity: Is it easy to understand?
+            
+            Give 1-2 specific improvement suggestions.
+            Provide overall quality rating (1-5 stars).
+            
+            Keep your entire response under 150 words.
+            """,
+            agent=agent,
+            expected_output="Concise critique with rating and suggestions (under 150 words)",
+            context=context,
+            **extra
+        )
+    
+    def pre_critique(self, summary: str, research: str, quality: Dict[str, Any]) -> Optional[str]:
+        """Local quality check before the critic: the critique to use instead of an LLM critique, or None
+        
+        The assessment (score, findings, whether the LLM critique is still
+        needed) is recorded in `quality`.
+        """
+        if not settings.PRECRITIC_ENABLED:
+            return None
+        with span("precritic", kind="internal") as active:
+            assessment = precritic.assess(summary, research)
+            skip_llm = precritic.passes(assessment)
+            active.set(score=assessment["score"], skip_llm=skip_llm)
+        quality.update(assessment, findings=precritic.findings(assessment), llm_critique=not skip_llm)
+        return precritic.format_critique(assessment) if skip_llm else None
+    
+    def plan_subtopics(self, query: str, count: int) -> List[str]:
+        """Ask the LLM to split a query into `count` non-overlapping subtopics"""
+        prompt = f"""Split the research topic below into {count} distinct, non-overlapping
+        subtopics that together cover it. Reply with a list of one short subtopic per line,
+        each line starting with "- ", and nothing else.
+        
+        Topic: {query}"""
+        try:
+            response = self.llm.call([{"role": "user", "content": prompt}])
+        except Exception as e:
+            print(f"Error planning subtopics: {e}")
+            return [query]
+        
+        # Only list items count: preamble such as "Here are 3 subtopics:" is dropped
+        subtopics = []
+        for line in str(response).splitlines():
+            item = _LIST_ITEM.match(line)
+            if item is None:
+                continue
+            subtopic = item.group(1).strip().strip("*_").strip()
+            if subtopic and subtopic.lower() not in (s.lower() for s in subtopics):
+                subtopics.append(subtopic)
+        return subtopics[:count] or [query]
+    
+    def _research_subtopic(self, query: str, subtopic: str, context: List[Dict] = None) -> str:
+        """Run one researcher crew on a subtopic; failures become a note in the merged report"""
+        try:
+            researcher = self.create_researcher_agent()
+            task = self.create_research_task(researcher, f"{subtopic} (as part of research on: {query})", context)
+            crew = Crew(
+                agents=[researcher],
+                tasks=[task],
+                process=Process.sequential,
+                verbose=True
+            )
+            return str(crew.kickoff())
+        except Exception as e:
+            print(f"Error researching subtopic '{subtopic}': {e}")
+            return f"Research failed for this subtopic: {str(e)}"
+    
+    def run_fanout_research(self, query: str, count: int, context: List[Dict] = None) -> str:
+        """Research subtopics concurrently on a bounded pool and merge the reports
+        
+        Planning and the subtopic crews do not stream; the merged report is
+        pushed to the active token stream once it is complete.
+        """
+        stream = current_stream()
+        with suspended():
+            report = self._fanout_research(query, count, context)
+        if stream is not None:
+            stream.push(report)
+        return report
+    
+    def _fanout_research(self, query: str, count: int, context: Optional[List[Dict]]) -> str:
+        subtopics = self.plan_subtopics(query, count)
+        if len(subtopics) < 2:
+            return self._research_subtopic(query, query, context)
+        
+        max_workers = min(settings.FANOUT_MAX_WORKERS, len(subtopics))
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            # Each worker runs in a copy of this context so its spans nest under the research phase
+            contexts = [contextvars.copy_context() for _ in subtopics]
+            reports = list(executor.map(
+                lambda ctx, subtopic: ctx.run(self._research_subtopic, query, subtopic, context),
+                contexts, subtopics
+            ))
+        
+        if all(report.startswith("Research failed") for report in reports):
+            raise RuntimeError(f"All {len(subtopics)} subtopic research crews failed")
+        return self.merge_research_reports(query, subtopics, reports)
+    
+    def merge_research_reports(self, query: str, subtopics: List[str], reports: List[str]) -> str:
+        """Combine per-subtopic reports into one research report for the summarizer"""
+        sections = [f"Research report on: {query}", f"Covered subtopics: {', '.join(subtopics)}"]
+        for subtopic, report in zip(subtopics, reports):
+            sections.append(f"## {subtopic}\n\n{report.strip()}")
+        return "\n\n".join(sections)
+    
+    async def _load_query_index(self):
+        """Index recent completed sessions from the database, newest first"""
+        oldest = time.time() - settings.QUERY_DEDUP_MAX_AGE_HOURS * 3600
+        cursor = None
+        while len(self.query_index) < settings.QUERY_DEDUP_INDEX_SIZE:
+            sessions, cursor = await self.db.list_sessions(limit=100, cursor=cursor)
+            for session in sessions:
+                created_at = parse_timestamp(session.get("created_at"))
+                if created_at < oldest:
+                    return
+                if session.get("status") == "completed":
+                    self.query_index.add(session["session_id"], session["query"], created_at)
+            if cursor is None:
+                return
+    
+    async def find_similar_session(self, query: str) -> Optional[Tuple[Dict[str, Any], float]]:
+        """Most similar recent completed session (row, similarity) above the context threshold"""
+        if not settings.QUERY_DEDUP_ENABLED:
+            return None
+        try:
+            if not self._query_index_loaded:
+                await self._load_query_index()
+                self._query_index_loaded = True
+            match = self.query_index.find(
+                query, settings.QUERY_DEDUP_CONTEXT_THRESHOLD, settings.QUERY_DEDUP_MAX_AGE_HOURS * 3600
+            )
+            if match is None:
+                return None
+            session_id, similarity = match
+            session = await self.db.get_research_session(session_id)
+            if not session or session.get("status") != "completed":
+                self.query_index.remove(session_id)  # Deleted or overwritten since it was indexed
+                return None
+            return session, similarity
+        except Exception as e:
+            print(f"Error looking up similar sessions: {e}")
+            return None
+    
+    async def servable_session(self, query: str) -> Optional[Dict[str, Any]]:
+        """The result execute_research_flow would serve as is for `query`, if any"""
+        similar = await self.find_similar_session(query)
+        if similar and similar[1] >= settings.QUERY_DEDUP_SERVE_THRESHOLD:
+            return self.reused_result(query, *similar)
+        return None
+    
+    async def create_session(self, query: str, session_id: Optional[str] = None, status: str = "in_progress",
+                             durable: bool = False) -> str:
+        """Save the initial row for a run and return its session_id
+        
+        durable=True pushes the row through the write-behind queue at once,
+        for ids handed to clients that may poll any replica.
+        """
+        session_id = session_id or str(uuid.uuid4())
+        await self.db.save_research_session({"session_id": session_id, "query": query, "status": status})
+        if durable and hasattr(self.db, "flush_now"):
+            await self.db.flush_now()
+        return session_id
+    
+    @staticmethod
+    def reused_result(query: str, previous: Dict[str, Any], similarity: float) -> Dict[str, Any]:
+        return {
+            "session_id": previous["session_id"],
+            "query": query,
+            "research": previous.get("research_output") or "",
+            "summary": previous.get("summary_output") or "",
+            "critique": previous.get("critique_output") or "",
+            "status": "completed",
+            "time_to_first_token": {},
+            "reused_from": {"session_id": previous["session_id"], "query": previous["query"], "similarity": similarity}
+        }
+    
+    async def execute_research_flow(self, query: str, notify: Optional[Callable[[str, str], None]] = None,
+                                    on_token: Optional[Callable[[str, str], None]] = None,
+                                    fanout_subtopics: Optional[int] = None,
+                                    reuse_similar: bool = True,
+                                    session_id: Optional[str] = None) -> Dict[str, Any]:
+        """Execute the complete research flow with all three agents
+        
+        The orchestrator is shared across callers, so per-run UI hooks are
+        arguments: notify(level, message) overrides the instance notifier, and
+        on_token(phase, text_so_far) turns on token streaming. With
+        reuse_similar, a recent session for a near-identical query is returned
+        as is, and a merely similar one is handed to the researcher as context.
+        Each phase's output is checkpointed as it completes (see resume()).
+        session_id lets callers (the HTTP API) hand out the id before the
+        run starts, optionally after saving its row with create_session();
+        the result is always stored under that id, even when a near-duplicate
+        is served. The whole run is traced; the result carries its trace_id.
+        """
+        with span("research_flow", kind="flow", query=query) as flow:
+            result = await self._run_research_flow(query, notify, on_token, fanout_subtopics, reuse_similar,
+                                                   session_id)
+            flow.set(session_id=result["session_id"], status=result["status"])
+            result["trace_id"] = flow.trace_id
+            return result
+    
+    async def _run_research_flow(self, query: str, notify: Optional[Callable[[str, str], None]],
+                                 on_token: Optional[Callable[[str, str], None]],
+                                 fanout_subtopics: Optional[int], reuse_similar: bool,
+                                 session_id: Optional[str] = None) -> Dict[str, Any]:
+        # An id handed out by the caller may already have its row (see create_session)
+        issued = session_id is not None
+        existing = await self.db.get_research_session(session_id) if issued else None
+        session_id = session_id or str(uuid.uuid4())
+        notify = notify or self.notify
+        if fanout_subtopics is None:
+            fanout_subtopics = self.fanout_subtopics
+        
+        similar = await self.find_similar_session(query) if reuse_similar else None
+        context = None
+        if similar:
+            previous, similarity = similar
+            if similarity >= settings.QUERY_DEDUP_SERVE_THRESHOLD:
+                notify("info", f"♻️ Reusing recent research on \"{previous['query']}\" ({similarity:.0%} similar)")
+                result = self.reused_result(query, previous, similarity)
+                if issued:
+                    # Keep the issued id pollable: store the reused outputs under it
+                    result["session_id"] = session_id
+                    if existing is None:
+                        await self.db.save_research_session(result)
+                    else:
+                        await self.db.update_research_session(session_id, {
+                            "research_output": result["research"],
+                            "summary_output": result["summary"],
+                            "critique_output": result["critique"],
+                            "status": "completed"
+                        })
+                return result
+            context = [{"query": previous["query"], "summary": previous.get("summary_output") or ""}]
+        
+        if existing is not None:
+            await self.db.update_research_session(session_id, {"status": "in_progress"})
+        else:
+            await self.create_session(query, session_id)
+        
+        return await self._run_phases(session_id, query, {}, PHASES, notify, on_token, fanout_subtopics, context)
+    
+    async def _run_phase(self, phase: str, query: str, outputs: Dict[str, str], fanout_subtopics: int,
+                         context: Optional[List[Dict]], context_tokens: Dict[str, Any],
+                         instructions: Optional[str], quality: Dict[str, Any]) -> str:
+        """Run one phase's crew on the outputs of the phases before it
+        
+        The critique phase runs the local pre-critic first and only calls
+        the critic agent when the summary does not clearly pass (or when
+        there are extra instructions for it).
+        """
+        # Extra instructions target a single research task, so they skip fan-out
+        if phase == "research" and fanout_subtopics > 1 and not instructions:
+            return await asyncio.to_thread(self.run_fanout_research, query, fanout_subtopics, context)
+        
+        if phase == "research":
+            agent = self.create_researcher_agent()
+            task = self.create_research_task(agent, query, context)
+        elif phase == "summary":
+            agent = self.create_summarizer_agent()
+            task = self.create_summarization_task(agent, outputs["research"], context_tokens)
+        else:
+            critique = None if instructions else self.pre_critique(outputs["summary"], outputs["research"], quality)
+            if critique is not None:
+                stream = current_stream()
+                if stream is not None:
+                    stream.push(critique)
+                return critique
+            agent = self.create_critic_agent()
+            task = self.create_critique_task(agent, outputs["summary"], outputs["research"], context_tokens,
+                                             checks=quality.get("findings", ""))
+        if instructions:
+            task.description += f"\n            Additional instructions: {instructions}\n"
+        
+        crew = Crew(
+            agents=[agent],
+            tasks=[task],
+            process=Process.sequential,
+            verbose=True
+        )
+        return str(await crew.kickoff_async())
+    
+    async def _checkpoint(self, session_id: str, phase: str, outputs: Dict[str, str]):
+        status = "completed" if all(outputs.get(name) for name in PHASES) else "in_progress"
+        await self.db.update_research_session(session_id, {f"{phase}_output": outputs[phase], "status": status})
+    
+    def _create_agents(self) -> Dict[str, Agent]:
+        """A fresh researcher/summarizer/critic set for one run.
+        
+        CrewAI agents keep per-instance state across tasks (their retry
+        count is never reset), so a set is not shared between runs; building
+        one costs well under a millisecond next to the LLM calls.
+        """
+        return {
+            "research": self.create_researcher_agent(),
+            "summary": self.create_summarizer_agent(),
+            "critique": self.create_critic_agent()
+        }
+    
+    async def _run_single_crew(self, session_id: str, query: str, outputs: Dict[str, str],
+                               notify: Callable[[str, str], None], token_stream: TokenStream,
+                               context: Optional[List[Dict]], context_tokens: Dict[str, Any],
+                               instructions: Optional[str], quality: Dict[str, Any]):
+        """Run all three phases as one sequential crew
+        
+        The summary and critique tasks read earlier outputs through CrewAI
+        task context instead of re-embedding them in their descriptions.
+        Task callbacks checkpoint each output as it completes and compact
+        the research report before later tasks see it. The critique task is
+        conditional: it is skipped when the pre-critic passes the summary.
+        """
+        agents = self._create_agents()
+        local_critique: Dict[str, str] = {}
+        skippable = settings.PRECRITIC_ENABLED and not instructions
+        research_task = self.create_research_task(agents["research"], query, context)
+        summary_task = self.create_summarization_task(agents["summary"], None, context=[research_task])
+        critique_task = self.create_critique_task(
+            agents["critique"], None, None, context=[research_task, summary_task],
+            condition=(lambda summary_output: "critique" not in local_critique) if skippable else None
+        )
+        tasks = {"research": research_task, "summary": summary_task, "critique": critique_task}
+        
+        with span("single_crew", kind="phase") as active:
+            started = time.perf_counter()
+            
+            def finish(phase: str, output):
+                nonlocal started
+                outputs[phase] = str(output.raw)
+                active.set(**{f"{phase}_s": round(time.perf_counter() - started, 3)})
+                started = time.perf_counter()
+                run_async(self._checkpoint(session_id, phase, outputs))
+                if phase == "summary" and skippable:
+                    critique = self.pre_critique(outputs["summary"], outputs["research"], quality)
+                    if critique is not None:
+                        local_critique["critique"] = critique
+                    elif quality.get("findings"):
+                        critique_task.description += f"\n            Automated checks flagged (verify these first): {quality['findings']}\n"
+                if phase == "research":
+                    output.raw = self.compact(output.raw, settings.SUMMARY_RESEARCH_TOKENS, "context_research",
+                                              context_tokens)
+                next_phase = PHASES[PHASES.index(phase) + 1] if phase != PHASES[-1] else None
+                if next_phase:
+                    notify("info", PHASE_MESSAGES[next_phase])
+                    token_stream.switch(next_phase)
+            
+            for phase, task in tasks.items():
+                task.callback = functools.partial(finish, phase)
+                if instructions:
+                    task.description += f"\n            Additional instructions: {instructions}\n"
+            
+            notify("info", PHASE_MESSAGES["research"])
+            with token_stream.phase("research"):
+                crew = Crew(
+                    agents=list(agents.values()),
+                    tasks=list(tasks.values()),
+                    process=Process.sequential,
+                    verbose=True
+                )
+                await crew.kickoff_async()
+                
+                if "critique" in local_critique:
+                    outputs["critique"] = local_critique["critique"]
+                    token_stream.push(outputs["critique"])
+                    active.set(critique_s=round(time.perf_counter() - started, 3))
+                    await self._checkpoint(session_id, "critique", outputs)
+    
+    async def _run_phases(self, session_id: str, query: str, outputs: Dict[str, str], phases: List[str],
+                          notify: Callable[[str, str], None], on_token: Optional[Callable[[str, str], None]],
+                          fanout_subtopics: int, context: Optional[List[Dict]] = None,
+                          instructions: Optional[str] = None) -> Dict[str, Any]:
+        """Run `phases` in order, checkpointing each output to storage as soon as it completes
+        
+        outputs holds the checkpointed outputs of phases that are not re-run.
+        A failure keeps those checkpoints and marks the session failed, so
+        resume() only has to run the phases that are still missing.
+        """
+        # Live token output, one placeholder per phase
+        token_stream = TokenStream(on_token or (lambda phase, text: None), enabled=on_token is not None)
+        context_tokens: Dict[str, Any] = {}
+        quality: Dict[str, Any] = {}  # Pre-critic assessment of the summary
+        
+        phase = None
+        try:
+            with result_store_session() as result_store:
+                if self.pipeline_mode == "single_crew" and tuple(phases) == PHASES and fanout_subtopics <= 1:
+                    await self._run_single_crew(session_id, query, outputs, notify, token_stream, context,
+                                                context_tokens, instructions, quality)
+                    phases = []
+                for phase in phases:
+                    notify("info", PHASE_MESSAGES[phase])
+                    with token_stream.phase(phase), span(phase, kind="phase"):
+                        outputs[phase] = await self._run_phase(
+                            phase, query, outputs, fanout_subtopics, context, context_tokens, instructions, quality
+                        )
+                    await self._checkpoint(session_id, phase, outputs)
+        except Exception as e:
+            if phase is None:  # Single-crew run: the first phase without output failed
+                phase = next((name for name in PHASES if not outputs.get(name)), PHASES[-1])
+            notify("error", f"Research flow error in {phase} phase: {e}")
+            
+            # Keep the checkpointed phases; only the status changes
+            await self.db.update_research_session(session_id, {"status": "failed"})
+            
+            return {
+                "session_id": session_id,
+                "query": query,
+                "research": outputs.get("research") or f"Research failed: {str(e)}",
+                "summary": outputs.get("summary") or (
+                    f"Summary failed: {str(e)}" if phase == "summary" else "Unable to generate summary due to research failure"
+                ),
+                "critique": outputs.get("critique") or (
+                    f"Critique failed: {str(e)}" if phase == "critique" else "Unable to provide critique due to research failure"
+                ),
+                "status": "failed",
+                "failed_phase": phase
+            }
+        
+        self.query_index.add(session_id, query)
+        return {
+            "session_id": session_id,
+            "query": query,
+            "research": outputs["research"],
+            "summary": outputs["summary"],
+            "critique": outputs["critique"],
+            "status": "completed",
+            "time_to_first_token": dict(token_stream.ttft),
+            "context_tokens": context_tokens,
+            "search_dedup": result_store.stats() if result_store else {},
+            "precritic": quality,
+            "pipeline": self.pipeline_mode
+        }
+    
+    async def resume(self, session_id: str, notify: Optional[Callable[[str, str], None]] = None,
+                     on_token: Optional[Callable[[str, str], None]] = None,
+                     rerun: Optional[List[str]] = None, instructions: Optional[str] = None,
+                     fanout_subtopics: Optional[int] = None) -> Dict[str, Any]:
+        """Finish a stored session by running only the phases without a checkpoint
+        
+        rerun names phases to run again even though they completed, e.g.
+        rerun=["critique"] with new instructions re-critiques the stored
+        summary; the phases after a re-run one are not repeated. Raises
+        ValueError for an unknown session or phase.
+        """
+        notify = notify or self.notify
+        if fanout_subtopics is None:
+            fanout_subtopics = self.fanout_subtopics
+        rerun = list(rerun or [])
+        unknown = [phase for phase in rerun if phase not in PHASES]
+        if unknown:
+            raise ValueError(f"Unknown phase(s) {unknown}; expected some of {list(PHASES)}")
+        
+        with span("research_flow", kind="flow", session_id=session_id, resumed=True) as flow:
+            session = await self.db.get_research_session(session_id)
+            if session is None:
+                raise ValueError(f"Research session {session_id} not found")
+            
+            outputs = {}
+            for phase in PHASES:
+                text = session.get(f"{phase}_output") or ""
+                # Sessions that failed before checkpointing stored error text in place of outputs
+                if session.get("status") == "failed" and text.startswith(LEGACY_FAILURE_PREFIXES):
+                    text = ""
+                if text and phase not in rerun:
+                    outputs[phase] = text
+            phases = [phase for phase in PHASES if phase not in outputs]
+            
+            if phases:
+                notify("info", f"⏯️ Running {', '.join(phases)} for \"{session['query']}\"")
+            result = await self._run_phases(
+                session_id, session["query"], outputs, phases, notify, on_token, fanout_subtopics,
+                instructions=instructions
+            )
+            result["resumed_phases"] = phases
+            flow.set(status=result["status"], phases=",".join(phases))
+            result["trace_id"] = flow.trace_id
+            return result
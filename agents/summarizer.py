@@ -1,10 +1,10 @@
 # agents/summarizer.py
 from crewai import Agent
-from utils.gemini_setup import gemini_setup
+from agents.orchestrator import get_role_llm
 
 class SummarizerAgent:
     def __init__(self):
-        self.llm = gemini_setup.get_llm()
+        self.llm = get_role_llm("summary")
     
     def create_agent(self) -> Agent:
         return Agent(
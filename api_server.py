@@ -0,0 +1,431 @@
+# api_server.py
+"""HTTP API for the research team, for service-to-service use.
+
+    python api_server.py --port 8000
+
+    POST /research                    {"query": ..., "fanout_subtopics": 1, "reuse_similar": true, "stream": false}
+    GET  /research/<session_id>        status, progress and (once finished) the result
+    GET  /research/<session_id>/events server-sent events until the session finishes
+    POST /research/<session_id>/resume {"rerun": ["critique"], "instructions": ...}
+    POST /research/<session_id>/cancel cancel a job that has not started yet
+    GET  /healthz                      liveness and load
+    GET  /metrics                      Prometheus text (traced spans plus admission counters)
+
+Submissions run on a bounded pool (API_WORKERS) behind a bounded queue
+(API_MAX_QUEUE); beyond that, and beyond a client's quota, the server answers
+429 with Retry-After. Job ids are session ids: the session row is written
+through to storage before the id is returned, and every phase is checkpointed,
+so with a shared database (Supabase, or SQLite on a shared volume) any replica
+can answer status requests for a session another replica runs.
+Quotas are enforced per replica. An event stream ends when the session
+finishes or after API_EVENTS_TIMEOUT seconds, so a session left "queued" by a
+replica that died does not hold a client forever.
+"""
+import argparse
+import ipaddress
+import json
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional, Tuple
+
+from agents.orchestrator import PHASES
+from config.settings import settings
+from utils.async_runner import run_async
+from utils.jobs import JobManager
+from utils.rate_limiter import TokenBucketLimiter
+from utils.tracing import get_tracer
+
+MAX_BODY_BYTES = 64 * 1024
+MAX_QUERY_CHARS = 2000
+
+
+class AdmissionError(Exception):
+    """A request the server refuses to queue; carries the HTTP status and Retry-After"""
+
+    def __init__(self, status: int, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+class ResearchService:
+    """Admission control and job bookkeeping shared by all request threads"""
+
+    def __init__(self, orchestrator=None, workers: Optional[int] = None, max_queue: Optional[int] = None,
+                 client_rpm: Optional[int] = None, client_max_active: Optional[int] = None):
+        self._orchestrator_instance = orchestrator
+        self.jobs = JobManager(workers=workers or settings.API_WORKERS)
+        self.max_queue = settings.API_MAX_QUEUE if max_queue is None else max_queue
+        self.client_rpm = client_rpm or settings.API_CLIENT_RPM
+        self.client_max_active = client_max_active or settings.API_CLIENT_MAX_ACTIVE
+        self._limiters: Dict[str, TokenBucketLimiter] = {}
+        self._client_jobs: Dict[str, set] = {}
+        self._reserved: set = set()  # Admitted job ids still being prepared, not yet queued
+        self._lock = threading.Lock()
+        self.counters = {"accepted": 0, "served_similar": 0, "rejected_queue": 0, "rejected_quota": 0}
+
+    @property
+    def orchestrator(self):
+        with self._lock:
+            if self._orchestrator_instance is None:
+                from agents.orchestrator import ResearchOrchestrator
+                self._orchestrator_instance = ResearchOrchestrator()
+            return self._orchestrator_instance
+
+    def _check_rate(self, client: str):
+        with self._lock:
+            limiter = self._limiters.get(client)
+            if limiter is None:
+                limiter = self._limiters[client] = TokenBucketLimiter(self.client_rpm, self.client_rpm)
+        wait = limiter.try_acquire()
+        if wait > 0:
+            self._count("rejected_quota")
+            raise AdmissionError(429, f"Rate limit of {self.client_rpm} submissions per minute exceeded", wait)
+
+    def _count(self, name: str):
+        with self._lock:
+            self.counters[name] += 1
+
+    def _admit(self, client: str, kind: str, label: str, run, job_id: str, prepare=None) -> str:
+        """Queue a job unless the client or the server is at capacity
+
+        The slot is reserved under the lock, together with the check that
+        job_id is not already running; prepare() (which may do I/O) runs
+        after the lock is released and before the job is queued, and the
+        reservation is rolled back if it fails.
+        """
+        with self._lock:
+            active = {active_id for active_id in self._client_jobs.get(client, set())
+                      if active_id in self._reserved
+                      or ((job := self.jobs.get(active_id)) is not None and not job.finished)}
+            self._client_jobs[client] = active
+            existing = self.jobs.get(job_id)
+            if job_id in self._reserved or (existing is not None and not existing.finished):
+                raise AdmissionError(409, "Session is already running")
+            if len(active) >= self.client_max_active:
+                self.counters["rejected_quota"] += 1
+                raise AdmissionError(429, f"Client already has {len(active)} active research jobs", 10)
+            if self.jobs.queue_depth() + len(self._reserved) >= self.max_queue:
+                self.counters["rejected_queue"] += 1
+                raise AdmissionError(429, "Research queue is full, retry later", 30)
+            active.add(job_id)
+            self._reserved.add(job_id)
+        try:
+            if prepare is not None:
+                prepare()
+            self.jobs.submit(kind, label, run, job_id)
+        except Exception:
+            with self._lock:
+                self._client_jobs.get(client, set()).discard(job_id)
+            raise
+        finally:
+            with self._lock:
+                self._reserved.discard(job_id)
+        self._count("accepted")
+        return job_id
+
+    def submit(self, client: str, body: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        query = body.get("query")
+        if not isinstance(query, str) or not query.strip():
+            raise AdmissionError(400, "Field 'query' must be a non-empty string")
+        if len(query) > MAX_QUERY_CHARS:
+            raise AdmissionError(400, f"Field 'query' is longer than {MAX_QUERY_CHARS} characters")
+        query = query.strip()
+        reuse_similar = bool(body.get("reuse_similar", True))
+        stream = bool(body.get("stream", False))
+        fanout_subtopics = body.get("fanout_subtopics")
+        if fanout_subtopics is not None and (not isinstance(fanout_subtopics, int) or not 1 <= fanout_subtopics <= 6):
+            raise AdmissionError(400, "Field 'fanout_subtopics' must be an integer from 1 to 6")
+
+        self._check_rate(client)
+        orchestrator = self.orchestrator
+        if reuse_similar:
+            # Answer near-duplicates right away instead of spending a worker on them
+            served = run_async(orchestrator.servable_session(query))
+            if served:
+                self._count("served_similar")
+                return 200, served
+
+        session_id = str(uuid.uuid4())
+        self._admit(client, "research", query, lambda notify, on_token: orchestrator.execute_research_flow(
+            query, notify=notify, on_token=on_token if stream else None,
+            fanout_subtopics=fanout_subtopics, reuse_similar=reuse_similar, session_id=session_id
+        ), session_id, prepare=lambda: run_async(
+            # Stored before the id is returned, so every replica can answer polls for it
+            orchestrator.create_session(query, session_id, status="queued", durable=True)
+        ))
+        return 202, {"session_id": session_id, "status": "queued", "query": query}
+
+    def resume(self, client: str, session_id: str, body: Dict[str, Any]) -> Tuple[int, Dict[str, Any]]:
+        rerun = body.get("rerun") or []
+        if not isinstance(rerun, list) or any(phase not in PHASES for phase in rerun):
+            raise AdmissionError(400, f"Field 'rerun' must be a list of phases from {list(PHASES)}")
+        instructions = body.get("instructions")
+        if instructions is not None and not isinstance(instructions, str):
+            raise AdmissionError(400, "Field 'instructions' must be a string")
+        self._check_rate(client)
+        orchestrator = self.orchestrator
+        session = run_async(orchestrator.db.get_research_session(session_id))
+        if session is None:
+            raise AdmissionError(404, "Session not found")
+        self._admit(client, "resume", session["query"], lambda notify, on_token: orchestrator.resume(
+            session_id, notify=notify, rerun=rerun, instructions=instructions
+        ), session_id)
+        return 202, {"session_id": session_id, "status": "queued", "query": session["query"]}
+
+    def cancel(self, client: str, session_id: str) -> Tuple[int, Dict[str, Any]]:
+        """Cancel a queued job of this client and mark its session cancelled in storage"""
+        with self._lock:
+            owned = session_id in self._client_jobs.get(client, set())
+        job = self.jobs.get(session_id) if owned else None
+        if job is None:
+            raise AdmissionError(404, "No job of this client with that session id")
+        if job.finished or not self.jobs.cancel(session_id):
+            raise AdmissionError(409, f"Job is {job.status} and can no longer be cancelled")
+        db = self.orchestrator.db
+        run_async(db.update_research_session(session_id, {"status": "cancelled"}))
+        if hasattr(db, "flush_now"):
+            run_async(db.flush_now())  # Other replicas answer polls for it from storage
+        return 200, {"session_id": session_id, "status": "cancelled", "query": job.label}
+
+    def status(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """This replica's job state if it runs the session, else the checkpointed row"""
+        job = self.jobs.status(session_id)
+        if job is not None:
+            status = {
+                "session_id": session_id,
+                "query": job["label"],
+                "status": job["status"],
+                "phase": job["phase"],
+                "messages": job["messages"],
+                "elapsed_seconds": job["elapsed_seconds"],
+            }
+            if job["result"] is not None:
+                status["result"] = job["result"]
+            if job["error"]:
+                status["error"] = job["error"]
+            return status
+
+        session = run_async(self.orchestrator.db.get_research_session(session_id))
+        if session is None:
+            return None
+        status = {
+            "session_id": session_id,
+            "query": session["query"],
+            "status": session["status"],
+            "phases_completed": [phase for phase in PHASES if session.get(f"{phase}_output")],
+        }
+        if session["status"] in ("completed", "failed"):
+            status["result"] = {phase: session.get(f"{phase}_output") or "" for phase in PHASES}
+        return status
+
+    def tokens(self, session_id: str) -> Dict[str, str]:
+        job = self.jobs.status(session_id)
+        return job["tokens"] if job else {}
+
+    def health(self) -> Dict[str, Any]:
+        active = self.jobs.jobs(active_only=True)
+        return {
+            "status": "ok",
+            "running": sum(job["status"] == "running" for job in active),
+            "queued": sum(job["status"] == "queued" for job in active),
+            "workers": self.jobs.workers,
+            "max_queue": self.max_queue,
+        }
+
+    def prometheus(self) -> str:
+        health = self.health()
+        lines = [
+            "# HELP research_api_jobs Research jobs on this replica by state",
+            "# TYPE research_api_jobs gauge",
+            f'research_api_jobs{{state="running"}} {health["running"]}',
+            f'research_api_jobs{{state="queued"}} {health["queued"]}',
+            "# HELP research_api_submissions_total Research submissions by outcome",
+            "# TYPE research_api_submissions_total counter",
+        ]
+        with self._lock:
+            for outcome, count in sorted(self.counters.items()):
+                lines.append(f'research_api_submissions_total{{outcome="{outcome}"}} {count}')
+        return get_tracer().metrics.prometheus() + "\n".join(lines) + "\n"
+
+
+class ResearchRequestHandler(BaseHTTPRequestHandler):
+    server_version = "ResearchAPI/1.0"
+    service: ResearchService = None  # Set by make_server
+
+    # Plumbing
+
+    def _send_json(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None):
+        body = json.dumps(payload, default=str).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_error(self, error: AdmissionError):
+        headers = {"Retry-After": str(max(1, round(error.retry_after)))} if error.retry_after else None
+        self._send_json(error.status, {"error": str(error)}, headers)
+
+    def _client(self) -> str:
+        """The API key when keys are configured, else X-Client-Id or the peer address"""
+        if settings.API_KEYS:
+            auth = self.headers.get("Authorization", "")
+            key = auth[7:].strip() if auth.lower().startswith("bearer ") else self.headers.get("X-API-Key", "")
+            if key not in settings.API_KEYS:
+                raise AdmissionError(401, "Missing or invalid API key")
+            return f"key:{key[:8]}"
+        return self.headers.get("X-Client-Id") or self.client_address[0]
+
+    def _body(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            raise AdmissionError(413, "Request body too large")
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            raise AdmissionError(400, "Request body must be JSON")
+        if not isinstance(body, dict):
+            raise AdmissionError(400, "Request body must be a JSON object")
+        return body
+
+    def log_message(self, format: str, *args):
+        print(f"[api] {self.address_string()} {format % args}")
+
+    # Routes
+
+    def do_POST(self):
+        try:
+            client = self._client()
+            if self.path.rstrip("/") == "/research":
+                status, payload = self.service.submit(client, self._body())
+            elif match := re.fullmatch(r"/research/([\w-]+)/resume", self.path):
+                status, payload = self.service.resume(client, match.group(1), self._body())
+            elif match := re.fullmatch(r"/research/([\w-]+)/cancel", self.path):
+                status, payload = self.service.cancel(client, match.group(1))
+            else:
+                raise AdmissionError(404, "Not found")
+            headers = {"Location": f"/research/{payload['session_id']}"} if status == 202 else None
+            self._send_json(status, payload, headers)
+        except AdmissionError as e:
+            self._send_error(e)
+        except Exception as e:
+            self._send_json(500, {"error": f"Internal error: {e}"})
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0].rstrip("/")
+        try:
+            if path == "/healthz":
+                return self._send_json(200, self.service.health())
+            if path == "/metrics":
+                body = self.service.prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                return
+            self._client()
+            if match := re.fullmatch(r"/research/([\w-]+)", path):
+                status = self.service.status(match.group(1))
+                if status is None:
+                    raise AdmissionError(404, "Session not found")
+                return self._send_json(200, status)
+            if match := re.fullmatch(r"/research/([\w-]+)/events", path):
+                return self._stream_events(match.group(1))
+            raise AdmissionError(404, "Not found")
+        except AdmissionError as e:
+            self._send_error(e)
+        except Exception as e:
+            self._send_json(500, {"error": f"Internal error: {e}"})
+
+    def _stream_events(self, session_id: str):
+        """Server-sent events: "status" on every change, "token" for live text, "done" at the end
+
+        Gives up with a "timeout" event after API_EVENTS_TIMEOUT seconds;
+        clients can reconnect to keep following the session.
+        """
+        status = self.service.status(session_id)
+        if status is None:
+            raise AdmissionError(404, "Session not found")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+        last_status, last_tokens = None, {}
+        deadline = time.monotonic() + settings.API_EVENTS_TIMEOUT
+        try:
+            while True:
+                snapshot = {key: value for key, value in status.items() if key != "result"}
+                if snapshot != last_status:
+                    self._send_event("status", snapshot)
+                    last_status = snapshot
+                tokens = self.service.tokens(session_id)
+                for phase, text in tokens.items():
+                    if last_tokens.get(phase) != text:
+                        self._send_event("token", {"phase": phase, "text": text})
+                last_tokens = tokens
+                if status["status"] not in ("queued", "running", "in_progress"):
+                    self._send_event("done", status)
+                    return
+                if time.monotonic() >= deadline:
+                    self._send_event("timeout", snapshot)
+                    return
+                # Sessions run by another replica are polled from storage, less often
+                time.sleep(0.5 if self.service.jobs.get(session_id) else 2.0)
+                status = self.service.status(session_id) or status
+        except (BrokenPipeError, ConnectionResetError):
+            return
+
+    def _send_event(self, event: str, payload: Dict[str, Any]):
+        self.wfile.write(f"event: {event}\ndata: {json.dumps(payload, default=str)}\n\n".encode("utf-8"))
+        self.wfile.flush()
+
+
+def is_loopback(host: str) -> bool:
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def make_server(host: str, port: int, service: ResearchService) -> ThreadingHTTPServer:
+    handler = type("Handler", (ResearchRequestHandler,), {"service": service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve the research team over HTTP")
+    parser.add_argument("--host", default=settings.API_HOST)
+    parser.add_argument("--port", type=int, default=settings.API_PORT)
+    parser.add_argument("--workers", type=int, default=settings.API_WORKERS, help="Concurrent research flows")
+    parser.add_argument("--max-queue", type=int, default=settings.API_MAX_QUEUE, help="Queued flows before 429")
+    args = parser.parse_args()
+    if not settings.API_KEYS and not is_loopback(args.host):
+        # Anyone who can reach the port could start LLM runs and page fetches
+        parser.error(f"refusing to listen on {args.host} without API_KEYS; set API_KEYS or bind 127.0.0.1")
+
+    service = ResearchService(workers=args.workers, max_queue=args.max_queue)
+    service.orchestrator  # Fail fast on a missing API key or database
+    server = make_server(args.host, args.port, service)
+    print(f"Research API listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
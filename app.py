@@ -1,307 +1,142 @@
 # app.py
 import streamlit as st
-import asyncio
-from crewai import Agent, Task, Crew, Process
-from crewai.tools import BaseTool
-from pydantic import BaseModel, Field
-import uuid
-from typing import Dict, Any, Type
+import json
+from typing import Dict, Any
 import os
 from dotenv import load_dotenv
-import time
 
-# Import the Supabase client
-from database.supabase_client import SupabaseClient
+from config.settings import settings
+from utils.async_runner import run_async
+from utils.jobs import get_job_manager
+from utils.model_router import model_health_summary, role_profile
+from utils.startup_profile import startup_profile
+from utils.tracing import get_tracer
 
 load_dotenv()
 
-# Configure Gemini LLM
-try:
-    from crewai.llm import LLM
-    gemini_llm = LLM(
-        model="gemini/gemini-2.0-flash",
-        api_key=os.getenv("GOOGLE_API_KEY"),
-        temperature=0.1
-    )
-except Exception as e:
-    st.error(f"Gemini LLM setup failed: {e}")
-    gemini_llm = None
-
-# Web Search Tool (same as before)
-class WebSearchInput(BaseModel):
-    query: str = Field(..., description="Search query")
-    max_results: int = Field(default=3, description="Maximum number of results")
-
-class WebSearchTool(BaseTool):
-    name: str = "web_search"
-    description: str = "Search the web for current information and news"
-    args_schema: Type[BaseModel] = WebSearchInput
+def streamlit_notify(level: str, message: str):
+    """Show orchestrator progress as a Streamlit banner"""
+    if level == "error":
+        st.error(message)
+    else:
+        st.info(message)
 
-    def _run(self, query: str, max_results: int = 3) -> str:
+@st.cache_resource(show_spinner="Starting research team...")
+def get_orchestrator():
+    """Build the orchestrator (LLM, search tool, database client) once per process.
+    
+    Shared by every rerun and browser session; CrewAI and the database
+    client are only imported the first time this runs. Returns the
+    orchestrator and the error of a one-off database round trip (None
+    when the database answered).
+    """
+    with startup_profile.stage("import agents.orchestrator"):
+        from agents.orchestrator import PHASES, ResearchOrchestrator, get_role_llm
+    with startup_profile.stage("build Gemini LLMs"):
+        for phase in PHASES:
+            get_role_llm(phase)
+    with startup_profile.stage("create ResearchOrchestrator"):
+        orchestrator = ResearchOrchestrator(notify=streamlit_notify)
+    with startup_profile.stage("check database"):
         try:
-            from ddgs import DDGS
-            search_client = DDGS()
-            results = search_client.text(query, max_results=max_results)
-            
-            if not results:
-                return f"No results found for query: {query}"
-            
-            result_text = f"Search results for: {query}\n\n"
-            for i, result in enumerate(results, 1):
-                result_text += f"[{i}] {result.get('title', 'N/A')}\n"
-                result_text += f"   URL: {result.get('href', 'N/A')}\n"
-                snippet = result.get('body', 'N/A')
-                if len(snippet) > 200:
-                    snippet = snippet[:200] + "..."
-                result_text += f"   Info: {snippet}\n\n"
-            
-            return result_text
-            
+            run_async(orchestrator.db.ping())
+            db_error = None
         except Exception as e:
-            return f"Search error: {str(e)}"
+            db_error = str(e) or type(e).__name__
+    return orchestrator, db_error
 
-class ResearchOrchestrator:
-    def __init__(self):
-        self.search_tool = WebSearchTool()
-        self.llm = gemini_llm
-        self.db = SupabaseClient()  # Initialize database client
-        
-        if not self.llm:
-            raise ValueError("Gemini LLM not properly initialized. Check your GOOGLE_API_KEY.")
-    
-    # ... (all your agent creation methods remain the same)
-    def create_researcher_agent(self) -> Agent:
-        return Agent(
-            role="Senior Research Analyst",
-            goal="Gather comprehensive, accurate, and up-to-date information on research topics. Be concise and focus on key insights.",
-            backstory="""You are an expert research analyst with years of experience in 
-            gathering and synthesizing information from diverse sources. You excel at 
-            identifying credible sources, extracting key insights, and providing 
-            well-structured research reports. You are particularly good at being concise.""",
-            tools=[self.search_tool],
-            verbose=True,
-            allow_delegation=False,
-            llm=self.llm,
-            max_iter=5,
-            max_rpm=10
-        )
-    
-    def create_summarizer_agent(self) -> Agent:
-        return Agent(
-            role="Content Summarizer",
-            goal="Condense research findings into clear, concise summaries while preserving key insights. Be very concise.",
-            backstory="""You are a skilled technical writer and editor who excels at 
-            distilling complex information into easily understandable formats. You have 
-            a talent for identifying core concepts and presenting them logically in a concise manner.""",
-            verbose=True,
-            allow_delegation=False,
-            llm=self.llm,
-            max_iter=3
-        )
-    
-    def create_critic_agent(self) -> Agent:
-        return Agent(
-            role="Quality Assurance Critic",
-            goal="Validate research quality, identify gaps, and ensure factual accuracy. Provide concise feedback.",
-            backstory="""You are a meticulous quality assurance expert with a background 
-            in academic research and fact-checking. You have zero tolerance for 
-            inaccuracies and always push for comprehensive coverage while being concise.""",
-            verbose=True,
-            allow_delegation=False,
-            llm=self.llm,
-            max_iter=3
-        )
-    
-    # ... (all your task creation methods remain the same)
-    def create_research_task(self, agent, query: str) -> Task:
-        return Task(
-            description=f"""
-            Conduct focused research on: {query}
-            
-            IMPORTANT: Be concise and focus on the most important information.
-            
-            Requirements:
-            - Use the web search tool to gather current information (max 2-3 searches)
-            - Focus on recent and credible sources
-            - Extract only key facts, trends, and insights
-            - Organize information logically but concisely
-            - Provide source references
-            
-            Provide a concise research report with:
-            1. Brief executive summary
-            2. Key findings with evidence
-            3. Important trends
-            4. Source credibility assessment
-            5. Potential implications
-            
-            Keep your response under 500 words.
-            """,
-            agent=agent,
-            expected_output="Concise research report with key insights (under 500 words)"
-        )
-    
-    def create_summarization_task(self, agent, research_data: str) -> Task:
-        if len(research_data) > 2000:
-            research_data = research_data[:2000] + "... [content truncated for length]"
-            
-        return Task(
-            description=f"""
-            Summarize the following research findings CONCISELY:
-            
-            {research_data}
-            
-            Create a very concise summary that:
-            - Highlights only the most important insights
-            - Preserves key details but be brief
-            - Uses clear, accessible language
-            - Maintains factual accuracy
-            
-            Structure your summary with:
-            - Main conclusion (1-2 sentences)
-            - Key supporting points (3-4 bullet points)
-            - Important implications
-            
-            Keep your entire response under 200 words.
-            """,
-            agent=agent,
-            expected_output="Very concise summary (under 200 words)"
-        )
+def show_job_messages(job: Dict[str, Any]):
+    """Render a job's progress messages like the orchestrator's notifier would"""
+    for message in job["messages"]:
+        if message["level"] == "error":
+            st.error(message["message"])
+        else:
+            st.info(message["message"])
+
+def session_from_row(session: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a full research_sessions row into the result dict the UI displays"""
+    return {
+        "session_id": session["session_id"],
+        "query": session["query"],
+        "research": session["research_output"],
+        "summary": session["summary_output"],
+        "critique": session["critique_output"],
+        "status": session["status"]
+    }
+
+def session_from_listing(session: Dict[str, Any]) -> Dict[str, Any]:
+    """Build a history entry from a listing row; full outputs are fetched when it is opened"""
+    preview = session.get("summary_preview") or ""
+    return {
+        "session_id": session["session_id"],
+        "query": session["query"],
+        "research": "",
+        "summary": preview + ("..." if session.get("summary_truncated") else ""),
+        "critique": "",
+        "status": session["status"],
+        "partial": True
+    }
+
+def open_session(orchestrator, research: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the full session, loading outputs from the database for listing entries"""
+    if not research.get("partial"):
+        return research
+    session = run_async(orchestrator.db.get_research_session(research["session_id"]))
+    return session_from_row(session) if session else research
+
+def submit_job(kind: str, label: str, run):
+    """Queue a flow on the background job manager and track it in this browser session"""
+    job_id = get_job_manager().submit(kind, label, run)
+    st.session_state.active_job = job_id
+    st.query_params["job"] = job_id  # Survives a page refresh
+
+def resume_session(orchestrator, research: Dict[str, Any], stream_output: bool, **kwargs):
+    """Run the missing (or requested) phases of a stored session as a background job"""
+    if st.session_state.active_job:
+        st.warning("⚠️ A research job is already running for this session.")
+        return
+    submit_job("resume", research["query"], lambda notify, on_token: orchestrator.resume(
+        research["session_id"], notify=notify, on_token=on_token if stream_output else None, **kwargs
+    ))
+    st.rerun()
+
+def collect_job(job: Dict[str, Any]):
+    """Move a finished job's result into this session's history"""
+    st.session_state.active_job = None
+    st.query_params.pop("job", None)
+    result = job["result"]
+    if result is None:
+        st.session_state.job_error = job["error"] or "Job did not produce a result"
+        return
+    st.session_state.research_history = [
+        item for item in st.session_state.research_history if item["session_id"] != result["session_id"]
+    ] + [result]
+    st.session_state.current_session = result
+    st.session_state.db_page = None
+    st.session_state.job_finished = result["status"]
+
+@st.fragment(run_every=1.0)
+def job_panel():
+    """Poll the active job until it finishes, then rerun the whole app with its result"""
+    job = get_job_manager().status(st.session_state.active_job)
+    if job is None:  # Finished long ago and pruned, or the server restarted
+        st.session_state.active_job = None
+        st.query_params.pop("job", None)
+        st.rerun()
     
-    def create_critique_task(self, agent, summary: str, original_research: str) -> Task:
-        if len(summary) > 1000:
-            summary = summary[:1000] + "..."
-        if len(original_research) > 1500:
-            original_research = original_research[:1500] + "..."
-            
-        return Task(
-            description=f"""
-            Provide CONCISE critique of this research summary:
-            
-            SUMMARY:
-            {summary}
-            
-            ORIGINAL RESEARCH (excerpt):
-            {original_research}
-            
-            Provide brief quality assessment evaluating:
-            - Accuracy: Does summary match research?
-            - Completeness: Any key points missing?
-            - Clarity: Is it easy to understand?
-            
-            Give 1-2 specific improvement suggestions.
-            Provide overall quality rating (1-5 stars).
-            
-            Keep your entire response under 150 words.
-            """,
-            agent=agent,
-            expected_output="Concise critique with rating and suggestions (under 150 words)"
-        )
+    with st.status(f"🧠 {job['label'][:60]} ({job['status']}, {job['elapsed_seconds']:.0f}s)",
+                   expanded=True, state="running") as status:
+        show_job_messages(job)
+        if job["phase"] and job["tokens"].get(job["phase"]):
+            st.markdown(f"**{job['phase'].title()} (live):**\n\n{job['tokens'][job['phase']]}")
+        if job["status"] == "queued":
+            status.update(label=f"⏳ Queued: {job['label'][:60]}")
+            if st.button("✖️ Cancel", key="cancel_job"):
+                get_job_manager().cancel(job["id"])
     
-    async def execute_research_flow(self, query: str) -> Dict[str, Any]:
-        """Execute the complete research flow with all three agents"""
-        
-        session_id = str(uuid.uuid4())
-        
-        try:
-            # Save initial session to database
-            initial_session = {
-                "session_id": session_id,
-                "query": query,
-                "research_output": "",
-                "summary_output": "",
-                "critique_output": "",
-                "status": "in_progress"
-            }
-            await self.db.save_research_session(initial_session)
-            
-            # Initialize all agents
-            researcher = self.create_researcher_agent()
-            summarizer = self.create_summarizer_agent()
-            critic = self.create_critic_agent()
-            
-            # Phase 1: Research
-            st.info("🔍 **Phase 1/3: Research** - Gathering information...")
-            research_task = self.create_research_task(researcher, query)
-            
-            research_crew = Crew(
-                agents=[researcher],
-                tasks=[research_task],
-                process=Process.sequential,
-                verbose=True
-            )
-            
-            time.sleep(2)
-            research_results = research_crew.kickoff()
-            
-            # Phase 2: Summarization
-            st.info("📝 **Phase 2/3: Summarization** - Condensing findings...")
-            summary_task = self.create_summarization_task(summarizer, str(research_results))
-            
-            summary_crew = Crew(
-                agents=[summarizer],
-                tasks=[summary_task],
-                process=Process.sequential,
-                verbose=True
-            )
-            
-            time.sleep(2)
-            summary_results = summary_crew.kickoff()
-            
-            # Phase 3: Critique
-            st.info("✅ **Phase 3/3: Quality Assurance** - Validating results...")
-            critique_task = self.create_critique_task(critic, str(summary_results), str(research_results))
-            
-            critique_crew = Crew(
-                agents=[critic],
-                tasks=[critique_task],
-                process=Process.sequential,
-                verbose=True
-            )
-            
-            time.sleep(2)
-            critique_results = critique_crew.kickoff()
-            
-            # Final result
-            final_result = {
-                "session_id": session_id,
-                "query": query,
-                "research": str(research_results),
-                "summary": str(summary_results),
-                "critique": str(critique_results),
-                "status": "completed"
-            }
-            
-            # Update session in database with final results
-            await self.db.update_research_session(session_id, {
-                "research_output": final_result["research"],
-                "summary_output": final_result["summary"],
-                "critique_output": final_result["critique"],
-                "status": "completed"
-            })
-            
-            return final_result
-            
-        except Exception as e:
-            st.error(f"Research flow error: {e}")
-            
-            # Update session in database with error
-            error_result = {
-                "session_id": session_id,
-                "query": query,
-                "research": f"Research failed: {str(e)}",
-                "summary": "Unable to generate summary due to research failure",
-                "critique": "Unable to provide critique due to research failure",
-                "status": "failed"
-            }
-            
-            await self.db.update_research_session(session_id, {
-                "research_output": error_result["research"],
-                "summary_output": error_result["summary"],
-                "critique_output": error_result["critique"],
-                "status": "failed"
-            })
-            
-            return error_result
+    if job["status"] in ("completed", "failed", "cancelled"):
+        collect_job(job)
+        st.rerun()
 
 def main():
     st.set_page_config(
@@ -319,14 +154,28 @@ def main():
         st.info("Please make sure your .env file contains: GOOGLE_API_KEY=your_actual_key_here")
         return
     
-    # Initialize orchestrator and database
+    # Initialize orchestrator and database (once per process, see get_orchestrator)
     try:
-        orchestrator = ResearchOrchestrator()
+        stream_output = st.sidebar.toggle("📡 Stream agent output", value=settings.STREAM_OUTPUT)
+        fanout_subtopics = st.sidebar.number_input(
+            "🧩 Parallel research subtopics", min_value=1, max_value=6,
+            value=max(1, settings.FANOUT_SUBTOPICS),
+            help="Split broad queries into subtopics researched concurrently (1 = off)"
+        )
+        reuse_similar = st.sidebar.toggle(
+            "♻️ Reuse similar recent research", value=settings.QUERY_DEDUP_ENABLED,
+            help="Serve a recent session for a near-identical query instead of re-running the agents"
+        )
+        orchestrator, db_error = get_orchestrator()
         st.sidebar.success("✅ System Ready")
+        if db_error:
+            st.sidebar.error(f"❌ Database unavailable: {db_error}")
+        else:
+            st.sidebar.success("✅ Database Connected")
         
-        # Test database connection
-        db = SupabaseClient()
-        st.sidebar.success("✅ Database Connected")
+        with st.sidebar.expander("⏱️ Startup profile"):
+            for stage in startup_profile.report():
+                st.write(f"{stage['stage']}: {stage['seconds']:.3f}s")
         
     except Exception as e:
         st.error(f"❌ System initialization failed: {e}")
@@ -338,6 +187,13 @@ def main():
         st.session_state.research_history = []
     if 'current_session' not in st.session_state:
         st.session_state.current_session = None
+    if 'db_cursors' not in st.session_state:
+        st.session_state.db_cursors = [None]  # Start cursor of each visited DB page
+    if 'db_page' not in st.session_state:
+        st.session_state.db_page = None  # (sessions, next_cursor) of the current DB page
+    if 'active_job' not in st.session_state:
+        # Background job of this browser session; the URL keeps it across refreshes
+        st.session_state.active_job = st.query_params.get("job")
     
     # Sidebar
     with st.sidebar:
@@ -347,16 +203,9 @@ def main():
         st.subheader("Database Operations")
         if st.button("🔄 Load from Database", use_container_width=True):
             try:
-                sessions = asyncio.run(orchestrator.db.get_all_sessions())
+                sessions, _ = run_async(orchestrator.db.list_sessions(limit=50))
                 if sessions:
-                    st.session_state.research_history = [{
-                        "session_id": session["session_id"],
-                        "query": session["query"],
-                        "research": session["research_output"],
-                        "summary": session["summary_output"],
-                        "critique": session["critique_output"],
-                        "status": session["status"]
-                    } for session in sessions]
+                    st.session_state.research_history = [session_from_listing(session) for session in sessions]
                     st.success(f"Loaded {len(sessions)} sessions from database")
                 else:
                     st.info("No sessions found in database")
@@ -371,8 +220,26 @@ def main():
                 st.warning("This will delete all sessions from the database!")
                 # You would implement a bulk delete method in the SupabaseClient
     
+        jobs = get_job_manager().jobs(active_only=True)
+        st.caption(f"🧵 Background jobs: {sum(job['status'] == 'running' for job in jobs)} running, "
+                   f"{sum(job['status'] == 'queued' for job in jobs)} queued")
+    
+    # Active research job, polled without blocking the rest of the page
+    if st.session_state.active_job:
+        job_panel()
+    finished = st.session_state.pop("job_finished", None)
+    if finished == "completed":
+        st.balloons()
+        st.success("Research completed! Switch to the **Results** tab to see the findings.")
+    elif finished:
+        st.warning("Research encountered issues. Check the Results tab for details.")
+    job_error = st.session_state.pop("job_error", None)
+    if job_error:
+        st.error(f"Research failed: {job_error}")
+        st.info("This might be due to API rate limits. Please wait a minute and try again with a simpler query.")
+    
     # Main content area - TABS
-    tab1, tab2, tab3, tab4 = st.tabs(["🔍 Research", "📊 Results", "📚 History", "💾 Database"])
+    tab1, tab2, tab3, tab4, tab5 = st.tabs(["🔍 Research", "📊 Results", "📚 History", "💾 Database", "📈 Diagnostics"])
     
     with tab1:
         st.header("Start New Research")
@@ -407,29 +274,18 @@ def main():
                     st.session_state.main_query_input = example
                     st.rerun()
         
-        # Research execution
-        if start_research and query:
-            with st.status("🧠 Orchestrating Research Team...", expanded=True) as status:
-                try:
-                    st.write("🤖 Starting research process...")
-                    result = asyncio.run(orchestrator.execute_research_flow(query))
-                    
-                    # Update session state
-                    st.session_state.research_history.append(result)
-                    st.session_state.current_session = result
-                    
-                    if result['status'] == 'completed':
-                        status.update(label="✅ Research Completed Successfully!", state="complete")
-                        st.balloons()
-                        st.success("Research completed! Switch to the **Results** tab to see the findings.")
-                    else:
-                        status.update(label="❌ Research Partially Failed", state="error")
-                        st.warning("Research encountered issues. Check the Results tab for details.")
-                    
-                except Exception as e:
-                    status.update(label="❌ Research Failed", state="error")
-                    st.error(f"Research failed: {str(e)}")
-                    st.info("This might be due to API rate limits. Please wait a minute and try again with a simpler query.")
+        # Research execution runs as a background job (see job_panel)
+        if start_research and query and st.session_state.active_job:
+            st.warning("⚠️ A research job is already running for this session.")
+        elif start_research and query:
+            submit_job("research", query, lambda notify, on_token: orchestrator.execute_research_flow(
+                query,
+                notify=notify,
+                on_token=on_token if stream_output else None,
+                fanout_subtopics=int(fanout_subtopics),
+                reuse_similar=reuse_similar
+            ))
+            st.rerun()
         elif start_research and not query:
             st.warning("⚠️ Please enter a research query first.")
     
@@ -465,12 +321,49 @@ def main():
                         st.write(f"**Status:** {research_data['status']}")
                     with col2:
                         st.write(f"**Session ID:** {research_data['session_id']}")
-                        st.write(f"**Model:** Gemini 1.5 Flash")
+                        st.write("**Models:** " + ", ".join(
+                            f"{phase} {role_profile(phase).model}" for phase in ("research", "summary", "critique")
+                        ))
+                    ttft = research_data.get('time_to_first_token')
+                    if ttft:
+                        st.write("**Time to first token:** " + ", ".join(
+                            f"{phase} {seconds:.2f}s" for phase, seconds in ttft.items()
+                        ))
+                    context_tokens = research_data.get('context_tokens')
+                    if context_tokens:
+                        st.write("**Agent context tokens (before → after compaction):** " + ", ".join(
+                            f"{label.replace('_', ' ')} {counts['tokens_before']} → {counts['tokens_after']}"
+                            for label, counts in context_tokens.items()
+                        ))
+                    search_dedup = research_data.get('search_dedup')
+                    if search_dedup and search_dedup.get('results_dropped'):
+                        st.write(f"**Repeated search results skipped:** {search_dedup['results_dropped']} of "
+                                 f"{search_dedup['results_seen']} (~{search_dedup['tokens_saved']} tokens saved)")
+                    quality = research_data.get('precritic')
+                    if quality:
+                        st.write(f"**Pre-critic score:** {quality['score']:.2f} "
+                                 f"({'LLM critique' if quality['llm_critique'] else 'LLM critique skipped'})")
+                    reused = research_data.get('reused_from')
+                    if reused:
+                        st.write(f"**Reused from:** \"{reused['query']}\" ({reused['similarity']:.0%} similar)")
+                
+                # Re-run one phase on the stored outputs of the others
+                with st.expander("🔁 Re-run a Phase"):
+                    rerun_phase = st.selectbox("Phase", ["critique", "summary", "research"], key="rerun_phase")
+                    rerun_instructions = st.text_area(
+                        "Additional instructions (optional)", key="rerun_instructions",
+                        placeholder="e.g. Focus the critique on source credibility"
+                    )
+                    if st.button("🔁 Re-run", use_container_width=True):
+                        resume_session(orchestrator, research_data, stream_output,
+                                       rerun=[rerun_phase], instructions=rerun_instructions.strip() or None)
             else:
                 st.error("❌ Research failed or partially completed")
                 st.write("Research output:", research_data['research'])
                 st.write("Summary:", research_data['summary'])
                 st.write("Critique:", research_data['critique'])
+                if st.button("▶️ Resume from last completed phase", type="primary"):
+                    resume_session(orchestrator, research_data, stream_output)
         else:
             st.info("👆 Start a research session in the **Research** tab to see results here.")
     
@@ -488,7 +381,7 @@ def main():
                     col1, col2 = st.columns([1, 1])
                     with col1:
                         if st.button(f"📖 Load", key=f"load_{i}", use_container_width=True):
-                            st.session_state.current_session = research
+                            st.session_state.current_session = open_session(orchestrator, research)
                             st.rerun()
                     with col2:
                         if st.button(f"🗑️ Delete", key=f"delete_{i}", use_container_width=True):
@@ -507,47 +400,129 @@ def main():
     with tab4:
         st.header("Database Sessions")
         
+        page_size = 20
+        search_text = st.text_input("🔎 Search sessions", placeholder="Search queries and outputs...")
         try:
-            sessions = asyncio.run(orchestrator.db.get_all_sessions(limit=20))
+            if search_text.strip():
+                sessions = run_async(orchestrator.db.search_sessions(search_text, limit=page_size))
+                page_offset = 0
+            else:
+                if st.session_state.db_page is None:
+                    st.session_state.db_page = run_async(orchestrator.db.list_sessions(
+                        limit=page_size, cursor=st.session_state.db_cursors[-1]
+                    ))
+                sessions, next_cursor = st.session_state.db_page
+                page_offset = (len(st.session_state.db_cursors) - 1) * page_size
+                
+                col1, col2, col3 = st.columns(3)
+                with col1:
+                    if st.button("⬅️ Newer", disabled=len(st.session_state.db_cursors) == 1, use_container_width=True):
+                        st.session_state.db_cursors.pop()
+                        st.session_state.db_page = None
+                        st.rerun()
+                with col2:
+                    if st.button("🔄 Refresh", use_container_width=True):
+                        st.session_state.db_page = None
+                        st.rerun()
+                with col3:
+                    if st.button("Older ➡️", disabled=next_cursor is None, use_container_width=True):
+                        st.session_state.db_cursors.append(next_cursor)
+                        st.session_state.db_page = None
+                        st.rerun()
             
             if sessions:
-                st.write(f"Total database sessions: {len(sessions)}")
+                if search_text.strip():
+                    st.write(f"{len(sessions)} matching sessions")
+                else:
+                    st.write(f"Showing database sessions {page_offset + 1}-{page_offset + len(sessions)}")
                 
                 for i, session in enumerate(sessions):
-                    with st.expander(f"DB Session #{i+1}: {session['query'][:50]}...", expanded=i==0):
+                    with st.expander(f"DB Session #{page_offset+i+1}: {session['query'][:50]}...", expanded=i==0):
                         st.write(f"**Full Query:** {session['query']}")
                         st.write(f"**Session ID:** {session['session_id']}")
                         st.write(f"**Status:** {session['status']}")
                         st.write(f"**Created:** {session['created_at']}")
+                        if session.get('match_snippet'):
+                            st.markdown(f"**Match:** {session['match_snippet']}")
                         
                         col1, col2 = st.columns([1, 1])
                         with col1:
                             if st.button(f"📖 Load from DB", key=f"db_load_{i}", use_container_width=True):
-                                st.session_state.current_session = {
-                                    "session_id": session["session_id"],
-                                    "query": session["query"],
-                                    "research": session["research_output"],
-                                    "summary": session["summary_output"],
-                                    "critique": session["critique_output"],
-                                    "status": session["status"]
-                                }
+                                st.session_state.current_session = open_session(orchestrator, session_from_listing(session))
                                 st.rerun()
                         with col2:
                             if st.button(f"🗑️ Delete from DB", key=f"db_delete_{i}", use_container_width=True):
-                                asyncio.run(orchestrator.db.delete_research_session(session['session_id']))
+                                run_async(orchestrator.db.delete_research_session(session['session_id']))
+                                st.session_state.db_page = None
                                 st.success("Session deleted from database")
                                 st.rerun()
                         
                         if session['status'] == 'completed':
                             st.markdown("**Summary Preview:**")
-                            preview = session['summary_output'][:200] + "..." if session['summary_output'] and len(session['summary_output']) > 200 else session['summary_output']
-                            st.write(preview or "No summary available")
+                            st.write(session_from_listing(session)['summary'] or "No summary available")
             else:
                 st.info("No sessions found in database. Start some research first!")
                 
         except Exception as e:
             st.error(f"Error accessing database: {e}")
     
+    with tab5:
+        st.header("Diagnostics")
+        tracer = get_tracer()
+        
+        model_health = model_health_summary()
+        if model_health:
+            st.subheader("Model health")
+            st.caption(f"Calls of the last {settings.MODEL_HEALTH_WINDOW:.0f} seconds per model; "
+                       f"degraded models fall back per MODEL_FALLBACKS")
+            st.dataframe(model_health, use_container_width=True, hide_index=True)
+        
+        if not tracer.enabled:
+            st.info("Tracing is off. Set TRACING_ENABLED=true to record spans.")
+        else:
+            st.subheader("Totals since startup")
+            summary = tracer.metrics.summary()
+            if summary:
+                st.dataframe(summary, use_container_width=True, hide_index=True)
+            else:
+                st.info("No spans recorded yet. Run some research first!")
+            
+            current = st.session_state.current_session
+            trace_id = current.get('trace_id') if current else None
+            if trace_id:
+                st.subheader("Current session trace")
+                spans = tracer.recent(trace_id)
+                depth = {}
+                rows = []
+                for span in sorted(spans, key=lambda s: s['start']):
+                    depth[span['span_id']] = depth.get(span['parent_id'], -1) + 1
+                    attributes = span['attributes']
+                    rows.append({
+                        "span": "  " * depth[span['span_id']] + span['name'],
+                        "kind": span['kind'],
+                        "model": attributes.get('model'),
+                        "ms": span['duration_ms'],
+                        "prompt tokens": attributes.get('prompt_tokens'),
+                        "completion tokens": attributes.get('completion_tokens'),
+                        "cache hit": attributes.get('cache_hit'),
+                        "retries": attributes.get('retries'),
+                        "error": span['error']
+                    })
+                st.dataframe(rows, use_container_width=True, hide_index=True)
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                st.download_button(
+                    "⬇️ Spans (JSON lines)",
+                    "\n".join(json.dumps(span, default=str) for span in tracer.recent()),
+                    file_name="traces.jsonl", use_container_width=True
+                )
+            with col2:
+                st.download_button(
+                    "⬇️ Metrics (Prometheus)", tracer.metrics.prometheus(),
+                    file_name="metrics.prom", use_container_width=True
+                )
+    
     if clear_history:
         st.session_state.research_history = []
         st.session_state.current_session = None
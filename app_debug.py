@@ -4,7 +4,7 @@ import asyncio
 from crewai import Agent, Task, Crew, Process
 from crewai.tools import BaseTool
 from pydantic import BaseModel, Field
-from utils.gemini_setup import gemini_setup
+from agents.orchestrator import get_llm
 import uuid
 from typing import Dict, Any, Type
 
@@ -47,7 +47,7 @@ class DebugSearchTool(BaseTool):
 class DebugResearchOrchestrator:
     def __init__(self):
         self.search_tool = DebugSearchTool()
-        self.llm = gemini_setup.get_llm()
+        self.llm = get_llm()
     
     def create_research_task(self, agent, query: str) -> Task:
         return Task(
@@ -0,0 +1,162 @@
+# batch_research.py
+"""Headless batch runner: research every query in a JSONL or CSV file.
+
+    python batch_research.py queries.jsonl --output results.jsonl --workers 4
+
+JSONL lines are either {"id": ..., "query": ...} objects or bare strings; CSV
+files need a `query` column and may have an `id` column. Rows without an id
+are keyed by their position in the file. Results are appended to the output
+file as they finish, and finished ids are appended to a checkpoint file, so
+re-running the same command after a crash skips completed queries and
+retries failed ones, resuming their stored sessions from the last
+checkpointed phase.
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from config.settings import settings
+
+
+def load_queries(path: str) -> List[Dict[str, str]]:
+    """Read {"id", "query"} rows from a .jsonl or .csv file; malformed JSONL lines are skipped with a warning"""
+    rows = []
+    if path.endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            for index, record in enumerate(csv.DictReader(f)):
+                query = (record.get("query") or "").strip()
+                if query:
+                    rows.append({"id": str(record.get("id") or index), "query": query})
+    else:
+        with open(path, encoding="utf-8") as f:
+            for index, line in enumerate(f):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                    if isinstance(record, str):
+                        record = {"query": record}
+                    query = (record.get("query") or "").strip()
+                except (ValueError, AttributeError) as e:
+                    print(f"Skipping malformed line {index + 1} of {path}: {e}")
+                    continue
+                if query:
+                    rows.append({"id": str(record.get("id", index)), "query": query})
+    return rows
+
+
+def load_checkpoint(path: str) -> Tuple[Set[str], Dict[str, str]]:
+    """Ids of input rows that already completed, and session ids of rows whose last run failed"""
+    done = set()
+    failed: Dict[str, str] = {}
+    if not os.path.exists(path):
+        return done, failed
+    with open(path, encoding="utf-8") as f:
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                entry = json.loads(line)
+                row_id = entry["id"]
+                status, session_id = entry.get("status"), entry.get("session_id")
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                # e.g. a partial line from a killed run
+                print(f"Skipping malformed checkpoint line {number} of {path}: {e!r}")
+                continue
+            if status == "completed":
+                done.add(row_id)
+                failed.pop(row_id, None)
+            elif session_id:
+                failed[row_id] = session_id
+    return done, failed
+
+
+class BatchRunner:
+    """Runs queries through one shared ResearchOrchestrator on a worker pool"""
+
+    def __init__(self, output_path: str, checkpoint_path: str, workers: int, fanout_subtopics: int = 1):
+        self.output_path = output_path
+        self.checkpoint_path = checkpoint_path
+        self.workers = workers
+        self.fanout_subtopics = fanout_subtopics
+        self._orchestrator_instance = None
+        self._orchestrator_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    def _orchestrator(self):
+        with self._orchestrator_lock:
+            if self._orchestrator_instance is None:
+                from agents.orchestrator import ResearchOrchestrator
+                self._orchestrator_instance = ResearchOrchestrator(fanout_subtopics=self.fanout_subtopics)
+            return self._orchestrator_instance
+
+    def _record(self, row: Dict[str, str], result: Dict[str, Any]):
+        with self._write_lock:
+            with open(self.output_path, "a", encoding="utf-8") as out:
+                out.write(json.dumps({"id": row["id"], **result}, default=str) + "\n")
+            with open(self.checkpoint_path, "a", encoding="utf-8") as checkpoint:
+                checkpoint.write(json.dumps({
+                    "id": row["id"],
+                    "session_id": result.get("session_id"),
+                    "status": result.get("status")
+                }) + "\n")
+
+    def _run_one(self, row: Dict[str, str], session_id: Optional[str] = None) -> Dict[str, Any]:
+        started = time.perf_counter()
+        try:
+            if session_id:
+                result = asyncio.run(self._orchestrator().resume(session_id))
+            else:
+                result = asyncio.run(self._orchestrator().execute_research_flow(row["query"]))
+        except Exception as e:
+            result = {"query": row["query"], "status": "failed", "error": str(e)}
+        result["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+        self._record(row, result)
+        return result
+
+    def run(self, rows: List[Dict[str, str]]) -> Dict[str, int]:
+        done, failed = load_checkpoint(self.checkpoint_path)
+        pending = [row for row in rows if row["id"] not in done]
+        resumable = sum(row["id"] in failed for row in pending)
+        print(f"{len(rows)} queries, {len(rows) - len(pending)} already completed, {len(pending)} to run "
+              f"({resumable} resumed)")
+
+        counts = {"completed": 0, "failed": 0, "skipped": len(rows) - len(pending)}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {executor.submit(self._run_one, row, failed.get(row["id"])): row for row in pending}
+            for future in as_completed(futures):
+                row = futures[future]
+                status = future.result().get("status")
+                counts["completed" if status == "completed" else "failed"] += 1
+                print(f"[{counts['completed'] + counts['failed']}/{len(pending)}] {status}: {row['query'][:60]}")
+        return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the research pipeline over a file of queries")
+    parser.add_argument("input", help="Query file (.jsonl or .csv)")
+    parser.add_argument("--output", default="results.jsonl", help="JSONL file results are appended to")
+    parser.add_argument("--checkpoint", help="Checkpoint file (default: <output>.checkpoint)")
+    parser.add_argument("--workers", type=int, default=settings.BATCH_WORKERS, help="Concurrent research flows")
+    parser.add_argument("--fanout", type=int, default=settings.FANOUT_SUBTOPICS, help="Subtopics per query (1 = off)")
+    args = parser.parse_args()
+
+    runner = BatchRunner(
+        output_path=args.output,
+        checkpoint_path=args.checkpoint or f"{args.output}.checkpoint",
+        workers=args.workers,
+        fanout_subtopics=args.fanout
+    )
+    counts = runner.run(load_queries(args.input))
+    print(f"Done: {counts['completed']} completed, {counts['failed']} failed, {counts['skipped']} skipped")
+
+
+if __name__ == "__main__":
+    main()
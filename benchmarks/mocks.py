@@ -0,0 +1,96 @@
+# benchmarks/mocks.py
+"""Offline stand-ins for Gemini and DuckDuckGo used by the benchmark suite"""
+import re
+import threading
+import time
+from typing import Any, Dict, List, Type
+
+from crewai.llms.base_llm import BaseLLM
+from crewai.tools import BaseTool
+from pydantic import BaseModel, Field, PrivateAttr
+
+from utils.rate_limiter import estimate_tokens
+
+_TOOL_NAMES = re.compile(r"only one name of \[([^\]]+)\]")
+
+FILLER = (
+    "Adoption grew steadily across the sector as costs fell and tooling matured. "
+    "Analysts attribute most of the recent gains to better data infrastructure. "
+    "Regulators are drafting clearer rules, although enforcement remains uneven. "
+    "Smaller organisations still lag behind early adopters on investment. "
+)
+
+
+class MockLLM(BaseLLM):
+    """Deterministic LLM with configurable latency and token rate.
+
+    Each call sleeps `latency` seconds plus completion_tokens / tokens_per_second
+    and answers in CrewAI's ReAct format: agents that have tools make one
+    tool call first, everything else gets a Final Answer of about
+    `completion_tokens` tokens. Token usage is tracked like a real provider.
+    """
+
+    latency: float = 0.05
+    tokens_per_second: float = 400.0
+    completion_tokens: int = 150
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault("model", "mock/benchmark")
+        super().__init__(**kwargs)
+
+    def supports_function_calling(self) -> bool:
+        return False
+
+    def get_context_window_size(self) -> int:
+        return 1_000_000
+
+    def _answer(self, prompt: str, first_turn: bool) -> str:
+        tools = _TOOL_NAMES.search(prompt)
+        if tools and first_turn:
+            tool = tools.group(1).split(",")[0].strip()
+            return f'Thought: I should search for current information.\nAction: {tool}\nAction Input: {{"query": "benchmark topic"}}'
+        body = (FILLER * (self.completion_tokens * 4 // len(FILLER) + 1))[:self.completion_tokens * 4]
+        return f"Thought: I now know the final answer.\nFinal Answer: {body.strip()}"
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None,
+             from_task=None, from_agent=None, response_model=None) -> str:
+        if isinstance(messages, str):
+            messages = [{"role": "user", "content": messages}]
+        prompt = "\n".join(str(message.get("content", "")) for message in messages)
+        first_turn = not any(message.get("role") == "assistant" for message in messages)
+        answer = self._answer(prompt, first_turn)
+        completion = estimate_tokens(answer)
+        time.sleep(self.latency + completion / self.tokens_per_second)
+        with self._lock:
+            self._track_token_usage_internal({
+                "prompt_tokens": estimate_tokens(prompt),
+                "completion_tokens": completion,
+                "total_tokens": estimate_tokens(prompt) + completion
+            })
+        return answer
+
+
+class MockSearchInput(BaseModel):
+    query: str = Field(..., description="Search query")
+    max_results: int = Field(default=3, description="Maximum number of results")
+
+
+class MockSearchTool(BaseTool):
+    """WebSearchTool replacement returning canned results (as in app_debug.DebugSearchTool)"""
+    name: str = "web_search"
+    description: str = "Search the web for current information and news"
+    args_schema: Type[BaseModel] = MockSearchInput
+    latency: float = 0.02
+
+    def _run(self, query: str, max_results: int = 3) -> str:
+        time.sleep(self.latency)
+        results: List[Dict[str, str]] = [{
+            "title": f"Test Result {i} for {query}",
+            "href": f"https://example.com/{i}",
+            "body": f"This is a test snippet about {query}. It contains mock data for benchmarking."
+        } for i in range(1, max_results + 1)]
+        result_text = f"Search results for: {query}\n\n"
+        for i, result in enumerate(results, 1):
+            result_text += f"[{i}] {result['title']}\n   URL: {result['href']}\n   Info: {result['body']}\n\n"
+        return result_text
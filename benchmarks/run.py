@@ -0,0 +1,259 @@
+# benchmarks/run.py
+"""End-to-end pipeline benchmark with the network cut off.
+
+    python -m benchmarks.run --concurrency 1 4 8 --runs 16
+    python -m benchmarks.run --save-baseline main
+    python -m benchmarks.run --compare main       # exit 1 on regression
+    python -m benchmarks.run --cassette .cache/cassette.jsonl.gz --replay-speed 1
+    python -m benchmarks.run --pipeline single_crew --compare main
+
+Runs ResearchOrchestrator.execute_research_flow against MockLLM, the mock
+search tool and in-memory SQLite storage (or against recorded Gemini and
+search traffic with --cassette, see utils/cassette.py), and reports p50/p95/p99 latency,
+throughput per concurrency level and peak memory. Baselines are JSON files
+in benchmarks/baselines/.
+"""
+import os
+
+# Offline, deterministic configuration; set before the app modules read it
+for _name, _value in {
+    "GOOGLE_API_KEY": "offline-benchmark",
+    "STORAGE_BACKEND": "sqlite",
+    "SQLITE_PATH": "file:benchmark?mode=memory&cache=shared",
+    "DB_WRITE_JOURNAL_PATH": "",
+    "LLM_CACHE_BACKEND": "none",
+    "SEARCH_CACHE_ENABLED": "false",
+    "QUERY_DEDUP_ENABLED": "false",
+    "TRACE_EXPORT_PATH": "",
+    "CREWAI_DISABLE_TELEMETRY": "true",
+    "CREWAI_TRACING_ENABLED": "false",
+    "OTEL_SDK_DISABLED": "true",
+}.items():
+    os.environ.setdefault(_name, _value)
+
+import argparse
+import asyncio
+import contextlib
+import ipaddress
+import json
+import platform
+import resource
+import socket
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+
+
+@contextlib.contextmanager
+def block_network():
+    """Refuse every socket connection that is not loopback or a Unix socket"""
+    original_connect = socket.socket.connect
+
+    def guarded_connect(sock, address):
+        if sock.family in (socket.AF_INET, socket.AF_INET6):
+            try:
+                allowed = ipaddress.ip_address(address[0]).is_loopback
+            except ValueError:
+                allowed = address[0] == "localhost"
+            if not allowed:
+                raise OSError(f"Network access blocked during benchmark: {address[0]}")
+        return original_connect(sock, address)
+
+    socket.socket.connect = guarded_connect
+    try:
+        yield
+    finally:
+        socket.socket.connect = original_connect
+
+
+@contextlib.contextmanager
+def quiet():
+    """Silence stdout at the file-descriptor level (agents are created with verbose=True)"""
+    sys.stdout.flush()
+    saved = os.dup(1)
+    devnull = os.open(os.devnull, os.O_WRONLY)
+    os.dup2(devnull, 1)
+    try:
+        with open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):
+            yield
+    finally:
+        sys.stdout.flush()
+        os.dup2(saved, 1)
+        os.close(saved)
+        os.close(devnull)
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+    return {"p50_s": round(p50, 4), "p95_s": round(p95, 4), "p99_s": round(p99, 4),
+            "mean_s": round(float(np.mean(samples)), 4)}
+
+
+def build_orchestrator(args):
+    from agents.orchestrator import ResearchOrchestrator
+    from benchmarks.mocks import MockLLM, MockSearchTool
+    from utils.streaming import with_streaming
+    from utils.tracing import with_tracing
+
+    if args.cassette:
+        from config.settings import settings
+        from crewai.llm import LLM
+        from utils.cassette import Cassette, set_cassette, with_cassette
+
+        # Real Gemini LLM and WebSearchTool, served from the recording
+        cassette = Cassette(args.cassette, "replay", speed=args.replay_speed, recycle=True)
+        set_cassette(cassette)
+        base_llm = with_cassette(LLM(model=f"gemini/{settings.MODEL}", api_key="replay",
+                                     temperature=settings.MODEL_TEMPERATURE), cassette)
+        search_tool = None
+    else:
+        base_llm = MockLLM(
+            latency=args.llm_latency, tokens_per_second=args.tokens_per_second,
+            completion_tokens=args.completion_tokens
+        )
+        search_tool = MockSearchTool(latency=args.search_latency)
+
+    # Same instrumentation as production, minus the quota limiter and response cache
+    llm = with_streaming(with_tracing(base_llm))
+    return ResearchOrchestrator(
+        fanout_subtopics=args.fanout, notify=lambda level, message: None,
+        llm=llm, search_tool=search_tool, pipeline_mode=args.pipeline
+    )
+
+
+def run_level(orchestrator, concurrency: int, runs: int, offset: int) -> Dict[str, Any]:
+    def one(index: int) -> Dict[str, Any]:
+        started = time.perf_counter()
+        result = asyncio.run(orchestrator.execute_research_flow(
+            f"benchmark topic {offset + index}", reuse_similar=False
+        ))
+        return {"seconds": time.perf_counter() - started, "status": result["status"]}
+
+    tracemalloc.reset_peak()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(one, range(runs)))
+    wall = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+
+    return {
+        "concurrency": concurrency,
+        "runs": runs,
+        "failures": sum(outcome["status"] != "completed" for outcome in outcomes),
+        **percentiles([outcome["seconds"] for outcome in outcomes]),
+        "throughput_rps": round(runs / wall, 3),
+        "peak_traced_mb": round(peak / 2 ** 20, 2)
+    }
+
+
+def run_suite(args) -> Dict[str, Any]:
+    with block_network():
+        orchestrator = build_orchestrator(args)
+        with quiet():
+            asyncio.run(orchestrator.execute_research_flow("warm-up", reuse_similar=False))
+            tracemalloc.start()
+            levels = []
+            offset = 0
+            for concurrency in args.concurrency:
+                levels.append(run_level(orchestrator, concurrency, args.runs, offset))
+                offset += args.runs
+            tracemalloc.stop()
+        llm_calls = orchestrator.llm.get_token_usage_summary().successful_requests
+
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "config": {
+            "runs": args.runs,
+            "fanout": args.fanout,
+            "pipeline": args.pipeline,
+            "llm_latency": args.llm_latency,
+            "tokens_per_second": args.tokens_per_second,
+            "completion_tokens": args.completion_tokens,
+            "search_latency": args.search_latency,
+            "cassette": args.cassette,
+            "replay_speed": args.replay_speed
+        },
+        "levels": levels,
+        "llm_calls": llm_calls,
+        # ru_maxrss is KiB on Linux and bytes on macOS
+        "max_rss_mb": round(max_rss / (2 ** 20 if sys.platform == "darwin" else 2 ** 10), 1)
+    }
+
+
+def compare(report: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Regressions of p95 latency or throughput beyond `tolerance`, per concurrency level"""
+    regressions = []
+    previous = {level["concurrency"]: level for level in baseline["levels"]}
+    for level in report["levels"]:
+        old = previous.get(level["concurrency"])
+        if old is None:
+            continue
+        if level["p95_s"] > old["p95_s"] * (1 + tolerance):
+            regressions.append(f"concurrency {level['concurrency']}: p95 {old['p95_s']}s -> {level['p95_s']}s")
+        if level["throughput_rps"] < old["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"concurrency {level['concurrency']}: throughput {old['throughput_rps']} -> {level['throughput_rps']} runs/s"
+            )
+    return regressions
+
+
+def print_report(report: Dict[str, Any]):
+    print(f"{'concurrency':>11} {'p50 s':>8} {'p95 s':>8} {'p99 s':>8} {'runs/s':>8} {'peak MB':>8} {'failed':>6}")
+    for level in report["levels"]:
+        print(f"{level['concurrency']:>11} {level['p50_s']:>8.3f} {level['p95_s']:>8.3f} {level['p99_s']:>8.3f} "
+              f"{level['throughput_rps']:>8.2f} {level['peak_traced_mb']:>8.1f} {level['failures']:>6}")
+    print(f"LLM calls: {report['llm_calls']}, max RSS: {report['max_rss_mb']} MB")
+
+
+def baseline_path(name: str) -> str:
+    return name if name.endswith(".json") else os.path.join(BASELINE_DIR, f"{name}.json")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark of the research pipeline")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 8], help="Concurrent flows per level")
+    parser.add_argument("--runs", type=int, default=16, help="Research flows per concurrency level")
+    parser.add_argument("--fanout", type=int, default=1, help="Subtopics per query (1 = off)")
+    parser.add_argument("--pipeline", choices=["phased", "single_crew"], default="phased",
+                        help="One crew per phase, or one crew chaining all three tasks")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Mock LLM fixed latency per call (s)")
+    parser.add_argument("--tokens-per-second", type=float, default=400.0, help="Mock LLM generation rate")
+    parser.add_argument("--completion-tokens", type=int, default=150, help="Mock LLM answer length (tokens)")
+    parser.add_argument("--search-latency", type=float, default=0.02, help="Mock search latency (s)")
+    parser.add_argument("--cassette", metavar="PATH", help="Replay recorded Gemini/search traffic instead of mocks")
+    parser.add_argument("--replay-speed", type=float, default=0.0,
+                        help="Cassette replay speed (0 = instant, 1 = original timing)")
+    parser.add_argument("--save-baseline", metavar="NAME", help="Write the report to benchmarks/baselines/NAME.json")
+    parser.add_argument("--compare", metavar="NAME", help="Compare against a saved baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression for --compare")
+    args = parser.parse_args(argv)
+
+    report = run_suite(args)
+    print_report(report)
+
+    if args.save_baseline:
+        path = baseline_path(args.save_baseline)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Saved baseline to {path}")
+
+    if args.compare:
+        with open(baseline_path(args.compare), encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        if regressions:
+            print("Regressions:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,12 +5,163 @@ from dotenv import load_dotenv
 load_dotenv()
 
 class Settings:
+    # Storage backend: "supabase" or "sqlite" (local file with full-text search)
+    STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "supabase").lower()
+    SQLITE_PATH = os.getenv("SQLITE_PATH", ".cache/research.db")
     SUPABASE_URL = os.getenv("SUPABASE_URL")
     SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+    # Pooled HTTP transport for the Supabase REST API
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_TIMEOUT = float(os.getenv("DB_TIMEOUT", "10"))
+    DB_CONNECT_TIMEOUT = float(os.getenv("DB_CONNECT_TIMEOUT", "5"))
+    # Write-behind queue for session and agent-output writes
+    DB_WRITE_BEHIND = os.getenv("DB_WRITE_BEHIND", "true").lower() == "true"
+    DB_WRITE_BATCH_SIZE = int(os.getenv("DB_WRITE_BATCH_SIZE", "20"))
+    DB_WRITE_FLUSH_INTERVAL = float(os.getenv("DB_WRITE_FLUSH_INTERVAL", "2"))
+    DB_WRITE_JOURNAL_PATH = os.getenv("DB_WRITE_JOURNAL_PATH", ".cache/write_behind_journal.jsonl")
     GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
     
-    # Gemini model configuration
-    MODEL = "gemini-2.0-flash"
-    MODEL_TEMPERATURE = 0.1
+    # Gemini model configuration: the default model, per-role overrides (unset
+    # model or temperature = the default, max tokens 0 = no limit) and the request timeout
+    MODEL = os.getenv("MODEL", "gemini-2.0-flash")
+    MODEL_TEMPERATURE = float(os.getenv("MODEL_TEMPERATURE", "0.1"))
+    MODEL_TIMEOUT = float(os.getenv("MODEL_TIMEOUT", "60"))
+    RESEARCHER_MODEL = os.getenv("RESEARCHER_MODEL", "")
+    RESEARCHER_TEMPERATURE = float(os.getenv("RESEARCHER_TEMPERATURE") or MODEL_TEMPERATURE)
+    RESEARCHER_MAX_TOKENS = int(os.getenv("RESEARCHER_MAX_TOKENS", "0"))
+    SUMMARIZER_MODEL = os.getenv("SUMMARIZER_MODEL", "gemini-2.0-flash-lite")
+    SUMMARIZER_TEMPERATURE = float(os.getenv("SUMMARIZER_TEMPERATURE") or MODEL_TEMPERATURE)
+    SUMMARIZER_MAX_TOKENS = int(os.getenv("SUMMARIZER_MAX_TOKENS", "1024"))
+    CRITIC_MODEL = os.getenv("CRITIC_MODEL", "gemini-2.0-flash-lite")
+    CRITIC_TEMPERATURE = float(os.getenv("CRITIC_TEMPERATURE") or MODEL_TEMPERATURE)
+    CRITIC_MAX_TOKENS = int(os.getenv("CRITIC_MAX_TOKENS", "512"))
+
+    # Fall back to another model while one is degraded: comma-separated
+    # "primary:fallback" pairs; a model counts as degraded once it has
+    # MODEL_MIN_SAMPLES calls in the last MODEL_HEALTH_WINDOW seconds and
+    # their p95 latency (seconds) or error rate is over the threshold. A
+    # degraded model still gets one probe call per MODEL_PROBE_INTERVAL
+    # seconds, and is used again once its slow or failed calls age out.
+    MODEL_FALLBACKS = os.getenv("MODEL_FALLBACKS", "gemini-2.0-flash:gemini-2.0-flash-lite,gemini-2.0-flash-lite:gemini-2.0-flash")
+    MODEL_HEALTH_WINDOW = float(os.getenv("MODEL_HEALTH_WINDOW", "120"))
+    MODEL_MIN_SAMPLES = int(os.getenv("MODEL_MIN_SAMPLES", "10"))
+    MODEL_P95_THRESHOLD = float(os.getenv("MODEL_P95_THRESHOLD", "20"))
+    MODEL_ERROR_RATE_THRESHOLD = float(os.getenv("MODEL_ERROR_RATE_THRESHOLD", "0.3"))
+    MODEL_PROBE_INTERVAL = float(os.getenv("MODEL_PROBE_INTERVAL", "30"))
+
+    # Web search result cache
+    SEARCH_CACHE_ENABLED = os.getenv("SEARCH_CACHE_ENABLED", "true").lower() == "true"
+    SEARCH_CACHE_PATH = os.getenv("SEARCH_CACHE_PATH", ".cache/search_cache.db")
+    SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", "3600"))
+    SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "256"))
+    SEARCH_CACHE_DISK_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_DISK_MAX_ENTRIES", "5000"))
+
+    # LLM response cache: "memory", "disk" or "none"
+    LLM_CACHE_BACKEND = os.getenv("LLM_CACHE_BACKEND", "memory")
+    LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", ".cache/llm_cache.db")
+    LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", "0"))
+    LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "512"))
+    # Comma-separated agent roles that always bypass the cache
+    LLM_CACHE_OPT_OUT = [role.strip() for role in os.getenv("LLM_CACHE_OPT_OUT", "").split(",") if role.strip()]
+
+    # Gemini quotas shared by every caller in the process
+    GEMINI_RPM = int(os.getenv("GEMINI_RPM", "15"))
+    GEMINI_TPM = int(os.getenv("GEMINI_TPM", "1000000"))
+    GEMINI_BATCH_CONCURRENCY = int(os.getenv("GEMINI_BATCH_CONCURRENCY", "8"))
+    DDGS_RPM = int(os.getenv("DDGS_RPM", "30"))
+    RATE_LIMIT_MAX_RETRIES = int(os.getenv("RATE_LIMIT_MAX_RETRIES", "3"))
+    RATE_LIMIT_MAX_BACKOFF = float(os.getenv("RATE_LIMIT_MAX_BACKOFF", "60"))
+
+    # Stream agent tokens into the UI as they are generated
+    STREAM_OUTPUT = os.getenv("STREAM_OUTPUT", "true").lower() == "true"
+
+    # "phased" runs one crew per phase; "single_crew" chains the three tasks in
+    # one crew per request (falls back to phased for fan-out and single-phase
+    # resumes)
+    PIPELINE_MODE = os.getenv("PIPELINE_MODE", "phased")
+    RESEARCHER_MAX_ITER = int(os.getenv("RESEARCHER_MAX_ITER", "5"))
+    SUMMARIZER_MAX_ITER = int(os.getenv("SUMMARIZER_MAX_ITER", "3"))
+    CRITIC_MAX_ITER = int(os.getenv("CRITIC_MAX_ITER", "3"))
+
+    # Subtopic fan-out for the research phase (1 = single researcher crew)
+    FANOUT_SUBTOPICS = int(os.getenv("FANOUT_SUBTOPICS", "1"))
+    FANOUT_MAX_WORKERS = int(os.getenv("FANOUT_MAX_WORKERS", "3"))
+
+    # Near-duplicate query detection against recent completed sessions:
+    # serve a prior session at or above the serve threshold, pass it to the
+    # researcher as context at or above the context threshold
+    QUERY_DEDUP_ENABLED = os.getenv("QUERY_DEDUP_ENABLED", "true").lower() == "true"
+    QUERY_DEDUP_SERVE_THRESHOLD = float(os.getenv("QUERY_DEDUP_SERVE_THRESHOLD", "0.85"))
+    QUERY_DEDUP_CONTEXT_THRESHOLD = float(os.getenv("QUERY_DEDUP_CONTEXT_THRESHOLD", "0.5"))
+    QUERY_DEDUP_MAX_AGE_HOURS = float(os.getenv("QUERY_DEDUP_MAX_AGE_HOURS", "24"))
+    QUERY_DEDUP_INDEX_SIZE = int(os.getenv("QUERY_DEDUP_INDEX_SIZE", "1000"))
+
+    # Token budgets for the research/summary excerpts fed to later agents;
+    # longer inputs are compacted to their highest-ranked sentences
+    SUMMARY_RESEARCH_TOKENS = int(os.getenv("SUMMARY_RESEARCH_TOKENS", "500"))
+    CRITIQUE_SUMMARY_TOKENS = int(os.getenv("CRITIQUE_SUMMARY_TOKENS", "250"))
+    CRITIQUE_RESEARCH_TOKENS = int(os.getenv("CRITIQUE_RESEARCH_TOKENS", "375"))
+
+    # Tracing: spans for phases, LLM calls, searches and DB calls
+    TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() == "true"
+    # Span export to a JSON lines file is opt-in (e.g. ".cache/traces.jsonl");
+    # the file is rotated to "<path>.1" at TRACE_EXPORT_MAX_BYTES
+    TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", "")
+    TRACE_EXPORT_MAX_BYTES = int(os.getenv("TRACE_EXPORT_MAX_BYTES", str(50 * 1024 * 1024)))
+    TRACE_BUFFER_SIZE = int(os.getenv("TRACE_BUFFER_SIZE", "2000"))
+
+    # Record/replay of Gemini and web search traffic: "off", "record" or "replay";
+    # replay sleeps recorded durations divided by CASSETTE_SPEED (0 = instant)
+    CASSETTE_MODE = os.getenv("CASSETTE_MODE", "off")
+    CASSETTE_PATH = os.getenv("CASSETTE_PATH", ".cache/cassette.jsonl.gz")
+    CASSETTE_SPEED = float(os.getenv("CASSETTE_SPEED", "0"))
+
+    # Local pre-critic: score the summary against the research (key-term
+    # coverage, unsupported figures and names, length) and skip the LLM
+    # critique at or above the threshold; lower scores pass its findings to
+    # the critic. Research shorter than PRECRITIC_MIN_RESEARCH_WORDS always
+    # gets the LLM critique.
+    PRECRITIC_ENABLED = os.getenv("PRECRITIC_ENABLED", "true").lower() == "true"
+    PRECRITIC_THRESHOLD = float(os.getenv("PRECRITIC_THRESHOLD", "0.8"))
+    PRECRITIC_KEY_TERMS = int(os.getenv("PRECRITIC_KEY_TERMS", "15"))
+    PRECRITIC_MIN_RESEARCH_WORDS = int(os.getenv("PRECRITIC_MIN_RESEARCH_WORDS", "100"))
+
+    # Background research jobs (Streamlit): concurrent flows per process and
+    # how many finished jobs are kept for reconnecting browsers
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+    JOB_HISTORY_SIZE = int(os.getenv("JOB_HISTORY_SIZE", "100"))
+
+    # Skip search results already returned earlier in the same research run:
+    # same canonical URL, or snippet word-shingle Jaccard at or above the threshold
+    SEARCH_DEDUP_ENABLED = os.getenv("SEARCH_DEDUP_ENABLED", "true").lower() == "true"
+    SEARCH_DEDUP_THRESHOLD = float(os.getenv("SEARCH_DEDUP_THRESHOLD", "0.6"))
+
+    # Fetch and extract the top search result pages for the researcher
+    PAGE_FETCH_ENABLED = os.getenv("PAGE_FETCH_ENABLED", "false").lower() == "true"
+    PAGE_FETCH_TOP_K = int(os.getenv("PAGE_FETCH_TOP_K", "3"))
+    PAGE_FETCH_TIMEOUT = float(os.getenv("PAGE_FETCH_TIMEOUT", "8"))
+    PAGE_FETCH_MAX_CONNECTIONS = int(os.getenv("PAGE_FETCH_MAX_CONNECTIONS", "20"))
+    PAGE_FETCH_PER_HOST = int(os.getenv("PAGE_FETCH_PER_HOST", "2"))
+    PAGE_FETCH_MAX_BYTES = int(os.getenv("PAGE_FETCH_MAX_BYTES", "2000000"))
+    PAGE_FETCH_MAX_CHARS = int(os.getenv("PAGE_FETCH_MAX_CHARS", "1500"))
+    PAGE_CACHE_PATH = os.getenv("PAGE_CACHE_PATH", ".cache/page_cache.db")
+    PAGE_CACHE_TTL = int(os.getenv("PAGE_CACHE_TTL", "86400"))
+
+    # HTTP research API (api_server.py): concurrent flows, queued flows beyond
+    # which submissions get 429, and per-client quotas (per replica). Without
+    # API_KEYS the server only binds loopback addresses.
+    API_HOST = os.getenv("API_HOST", "127.0.0.1")
+    API_PORT = int(os.getenv("API_PORT", "8000"))
+    API_WORKERS = int(os.getenv("API_WORKERS", "4"))
+    API_MAX_QUEUE = int(os.getenv("API_MAX_QUEUE", "16"))
+    API_CLIENT_RPM = int(os.getenv("API_CLIENT_RPM", "30"))
+    API_CLIENT_MAX_ACTIVE = int(os.getenv("API_CLIENT_MAX_ACTIVE", "4"))
+    # Seconds an event stream follows a session before it ends with a "timeout" event
+    API_EVENTS_TIMEOUT = float(os.getenv("API_EVENTS_TIMEOUT", "1800"))
+    # Comma-separated keys; when set, requests need "Authorization: Bearer <key>"
+    API_KEYS = [key.strip() for key in os.getenv("API_KEYS", "").split(",") if key.strip()]
+
+    # Headless batch runner
+    BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "4"))
     
 settings = Settings()
\ No newline at end of file
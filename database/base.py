@@ -0,0 +1,84 @@
+# database/base.py
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+
+# Columns callers may write on research_sessions
+SESSION_COLUMNS = ("session_id", "query", "research_output", "summary_output", "critique_output", "status")
+
+
+def session_row(session_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Map a research result dict onto research_sessions columns"""
+    return {
+        "query": session_data["query"],
+        "research_output": session_data.get("research", ""),
+        "summary_output": session_data.get("summary", ""),
+        "critique_output": session_data.get("critique", ""),
+        "status": session_data.get("status", "completed"),
+        "session_id": session_data["session_id"]
+    }
+
+
+class StorageBackend(ABC):
+    """Persistence interface shared by the Supabase and SQLite backends.
+
+    Single-row methods log and swallow errors (returning None / [] on
+    failure) so a storage outage never breaks a research run; the bulk
+    methods used by WriteBehindStore raise so failed batches can be
+    journaled, and ping raises so callers can report the outage.
+    """
+
+    def create_tables(self):
+        """Create necessary tables if they don't exist"""
+        pass
+
+    @abstractmethod
+    async def save_research_session(self, session_data: Dict[str, Any]) -> str:
+        """Save research session to database"""
+
+    @abstractmethod
+    async def update_research_session(self, session_id: str, updates: Dict[str, Any]):
+        """Update research session with new data"""
+
+    @abstractmethod
+    async def get_research_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """Retrieve research session by session_id"""
+
+    @abstractmethod
+    async def get_all_sessions(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """Get all research sessions"""
+
+    @abstractmethod
+    async def list_sessions(self, limit: int = 20, cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """List session metadata and summary previews, newest first, with a keyset cursor"""
+
+    @abstractmethod
+    async def search_sessions(self, text: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Find sessions whose query or outputs match `text`, best matches first"""
+
+    @abstractmethod
+    async def save_agent_output(self, agent_data: Dict[str, Any]):
+        """Save individual agent output (optional - for detailed tracking)"""
+
+    @abstractmethod
+    async def upsert_research_sessions(self, rows: List[Dict[str, Any]]):
+        """Insert or merge many session rows keyed on session_id (raises on failure)"""
+
+    @abstractmethod
+    async def patch_research_sessions(self, rows: List[Dict[str, Any]]):
+        """Update existing session rows, each holding session_id plus the columns to change (raises on failure)"""
+
+    @abstractmethod
+    async def insert_agent_outputs(self, rows: List[Dict[str, Any]]):
+        """Insert many agent output rows (raises on failure)"""
+
+    @abstractmethod
+    async def delete_research_session(self, session_id: str):
+        """Delete a research session"""
+
+    @abstractmethod
+    async def ping(self):
+        """Read one row to check the database is reachable (raises on failure)"""
+
+    async def close(self):
+        """Release connections"""
+        pass
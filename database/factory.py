@@ -0,0 +1,27 @@
+# database/factory.py
+from typing import Optional
+
+from config.settings import settings
+from database.base import StorageBackend
+
+
+def create_storage(backend: Optional[str] = None, write_behind: Optional[bool] = None) -> StorageBackend:
+    """Build the configured storage backend, wrapped in the write-behind queue if enabled"""
+    backend = (backend or settings.STORAGE_BACKEND).lower()
+    if backend == "sqlite":
+        from database.sqlite_client import SQLiteClient
+        storage = SQLiteClient()
+    elif backend == "supabase":
+        from database.supabase_client import SupabaseClient
+        storage = SupabaseClient()
+    else:
+        raise ValueError(f"Unknown STORAGE_BACKEND {backend!r} (expected 'supabase' or 'sqlite')")
+
+    if settings.TRACING_ENABLED:
+        from utils.tracing import TracedStore
+        storage = TracedStore(storage)
+
+    if settings.DB_WRITE_BEHIND if write_behind is None else write_behind:
+        from database.write_behind import WriteBehindStore
+        storage = WriteBehindStore(storage)
+    return storage
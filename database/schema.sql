@@ -0,0 +1,38 @@
+-- database/schema.sql
+-- Run in the Supabase SQL editor to create the tables the app expects.
+
+create table if not exists research_sessions (
+    id bigint generated always as identity primary key,
+    session_id text not null unique,  -- upsert target for batched writes
+    query text not null,
+    research_output text default '',
+    summary_output text default '',
+    critique_output text default '',
+    status text not null default 'in_progress',
+    created_at timestamptz not null default now()
+);
+
+-- Keyset pagination for session listings (created_at desc, id desc)
+create index if not exists research_sessions_created_id_idx
+    on research_sessions (created_at desc, id desc);
+
+create table if not exists agent_outputs (
+    id bigint generated always as identity primary key,
+    session_id text not null references research_sessions (session_id) on delete cascade,
+    agent_type text not null,
+    output text,
+    created_at timestamptz not null default now()
+);
+
+-- Lightweight listing: metadata plus a 200-character summary preview,
+-- so list pages never transfer the full research/summary/critique text.
+create or replace view research_session_listing as
+select
+    id,
+    session_id,
+    query,
+    status,
+    created_at,
+    left(summary_output, 200) as summary_preview,
+    char_length(summary_output) > 200 as summary_truncated
+from research_sessions;
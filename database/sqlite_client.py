@@ -0,0 +1,271 @@
+# database/sqlite_client.py
+import asyncio
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.settings import settings
+from database.base import SESSION_COLUMNS, StorageBackend, session_row
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS research_sessions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL UNIQUE,
+    query TEXT NOT NULL DEFAULT '',
+    research_output TEXT DEFAULT '',
+    summary_output TEXT DEFAULT '',
+    critique_output TEXT DEFAULT '',
+    status TEXT NOT NULL DEFAULT 'in_progress',
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS research_sessions_created_id_idx ON research_sessions (created_at DESC, id DESC);
+
+CREATE TABLE IF NOT EXISTS agent_outputs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    agent_type TEXT,
+    output TEXT,
+    created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS agent_outputs_session_idx ON agent_outputs (session_id);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS research_sessions_fts USING fts5(
+    query, research_output, summary_output, critique_output,
+    content='research_sessions', content_rowid='id', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS research_sessions_ai AFTER INSERT ON research_sessions BEGIN
+    INSERT INTO research_sessions_fts (rowid, query, research_output, summary_output, critique_output)
+    VALUES (new.id, new.query, new.research_output, new.summary_output, new.critique_output);
+END;
+CREATE TRIGGER IF NOT EXISTS research_sessions_ad AFTER DELETE ON research_sessions BEGIN
+    INSERT INTO research_sessions_fts (research_sessions_fts, rowid, query, research_output, summary_output, critique_output)
+    VALUES ('delete', old.id, old.query, old.research_output, old.summary_output, old.critique_output);
+END;
+CREATE TRIGGER IF NOT EXISTS research_sessions_au AFTER UPDATE ON research_sessions BEGIN
+    INSERT INTO research_sessions_fts (research_sessions_fts, rowid, query, research_output, summary_output, critique_output)
+    VALUES ('delete', old.id, old.query, old.research_output, old.summary_output, old.critique_output);
+    INSERT INTO research_sessions_fts (rowid, query, research_output, summary_output, critique_output)
+    VALUES (new.id, new.query, new.research_output, new.summary_output, new.critique_output);
+END;
+"""
+
+LISTING_COLUMNS = """id, session_id, query, status, created_at,
+    substr(summary_output, 1, 200) AS summary_preview,
+    length(summary_output) > 200 AS summary_truncated"""
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _fts_query(text: str) -> str:
+    """Turn free text into an FTS5 query that ANDs quoted terms (no syntax errors on user input)"""
+    terms = re.findall(r"\w+", text.lower())
+    return " ".join(f'"{term}"' for term in terms)
+
+
+class SQLiteClient(StorageBackend):
+    """Local SQLite storage with a full-text index over queries and outputs.
+
+    Uses WAL journaling and a busy timeout so several threads and worker
+    processes can write the same file; each thread keeps its own connection
+    and writes take the lock up front (BEGIN IMMEDIATE) and retry briefly if
+    another process holds it. Blocking calls run in worker threads so the
+    async methods never stall the event loop.
+    """
+
+    def __init__(self, path: Optional[str] = None, busy_timeout: float = 10.0):
+        self.path = path or settings.SQLITE_PATH
+        self.busy_timeout = busy_timeout
+        self._uri = self.path.startswith("file:")
+        self._local = threading.local()
+
+        if not self._uri:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+        # Shared-cache memory databases disappear when their last connection
+        # closes, so keep one open for the lifetime of the client
+        self._anchor = self._connect()
+        self._anchor.executescript(SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=self.busy_timeout, uri=self._uri,
+                               isolation_level=None, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout * 1000)}")
+        return conn
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def _read(self, sql: str, params: tuple = ()) -> List[Dict[str, Any]]:
+        return [dict(row) for row in self._conn().execute(sql, params).fetchall()]
+
+    def _write(self, statements: List[Tuple[str, tuple]], attempts: int = 5) -> Optional[int]:
+        """Run statements in one IMMEDIATE transaction; returns the last inserted rowid"""
+        conn = self._conn()
+        for attempt in range(attempts):
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    cursor = None
+                    for sql, params in statements:
+                        cursor = conn.execute(sql, params)
+                    conn.execute("COMMIT")
+                    return cursor.lastrowid if cursor is not None else None
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+            except sqlite3.OperationalError as e:
+                if "locked" not in str(e) or attempt == attempts - 1:
+                    raise
+                time.sleep(0.05 * (attempt + 1))
+
+    async def _run(self, fn, *args):
+        """Run a blocking call in a worker thread (inline once worker threads are gone at exit)"""
+        try:
+            return await asyncio.to_thread(fn, *args)
+        except RuntimeError as e:
+            if "cannot schedule new futures" not in str(e):
+                raise
+            return fn(*args)
+
+    @staticmethod
+    def _columns(row: Dict[str, Any]) -> List[str]:
+        return [column for column in SESSION_COLUMNS if column in row]
+
+    def _upsert_statement(self, row: Dict[str, Any]) -> Tuple[str, tuple]:
+        columns = self._columns(row)
+        updates = ", ".join(f"{column} = excluded.{column}" for column in columns if column != "session_id")
+        sql = (
+            f"INSERT INTO research_sessions ({', '.join(columns)}, created_at) "
+            f"VALUES ({', '.join('?' for _ in columns)}, ?) "
+            f"ON CONFLICT(session_id) DO UPDATE SET {updates or 'session_id = excluded.session_id'}"
+        )
+        return sql, tuple(row[column] for column in columns) + (_now(),)
+
+    def _update_statement(self, session_id: str, updates: Dict[str, Any]) -> Optional[Tuple[str, tuple]]:
+        columns = [column for column in self._columns(updates) if column != "session_id"]
+        if not columns:
+            return None
+        sql = f"UPDATE research_sessions SET {', '.join(f'{c} = ?' for c in columns)} WHERE session_id = ?"
+        return sql, tuple(updates[column] for column in columns) + (session_id,)
+
+    # StorageBackend
+
+    async def save_research_session(self, session_data: Dict[str, Any]) -> str:
+        try:
+            row = session_row(session_data)
+            return await self._run(self._write, [self._upsert_statement(row)])
+        except Exception as e:
+            print(f"Error saving research session: {e}")
+            return None
+
+    async def update_research_session(self, session_id: str, updates: Dict[str, Any]):
+        try:
+            statement = self._update_statement(session_id, updates)
+            if statement is not None:
+                await self._run(self._write, [statement])
+        except Exception as e:
+            print(f"Error updating research session: {e}")
+
+    async def get_research_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            rows = await self._run(
+                self._read, "SELECT * FROM research_sessions WHERE session_id = ?", (session_id,)
+            )
+            return rows[0] if rows else None
+        except Exception as e:
+            print(f"Error getting research session: {e}")
+            return None
+
+    async def ping(self):
+        await self._run(self._read, "SELECT session_id FROM research_sessions LIMIT 1", ())
+
+    async def get_all_sessions(self, limit: int = 50) -> List[Dict[str, Any]]:
+        try:
+            return await self._run(
+                self._read, "SELECT * FROM research_sessions ORDER BY created_at DESC, id DESC LIMIT ?", (limit,)
+            )
+        except Exception as e:
+            print(f"Error getting all sessions: {e}")
+            return []
+
+    async def list_sessions(self, limit: int = 20, cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        sql = f"SELECT {LISTING_COLUMNS} FROM research_sessions"
+        params: tuple = ()
+        if cursor:
+            created_at, row_id = cursor.rsplit("|", 1)
+            sql += " WHERE created_at < ? OR (created_at = ? AND id < ?)"
+            params = (created_at, created_at, int(row_id))
+        sql += " ORDER BY created_at DESC, id DESC LIMIT ?"
+        try:
+            rows = await self._run(self._read, sql, params + (limit + 1,))
+        except Exception as e:
+            print(f"Error listing sessions: {e}")
+            return [], None
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = f"{rows[-1]['created_at']}|{rows[-1]['id']}"
+        return rows, next_cursor
+
+    async def search_sessions(self, text: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Full-text search (FTS5, BM25-ranked) over query, research, summary and critique"""
+        match = _fts_query(text)
+        if not match:
+            return []
+        sql = (
+            "SELECT s.id, s.session_id, s.query, s.status, s.created_at, "
+            "substr(s.summary_output, 1, 200) AS summary_preview, "
+            "length(s.summary_output) > 200 AS summary_truncated, "
+            "snippet(research_sessions_fts, -1, '**', '**', '...', 12) AS match_snippet "
+            "FROM research_sessions_fts JOIN research_sessions s ON s.id = research_sessions_fts.rowid "
+            "WHERE research_sessions_fts MATCH ? ORDER BY bm25(research_sessions_fts) LIMIT ?"
+        )
+        try:
+            return await self._run(self._read, sql, (match, limit))
+        except Exception as e:
+            print(f"Error searching sessions: {e}")
+            return []
+
+    async def save_agent_output(self, agent_data: Dict[str, Any]):
+        try:
+            await self.insert_agent_outputs([agent_data])
+        except Exception as e:
+            print(f"Error saving agent output: {e}")
+
+    async def upsert_research_sessions(self, rows: List[Dict[str, Any]]):
+        await self._run(self._write, [self._upsert_statement(row) for row in rows])
+
+    async def patch_research_sessions(self, rows: List[Dict[str, Any]]):
+        statements = [self._update_statement(row["session_id"], row) for row in rows]
+        statements = [statement for statement in statements if statement is not None]
+        if statements:
+            await self._run(self._write, statements)
+
+    async def insert_agent_outputs(self, rows: List[Dict[str, Any]]):
+        statements = [(
+            "INSERT INTO agent_outputs (session_id, agent_type, output, created_at) VALUES (?, ?, ?, ?)",
+            (row.get("session_id"), row.get("agent_type"), row.get("output"), row.get("created_at") or _now())
+        ) for row in rows]
+        await self._run(self._write, statements)
+
+    async def delete_research_session(self, session_id: str):
+        try:
+            await self._run(
+                self._write, [("DELETE FROM research_sessions WHERE session_id = ?", (session_id,))]
+            )
+        except Exception as e:
+            print(f"Error deleting research session: {e}")
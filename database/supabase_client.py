@@ -1,85 +1,212 @@
 # database/supabase_client.py
-import supabase
+import asyncio
+import httpx
 import os
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from dotenv import load_dotenv
+from config.settings import settings
+from database.base import StorageBackend, session_row
+from utils.async_runner import get_background_loop
 
 load_dotenv()
 
-class SupabaseClient:
-    def __init__(self):
+class SupabaseClient(StorageBackend):
+    """Non-blocking client for the Supabase REST (PostgREST) API.
+
+    All requests run on the shared background event loop over one pooled
+    keep-alive httpx client, so callers on any loop (asyncio.run in a
+    Streamlit rerun, batch workers) await without blocking and share
+    connections.
+    """
+
+    def __init__(self, pool_size: Optional[int] = None, timeout: Optional[float] = None):
         self.url = os.getenv("SUPABASE_URL")
         self.key = os.getenv("SUPABASE_KEY")
-        
+
         if not self.url or not self.key:
             raise ValueError("Supabase URL and Key must be set in environment variables")
-        
-        self.client = supabase.create_client(self.url, self.key)
-    
+
+        self.rest_url = f"{self.url.rstrip('/')}/rest/v1"
+        self.pool_size = pool_size or settings.DB_POOL_SIZE
+        self.timeout = timeout or settings.DB_TIMEOUT
+        self._loop = get_background_loop()
+        self._http: Optional[httpx.AsyncClient] = None
+
+    def _client(self) -> httpx.AsyncClient:
+        # Created lazily on the background loop, which owns its connections
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                base_url=self.rest_url,
+                headers={
+                    "apikey": self.key,
+                    "Authorization": f"Bearer {self.key}",
+                    "Content-Type": "application/json"
+                },
+                limits=httpx.Limits(
+                    max_connections=self.pool_size,
+                    max_keepalive_connections=self.pool_size
+                ),
+                timeout=httpx.Timeout(self.timeout, connect=settings.DB_CONNECT_TIMEOUT)
+            )
+        return self._http
+
+    async def _send(self, method: str, table: str, params: Optional[Dict[str, Any]] = None,
+                    json: Any = None, prefer: Optional[str] = None) -> Any:
+        headers = {"Prefer": prefer} if prefer else None
+        response = await self._client().request(method, f"/{table}", params=params, json=json, headers=headers)
+        response.raise_for_status()
+        return response.json() if response.content else None
+
+    async def _request(self, method: str, table: str, params: Optional[Dict[str, Any]] = None,
+                       json: Any = None, prefer: Optional[str] = None) -> Any:
+        """Send one PostgREST request on the background loop"""
+        return await self._loop.run_async(self._send(method, table, params, json, prefer))
+
+    async def close(self):
+        """Close pooled connections"""
+        if self._http is not None:
+            http, self._http = self._http, None
+            await self._loop.run_async(http.aclose())
+
     def create_tables(self):
         """Create necessary tables if they don't exist"""
         # Tables will be created via SQL in Supabase dashboard
         # This is just a placeholder to show what tables we need
         pass
-    
+
     async def save_research_session(self, session_data: Dict[str, Any]) -> str:
         """Save research session to database"""
         try:
-            data = {
-                "query": session_data["query"],
-                "research_output": session_data.get("research", ""),
-                "summary_output": session_data.get("summary", ""),
-                "critique_output": session_data.get("critique", ""),
-                "status": session_data.get("status", "completed"),
-                "session_id": session_data["session_id"]
-            }
-            
-            response = self.client.table('research_sessions').insert(data).execute()
-            
-            if response.data:
-                return response.data[0]['id']
+            data = session_row(session_data)
+
+            rows = await self._request("POST", "research_sessions", json=data, prefer="return=representation")
+
+            if rows:
+                return rows[0]['id']
             else:
                 raise Exception("No data returned from insert")
-                
+
         except Exception as e:
             print(f"Error saving research session: {e}")
             return None
-    
+
     async def update_research_session(self, session_id: str, updates: Dict[str, Any]):
         """Update research session with new data"""
         try:
-            self.client.table('research_sessions').update(updates).eq('session_id', session_id).execute()
+            await self._request("PATCH", "research_sessions", params={"session_id": f"eq.{session_id}"}, json=updates)
         except Exception as e:
             print(f"Error updating research session: {e}")
-    
+
     async def get_research_session(self, session_id: str) -> Optional[Dict[str, Any]]:
         """Retrieve research session by session_id"""
         try:
-            response = self.client.table('research_sessions').select('*').eq('session_id', session_id).execute()
-            return response.data[0] if response.data else None
+            rows = await self._request("GET", "research_sessions", params={"select": "*", "session_id": f"eq.{session_id}"})
+            return rows[0] if rows else None
         except Exception as e:
             print(f"Error getting research session: {e}")
             return None
-    
+
     async def get_all_sessions(self, limit: int = 50) -> List[Dict[str, Any]]:
         """Get all research sessions"""
         try:
-            response = self.client.table('research_sessions').select('*').order('created_at', desc=True).limit(limit).execute()
-            return response.data
+            return await self._request("GET", "research_sessions", params={
+                "select": "*",
+                "order": "created_at.desc",
+                "limit": limit
+            })
         except Exception as e:
             print(f"Error getting all sessions: {e}")
             return []
-    
+
+    async def list_sessions(self, limit: int = 20, cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """List session metadata and summary previews, newest first.
+
+        Reads the research_session_listing view (see schema.sql) and pages with
+        a keyset on (created_at, id): pass the returned cursor to get the next
+        page, which is None once the listing is exhausted.
+        """
+        params = {
+            "select": "id,session_id,query,status,created_at,summary_preview,summary_truncated",
+            "order": "created_at.desc,id.desc",
+            "limit": limit + 1
+        }
+        if cursor:
+            created_at, row_id = cursor.rsplit("|", 1)
+            params["or"] = f'(created_at.lt."{created_at}",and(created_at.eq."{created_at}",id.lt.{int(row_id)}))'
+        try:
+            rows = await self._request("GET", "research_session_listing", params=params) or []
+        except Exception as e:
+            print(f"Error listing sessions: {e}")
+            return [], None
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = f"{rows[-1]['created_at']}|{rows[-1]['id']}"
+        return rows, next_cursor
+
+    async def search_sessions(self, text: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """Case-insensitive substring search over the query and summary"""
+        pattern = "*" + "".join(ch for ch in text if ch not in ',()*"') + "*"
+        try:
+            return await self._request("GET", "research_session_listing", params={
+                "select": "id,session_id,query,status,created_at,summary_preview,summary_truncated",
+                "or": f'(query.ilike."{pattern}",summary_preview.ilike."{pattern}")',
+                "order": "created_at.desc",
+                "limit": limit
+            }) or []
+        except Exception as e:
+            print(f"Error searching sessions: {e}")
+            return []
+
     async def save_agent_output(self, agent_data: Dict[str, Any]):
         """Save individual agent output (optional - for detailed tracking)"""
         try:
-            self.client.table('agent_outputs').insert(agent_data).execute()
+            await self._request("POST", "agent_outputs", json=agent_data, prefer="return=minimal")
         except Exception as e:
             print(f"Error saving agent output: {e}")
-    
+
+    async def upsert_research_sessions(self, rows: List[Dict[str, Any]]):
+        """Insert or merge many session rows in one request (raises on failure).
+
+        PostgREST bulk writes need every row to carry the same columns, so
+        callers should group rows by key set. Requires a unique constraint on
+        research_sessions.session_id.
+        """
+        await self._request(
+            "POST", "research_sessions",
+            params={"on_conflict": "session_id"},
+            json=rows,
+            prefer="resolution=merge-duplicates,return=minimal"
+        )
+
+    async def patch_research_sessions(self, rows: List[Dict[str, Any]]):
+        """Update existing session rows, one PATCH per session (raises on failure).
+
+        Rows without a query cannot be upserted: Postgres checks the NOT NULL
+        constraint on the would-be insert before resolving the conflict.
+        """
+        await asyncio.gather(*(
+            self._request(
+                "PATCH", "research_sessions",
+                params={"session_id": f"eq.{row['session_id']}"},
+                json={column: value for column, value in row.items() if column != "session_id"},
+                prefer="return=minimal"
+            )
+            for row in rows
+        ))
+
+    async def insert_agent_outputs(self, rows: List[Dict[str, Any]]):
+        """Insert many agent output rows in one request (raises on failure)"""
+        await self._request("POST", "agent_outputs", json=rows, prefer="return=minimal")
+
     async def delete_research_session(self, session_id: str):
         """Delete a research session"""
         try:
-            self.client.table('research_sessions').delete().eq('session_id', session_id).execute()
+            await self._request("DELETE", "research_sessions", params={"session_id": f"eq.{session_id}"})
         except Exception as e:
-            print(f"Error deleting research session: {e}")
\ No newline at end of file
+            print(f"Error deleting research session: {e}")
+
+    async def ping(self):
+        """Read one row to check the database is reachable (raises on failure)"""
+        await self._request("GET", "research_sessions", params={"select": "session_id", "limit": 1})
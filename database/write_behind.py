@@ -0,0 +1,271 @@
+# database/write_behind.py
+import asyncio
+import atexit
+import concurrent.futures
+import glob
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process journal lock
+    fcntl = None
+
+from config.settings import settings
+from database.base import session_row
+from utils.async_runner import get_background_loop
+
+
+def is_permanent_error(error: Exception) -> bool:
+    """Rejections that fail the same way on every retry: 4xx responses (other than 408/429) and constraint errors"""
+    if isinstance(error, sqlite3.IntegrityError):
+        return True
+    status = getattr(getattr(error, "response", None), "status_code", 0)
+    return 400 <= status < 500 and status not in (408, 429)
+
+
+class WriteBehindStore:
+    """Queues session and agent-output writes and flushes them in batches.
+
+    Wraps a client exposing the SupabaseClient methods. Writes return as soon
+    as they are queued: updates to the same session_id are coalesced into one
+    row, agent outputs are bulk-inserted, and the queue is flushed when it
+    reaches `batch_size`, every `flush_interval` seconds and at interpreter
+    exit. Session rows without a query (updates to sessions already written)
+    are sent as updates rather than upserts. Rows that fail transiently are
+    appended to a local JSONL journal and retried on the next flush; rows
+    the backend rejects outright (4xx, constraint errors) are dropped. Reads merge still-queued writes so callers
+    see their own updates. Several processes may share the journal; a lock
+    file next to it serializes appends and replays.
+    """
+
+    def __init__(self, client, batch_size: Optional[int] = None, flush_interval: Optional[float] = None,
+                 journal_path: Optional[str] = None):
+        self.client = client
+        self.batch_size = batch_size or settings.DB_WRITE_BATCH_SIZE
+        self.flush_interval = flush_interval or settings.DB_WRITE_FLUSH_INTERVAL
+        self.journal_path = journal_path if journal_path is not None else settings.DB_WRITE_JOURNAL_PATH
+
+        self._sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._agent_outputs: List[Dict[str, Any]] = []
+        # (table, rows) taken off the queue by a flush and not written yet
+        self._in_flight: List[Tuple[str, List[Dict[str, Any]]]] = []
+        self._lock = threading.Lock()
+        self._loop = get_background_loop()
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._closed = False
+
+        self._ticker = asyncio.run_coroutine_threadsafe(self._flush_periodically(), self._loop.loop)
+        atexit.register(self.close)
+
+    def __getattr__(self, name):
+        # Anything not intercepted here (e.g. listing APIs) goes straight to the client
+        if name == "client":
+            raise AttributeError(name)
+        return getattr(self.client, name)
+
+    # Queueing
+
+    def _pending_count(self) -> int:
+        return len(self._sessions) + len(self._agent_outputs)
+
+    def _maybe_flush(self):
+        if self._pending_count() >= self.batch_size:
+            asyncio.run_coroutine_threadsafe(self.flush(), self._loop.loop)
+
+    async def save_research_session(self, session_data: Dict[str, Any]) -> str:
+        """Queue a new session row; returns its session_id"""
+        row = session_row(session_data)
+        with self._lock:
+            self._sessions.setdefault(row["session_id"], {}).update(row)
+        self._maybe_flush()
+        return row["session_id"]
+
+    async def update_research_session(self, session_id: str, updates: Dict[str, Any]):
+        """Queue an update, merged into any pending write for the same session"""
+        with self._lock:
+            self._sessions.setdefault(session_id, {"session_id": session_id}).update(updates)
+        self._maybe_flush()
+
+    async def save_agent_output(self, agent_data: Dict[str, Any]):
+        """Queue an agent output row for the next bulk insert"""
+        with self._lock:
+            self._agent_outputs.append(dict(agent_data))
+        self._maybe_flush()
+
+    # Reads and deletes
+
+    async def get_research_session(self, session_id: str) -> Optional[Dict[str, Any]]:
+        session = await self.client.get_research_session(session_id)
+        with self._lock:
+            pending = self._sessions.get(session_id)
+            if pending:
+                session = {**(session or {}), **pending}
+        return session
+
+    async def get_all_sessions(self, limit: int = 50) -> List[Dict[str, Any]]:
+        await self.flush_now()
+        return await self.client.get_all_sessions(limit=limit)
+
+    async def list_sessions(self, limit: int = 20, cursor: Optional[str] = None):
+        await self.flush_now()
+        return await self.client.list_sessions(limit=limit, cursor=cursor)
+
+    async def search_sessions(self, text: str, limit: int = 20):
+        await self.flush_now()
+        return await self.client.search_sessions(text, limit=limit)
+
+    async def delete_research_session(self, session_id: str):
+        with self._lock:
+            self._sessions.pop(session_id, None)
+        await self.client.delete_research_session(session_id)
+
+    # Flushing
+
+    async def flush_now(self):
+        """Flush the queue from any event loop and wait for it to finish"""
+        await self._loop.run_async(self.flush())
+
+    async def flush(self):
+        """Write queued rows to the backend; runs on the background loop"""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        async with self._flush_lock:
+            with self._lock:
+                sessions = list(self._sessions.values())
+                agent_outputs = self._agent_outputs
+                self._sessions = OrderedDict()
+                self._agent_outputs = []
+
+            replayed_sessions, replayed_outputs = self._take_journal()
+            agent_outputs = replayed_outputs + agent_outputs
+
+            # A session may appear in both the journal and the queue; an upsert
+            # may touch each row only once
+            merged: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+            for row in replayed_sessions + sessions:
+                merged.setdefault(row["session_id"], {}).update(row)
+
+            # Rows with a query are inserts (possibly with later updates merged in);
+            # the rest update sessions already written and must not be upserted,
+            # which would fail the NOT NULL check on query
+            updates = [row for row in merged.values() if "query" not in row]
+            # PostgREST bulk upserts need identical columns, so group by key set
+            groups: Dict[tuple, List[Dict[str, Any]]] = OrderedDict()
+            for row in merged.values():
+                if "query" in row:
+                    groups.setdefault(tuple(sorted(row)), []).append(row)
+            writes = [("research_sessions", self.client.upsert_research_sessions, rows) for rows in groups.values()]
+            if updates:
+                writes.append(("research_sessions", self.client.patch_research_sessions, updates))
+            if agent_outputs:
+                writes.append(("agent_outputs", self.client.insert_agent_outputs, agent_outputs))
+
+            # close() journals whatever is left here if the flush does not finish in time
+            with self._lock:
+                self._in_flight = [(table, rows) for table, _, rows in writes]
+            for table, write, rows in writes:
+                await self._write(table, write, rows)
+                with self._lock:
+                    self._in_flight.pop(0)
+
+    async def _write(self, table: str, write, rows: List[Dict[str, Any]]):
+        """Write a batch; journal it on transient errors, drop rows the backend rejects outright"""
+        try:
+            await write(rows)
+        except Exception as e:
+            if not is_permanent_error(e):
+                print(f"Error flushing {len(rows)} {table} rows, journaling: {e}")
+                self._journal(table, rows)
+            elif len(rows) > 1:
+                # Find the rejected rows rather than losing the whole batch
+                for row in rows:
+                    await self._write(table, write, [row])
+            else:
+                print(f"Dropping {table} row rejected by the backend: {e} ({json.dumps(rows[0], default=str)[:200]})")
+
+    async def _flush_periodically(self):
+        while not self._closed:
+            await asyncio.sleep(self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"Error in write-behind flush: {e}")
+
+    def close(self, timeout: float = 10.0):
+        """Stop the periodic flusher and drain the queue; journal what could not be written in time"""
+        if self._closed:
+            return
+        self._closed = True
+        self._ticker.cancel()
+        drain = asyncio.run_coroutine_threadsafe(self.flush(), self._loop.loop)
+        try:
+            drain.result(timeout)
+        except Exception as e:
+            print(f"Error draining write-behind queue: {e}")
+            # Stop the drain so it cannot write the rows journaled below
+            drain.cancel()
+            concurrent.futures.wait([drain], timeout=1.0)
+            with self._lock:
+                for table, rows in self._in_flight:
+                    self._journal(table, rows)
+                self._in_flight = []
+                self._journal("research_sessions", list(self._sessions.values()))
+                self._journal("agent_outputs", self._agent_outputs)
+
+    # Journal
+
+    @contextmanager
+    def _journal_lock(self):
+        """Hold the journal's lock file (released by the OS if the process dies)"""
+        directory = os.path.dirname(self.journal_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(f"{self.journal_path}.lock", "a") as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    def _replay_files(self) -> List[str]:
+        """Replays left by processes that died while taking the journal, oldest first"""
+        return sorted(glob.glob(f"{glob.escape(self.journal_path)}.*.replaying"), key=os.path.getmtime)
+
+    def _journal(self, table: str, rows: List[Dict[str, Any]]):
+        if not rows or not self.journal_path:
+            return
+        with self._journal_lock(), open(self.journal_path, "a", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps({"table": table, "row": row}, default=str) + "\n")
+
+    def _take_journal(self):
+        """Read and remove journaled rows so this flush retries them.
+
+        The journal is moved to a replay file unique to this take, so a
+        replay cut short by a crash is picked up by the next one.
+        """
+        if not self.journal_path or not (os.path.exists(self.journal_path) or self._replay_files()):
+            return [], []
+        sessions, agent_outputs = [], []
+        with self._journal_lock():
+            replays = self._replay_files()
+            if os.path.exists(self.journal_path):
+                replays.append(f"{self.journal_path}.{os.getpid()}-{uuid.uuid4().hex[:8]}.replaying")
+                os.replace(self.journal_path, replays[-1])
+            for replay_path in replays:
+                with open(replay_path, encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            entry = json.loads(line)
+                        except json.JSONDecodeError:
+                            continue
+                        target = sessions if entry["table"] == "research_sessions" else agent_outputs
+                        target.append(entry["row"])
+            for replay_path in replays:
+                os.remove(replay_path)
+        return sessions, agent_outputs
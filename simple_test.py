@@ -4,6 +4,7 @@ from crewai import Agent, Task, Crew, Process
 from crewai.llm import LLM
 import os
 from dotenv import load_dotenv
+from config.settings import settings
 
 load_dotenv()
 
@@ -12,8 +13,9 @@ def main():
     
     # Configure Gemini LLM
     gemini_llm = LLM(
-        model="gemini/gemini-2.0-flash",  # or "gemini/gemini-1.5-pro"
-        api_key=os.getenv("GOOGLE_API_KEY")
+        model=f"gemini/{settings.MODEL}",  # Set MODEL to e.g. "gemini-1.5-pro"
+        api_key=os.getenv("GOOGLE_API_KEY"),
+        temperature=settings.MODEL_TEMPERATURE
     )
     
     query = st.text_input("Enter query:", "latest developments in renewable energy")
@@ -0,0 +1,16 @@
+import os
+
+# Offline configuration; set before the app modules read settings
+for _name, _value in {
+    "GOOGLE_API_KEY": "offline-tests",
+    "STORAGE_BACKEND": "sqlite",
+    "DB_WRITE_JOURNAL_PATH": "",
+    "LLM_CACHE_BACKEND": "none",
+    "SEARCH_CACHE_ENABLED": "false",
+    "PAGE_CACHE_PATH": "",
+    "TRACE_EXPORT_PATH": "",
+    "CREWAI_DISABLE_TELEMETRY": "true",
+    "CREWAI_TRACING_ENABLED": "false",
+    "OTEL_SDK_DISABLED": "true",
+}.items():
+    os.environ.setdefault(_name, _value)
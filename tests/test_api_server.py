@@ -0,0 +1,202 @@
+import asyncio
+import http.client
+import threading
+
+import pytest
+
+from agents.orchestrator import ResearchOrchestrator
+from api_server import AdmissionError, ResearchService, is_loopback, make_server
+from benchmarks.mocks import MockLLM, MockSearchTool
+from config.settings import settings
+from database.sqlite_client import SQLiteClient
+from database.write_behind import WriteBehindStore
+
+
+def make_orchestrator(db):
+    return ResearchOrchestrator(notify=lambda level, message: None, llm=MockLLM(latency=0.0, tokens_per_second=1e6),
+                                db=db, search_tool=MockSearchTool(latency=0.0))
+
+
+@pytest.fixture
+def database_path(tmp_path):
+    return str(tmp_path / "research.db")
+
+
+def test_submitted_session_is_visible_to_other_replicas_at_once(database_path):
+    # Replica A buffers writes for an hour; replica B only reads the shared database
+    store = WriteBehindStore(SQLiteClient(database_path), flush_interval=3600, journal_path="")
+    gate = threading.Event()
+    orchestrator = make_orchestrator(store)
+    running = orchestrator.execute_research_flow
+
+    async def held_flow(*args, **kwargs):
+        await asyncio.to_thread(gate.wait, 10)
+        return await running(*args, **kwargs)
+
+    orchestrator.execute_research_flow = held_flow
+    replica_a = ResearchService(orchestrator=orchestrator, workers=1)
+    replica_b = ResearchService(orchestrator=make_orchestrator(SQLiteClient(database_path)), workers=1)
+    try:
+        status, body = replica_a.submit("client", {"query": "state of solid-state batteries", "reuse_similar": False})
+        assert status == 202
+
+        polled = replica_b.status(body["session_id"])
+        assert polled is not None
+        assert polled["status"] == "queued"
+        assert polled["query"] == "state of solid-state batteries"
+    finally:
+        gate.set()
+        replica_a.jobs.get(body["session_id"]).future.result(timeout=60)
+        store.close()
+
+    assert replica_b.status(body["session_id"])["status"] == "completed"
+
+
+def test_near_duplicate_served_in_the_job_is_stored_under_the_issued_id(database_path):
+    db = SQLiteClient(database_path)
+    orchestrator = make_orchestrator(db)
+
+    async def run():
+        first = await orchestrator.execute_research_flow("impact of remote work on productivity")
+        await orchestrator.create_session("impact of remote work on productivity", "issued-id", status="queued")
+        second = await orchestrator.execute_research_flow("impact of remote work on productivity",
+                                                          session_id="issued-id")
+        return first, second, await db.get_research_session("issued-id")
+
+    first, second, stored = asyncio.run(run())
+
+    assert second["reused_from"]["session_id"] == first["session_id"]
+    assert second["session_id"] == "issued-id"
+    assert stored["status"] == "completed"
+    assert stored["summary_output"] == first["summary"]
+
+
+def test_admission_does_not_hold_the_lock_during_prepare(database_path):
+    service = ResearchService(orchestrator=make_orchestrator(SQLiteClient(database_path)), workers=1,
+                              max_queue=1, client_max_active=4)
+    started, release = threading.Event(), threading.Event()
+
+    def prepare():
+        started.set()
+        release.wait(10)
+
+    async def run(notify, on_token):
+        return {"status": "completed"}
+
+    admitting = threading.Thread(target=service._admit, args=("a", "research", "q", run, "job-1", prepare))
+    admitting.start()
+    try:
+        assert started.wait(10)
+        assert service.orchestrator is not None
+        assert service.prometheus()
+        # The reserved slot already counts against the queue
+        with pytest.raises(AdmissionError) as rejected:
+            service._admit("b", "research", "q", run, "job-2")
+        assert rejected.value.status == 429
+    finally:
+        release.set()
+        admitting.join(10)
+    service.jobs.get("job-1").future.result(timeout=10)
+
+
+def test_failed_prepare_releases_the_slot(database_path):
+    service = ResearchService(orchestrator=make_orchestrator(SQLiteClient(database_path)), workers=1,
+                              client_max_active=1)
+
+    def prepare():
+        raise RuntimeError("database down")
+
+    async def run(notify, on_token):
+        return {"status": "completed"}
+
+    with pytest.raises(RuntimeError):
+        service._admit("a", "research", "q", run, "job-1", prepare)
+    assert service.jobs.get("job-1") is None
+    service._admit("a", "research", "q", run, "job-2")
+    service.jobs.get("job-2").future.result(timeout=10)
+
+
+def test_only_loopback_hosts_may_run_without_keys():
+    assert is_loopback("127.0.0.1") and is_loopback("::1") and is_loopback("localhost")
+    assert not is_loopback("0.0.0.0") and not is_loopback("10.0.0.5") and not is_loopback("example.com")
+
+
+def held(orchestrator):
+    """Make the orchestrator's flows wait for the returned event before running"""
+    gate = threading.Event()
+    running, resuming = orchestrator.execute_research_flow, orchestrator.resume
+
+    async def held_flow(*args, **kwargs):
+        await asyncio.to_thread(gate.wait, 10)
+        return await running(*args, **kwargs)
+
+    async def held_resume(*args, **kwargs):
+        await asyncio.to_thread(gate.wait, 10)
+        return await resuming(*args, **kwargs)
+
+    orchestrator.execute_research_flow, orchestrator.resume = held_flow, held_resume
+    return gate
+
+
+def test_cancelled_jobs_are_marked_in_storage(database_path):
+    service = ResearchService(orchestrator=make_orchestrator(SQLiteClient(database_path)), workers=1)
+    gate = held(service.orchestrator)
+    try:
+        _, running = service.submit("client", {"query": "first topic", "reuse_similar": False})
+        _, queued = service.submit("client", {"query": "second topic", "reuse_similar": False})
+
+        with pytest.raises(AdmissionError) as other_client:
+            service.cancel("someone-else", queued["session_id"])
+        assert other_client.value.status == 404
+        assert service.cancel("client", queued["session_id"])[0] == 200
+        with pytest.raises(AdmissionError) as again:
+            service.cancel("client", queued["session_id"])
+        assert again.value.status == 409
+    finally:
+        gate.set()
+        service.jobs.get(running["session_id"]).future.result(timeout=60)
+
+    replica = ResearchService(orchestrator=make_orchestrator(SQLiteClient(database_path)), workers=1)
+    assert replica.status(queued["session_id"])["status"] == "cancelled"
+
+
+def test_concurrent_resumes_of_one_session_are_refused(database_path):
+    service = ResearchService(orchestrator=make_orchestrator(SQLiteClient(database_path)), workers=2)
+    asyncio.run(service.orchestrator.create_session("stored topic", "stored-id"))
+    gate = held(service.orchestrator)
+    results = []
+
+    def resume():
+        try:
+            results.append(service.resume("client", "stored-id", {})[0])
+        except AdmissionError as e:
+            results.append(e.status)
+
+    threads = [threading.Thread(target=resume) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(10)
+    gate.set()
+    service.jobs.get("stored-id").future.result(timeout=60)
+
+    assert sorted(results) == [202, 409, 409, 409]
+
+
+def test_event_stream_of_an_abandoned_session_times_out(database_path, monkeypatch):
+    monkeypatch.setattr(settings, "API_EVENTS_TIMEOUT", 0.5)
+    service = ResearchService(orchestrator=make_orchestrator(SQLiteClient(database_path)), workers=1)
+    # Queued by a replica that died before running it
+    asyncio.run(service.orchestrator.create_session("orphaned topic", "orphan-id", status="queued"))
+    server = make_server("127.0.0.1", 0, service)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        connection = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=10)
+        connection.request("GET", "/research/orphan-id/events")
+        events = connection.getresponse().read().decode()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert "event: status" in events
+    assert events.rstrip().split("\n\n")[-1].startswith("event: timeout")
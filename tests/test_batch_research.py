@@ -0,0 +1,42 @@
+import json
+
+from batch_research import load_checkpoint, load_queries
+
+
+def test_malformed_query_lines_are_skipped(tmp_path, capsys):
+    path = tmp_path / "queries.jsonl"
+    path.write_text("\n".join([
+        json.dumps({"id": "a", "query": "solid-state batteries"}),
+        '{"id": "b", "query": "truncated',
+        json.dumps("offshore wind"),
+        "[1, 2]",
+        json.dumps({"id": "c", "query": 42}),
+        "",
+        json.dumps({"query": "grid storage"}),
+    ]) + "\n")
+
+    rows = load_queries(str(path))
+
+    assert rows == [{"id": "a", "query": "solid-state batteries"}, {"id": "2", "query": "offshore wind"},
+                    {"id": "6", "query": "grid storage"}]
+    output = capsys.readouterr().out
+    assert all(f"line {number} " in output for number in (2, 4, 5))
+
+
+def test_malformed_checkpoint_lines_are_skipped(tmp_path, capsys):
+    path = tmp_path / "checkpoint.jsonl"
+    path.write_text("\n".join([
+        json.dumps({"id": "a", "session_id": "s-a", "status": "failed"}),
+        json.dumps({"session_id": "s-x", "status": "completed"}),
+        json.dumps({"id": "b", "session_id": "s-b", "status": "completed"}),
+        '"not an entry"',
+        json.dumps({"id": "a", "session_id": "s-a2", "status": "failed"}),
+        '{"id": "c", "session_id": "s-c", "sta',
+    ]))
+
+    done, failed = load_checkpoint(str(path))
+
+    assert done == {"b"}
+    assert failed == {"a": "s-a2"}
+    output = capsys.readouterr().out
+    assert all(f"line {number} " in output for number in (2, 4, 6))
@@ -0,0 +1,29 @@
+import pytest
+
+from utils.cassette import Cassette, CassetteMiss
+
+
+def test_recorded_interactions_replay_by_key_then_in_order(tmp_path):
+    path = str(tmp_path / "cassette.jsonl.gz")
+    recorder = Cassette(path, "record")
+    recorder.play("llm", "k1", "first prompt", lambda: "first answer")
+    recorder.play("llm", "k2", "second prompt", lambda: "second answer")
+    recorder.flush()
+
+    player = Cassette(path, "replay")
+    assert player.play("llm", "k2", "", lambda: pytest.fail("replay must not call out"))["response"] == "second answer"
+    assert player.play("llm", "unknown", "", lambda: None)["response"] == "first answer"
+    assert player.served == {"matched": 1, "in_order": 1}
+    with pytest.raises(CassetteMiss):
+        player.play("llm", "k1", "", lambda: None)
+
+
+def test_recycling_replay_starts_over(tmp_path):
+    path = str(tmp_path / "cassette.jsonl.gz")
+    recorder = Cassette(path, "record")
+    recorder.play("search", "q", "query", lambda: ["result"])
+    recorder.flush()
+
+    player = Cassette(path, "replay", recycle=True)
+    for _ in range(3):
+        assert player.play("search", "q", "", lambda: None)["response"] == ["result"]
@@ -0,0 +1,24 @@
+from utils.compaction import compact_text
+from utils.rate_limiter import estimate_tokens
+
+REPORT = "\n".join([
+    "## Overview",
+    "Solar capacity grew faster than any other power source in 2023.",
+    *(f"Filler sentence number {index} repeats general remarks about markets and weather." for index in range(40)),
+    "## Conclusion",
+    "Solar capacity will keep growing as panel prices fall.",
+])
+
+
+def test_short_text_is_returned_unchanged():
+    assert compact_text("One sentence.", max_tokens=100) == ("One sentence.", 3, 3)
+
+
+def test_long_text_fits_the_budget_and_keeps_both_ends():
+    text, before, after = compact_text(REPORT, max_tokens=120)
+
+    assert before > 120
+    assert after == estimate_tokens(text) <= 120
+    assert "Solar capacity grew faster" in text
+    assert "## Conclusion\nSolar capacity will keep growing" in text
+    assert "[...]" in text
@@ -0,0 +1,47 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from utils.gemini_helpers import GeminiHelpers
+
+
+class FakeModel:
+    """Stands in for genai.GenerativeModel; `usage` is the usage_metadata to report"""
+
+    def __init__(self, usage):
+        self.usage = usage
+
+    def generate_content(self, prompt):
+        return SimpleNamespace(text=f"answer to {prompt}", usage_metadata=self.usage)
+
+    async def generate_content_async(self, prompt):
+        return self.generate_content(prompt)
+
+
+@pytest.fixture
+def helpers():
+    helpers = GeminiHelpers()
+    helpers.cache = None
+    return helpers
+
+
+def charged(helpers, run):
+    before = helpers.limiter.tokens_used
+    run()
+    return helpers.limiter.tokens_used - before
+
+
+def test_batches_are_charged_the_reported_token_counts(helpers):
+    helpers.model = FakeModel(SimpleNamespace(prompt_token_count=900, candidates_token_count=100,
+                                              total_token_count=1000))
+    prompts = ["first prompt", "second prompt"]
+
+    assert charged(helpers, lambda: helpers.batch_process(prompts)) == 2000
+    assert charged(helpers, lambda: asyncio.run(helpers.abatch_process(prompts))) == 2000
+
+
+def test_the_estimate_is_charged_when_usage_is_missing(helpers):
+    helpers.model = FakeModel(None)
+
+    assert charged(helpers, lambda: helpers.batch_process(["x" * 400])) == 100
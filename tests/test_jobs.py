@@ -0,0 +1,82 @@
+import threading
+
+from utils.jobs import JobManager
+
+
+def flow(gate=None, status="completed"):
+    async def run(notify, on_token):
+        notify("info", "started")
+        on_token("research", "partial text")
+        if gate is not None:
+            gate.wait(5)
+        return {"status": status}
+    return run
+
+
+def wait(manager, job_id):
+    manager.get(job_id).future.result(timeout=5)
+    return manager.status(job_id)
+
+
+def test_only_queued_jobs_can_be_cancelled():
+    manager = JobManager(workers=1, history_size=10)
+    gate = threading.Event()
+    running = manager.submit("research", "first", flow(gate))
+    queued = manager.submit("research", "second", flow())
+
+    assert manager.queue_depth() == 1
+    assert manager.cancel(queued)
+    assert not manager.cancel(running)
+    assert not manager.cancel("unknown")
+    gate.set()
+
+    assert manager.status(queued)["status"] == "cancelled"
+    finished = wait(manager, running)
+    assert finished["status"] == "completed"
+    assert finished["tokens"] == {"research": "partial text"}
+    assert manager.queue_depth() == 0
+
+
+def test_failures_are_reported_on_the_job():
+    manager = JobManager(workers=1, history_size=10)
+
+    async def broken(notify, on_token):
+        raise RuntimeError("storage offline")
+
+    failed = manager.submit("research", "broken", broken)
+    incomplete = manager.submit("research", "incomplete", flow(status="failed"))
+
+    assert wait(manager, failed)["error"] == "storage offline"
+    assert wait(manager, incomplete)["status"] == "failed"
+
+
+def test_history_keeps_the_newest_finished_jobs_and_every_active_one():
+    manager = JobManager(workers=1, history_size=2)
+    finished = []
+    for index in range(3):
+        finished.append(manager.submit("research", f"done {index}", flow()))
+        wait(manager, finished[-1])
+
+    assert manager.get(finished[0]) is None
+    assert [job["id"] for job in manager.jobs()] == [finished[2], finished[1]]
+
+    gate = threading.Event()
+    running = manager.submit("research", "running", flow(gate))
+    queued = manager.submit("research", "queued", flow())
+    third = manager.submit("research", "third", flow())
+
+    # Active jobs are never dropped, even beyond history_size
+    assert [job["id"] for job in manager.jobs()] == [third, queued, running]
+    gate.set()
+    wait(manager, third)
+
+
+def test_resubmitted_id_replaces_the_previous_job():
+    manager = JobManager(workers=1, history_size=10)
+    first = manager.submit("research", "attempt 1", flow(), job_id="session-1")
+    wait(manager, first)
+
+    manager.submit("resume", "attempt 2", flow(), job_id="session-1")
+
+    assert [job["label"] for job in manager.jobs()] == ["attempt 2"]
+    assert wait(manager, "session-1")["kind"] == "resume"
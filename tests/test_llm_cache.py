@@ -0,0 +1,20 @@
+from crewai.llm import LLM
+
+from utils.llm_cache import LLMCache, with_response_cache
+
+
+def test_output_budget_is_part_of_the_cache_key():
+    cache = LLMCache()
+    answers = {}
+
+    def make(max_output_tokens, answer):
+        llm = LLM(model="gemini/gemini-2.0-flash-lite", api_key="offline", temperature=0.1,
+                  max_output_tokens=max_output_tokens)
+        object.__setattr__(llm, "call", lambda messages, **kwargs: answers.setdefault(max_output_tokens, answer))
+        return with_response_cache(llm, cache)
+
+    messages = [{"role": "user", "content": "Summarize the findings"}]
+    assert make(1024, "long summary").call(messages) == "long summary"
+    assert make(512, "short critique").call(messages) == "short critique"
+    assert make(1024, "uncached").call(messages) == "long summary"
+    assert cache.hits == 1
@@ -0,0 +1,105 @@
+import time
+
+import pytest
+
+from benchmarks.mocks import MockLLM
+from config.settings import settings
+from utils.llm_middleware import wrap_llm_call
+from utils.model_router import ModelHealth, get_model_health, parse_fallbacks, with_fallback, with_model_health
+from utils.streaming import TokenStream, current_stream
+
+MESSAGES = [{"role": "user", "content": "Summarize the findings"}]
+
+
+class FailingLLM(MockLLM):
+    def call(self, messages, **kwargs):
+        raise RuntimeError("503 model overloaded")
+
+
+class FailsMidStreamLLM(MockLLM):
+    def call(self, messages, **kwargs):
+        current_stream().push("The first half of an answer")
+        raise RuntimeError("connection reset")
+
+
+@pytest.fixture(autouse=True)
+def health_settings(monkeypatch):
+    monkeypatch.setattr(settings, "MODEL_MIN_SAMPLES", 3)
+    monkeypatch.setattr(settings, "MODEL_P95_THRESHOLD", 0.05)
+    monkeypatch.setattr(settings, "MODEL_ERROR_RATE_THRESHOLD", 0.3)
+    monkeypatch.setattr(settings, "MODEL_PROBE_INTERVAL", 3600)
+
+
+def routed(primary, model):
+    """primary -> fallback routing as the orchestrator builds it, with calls counted per model"""
+    calls = {"primary": 0, "fallback": 0}
+    fallback = with_model_health(MockLLM(model=f"mock/{model}-fallback", latency=0.0, tokens_per_second=1e6))
+    for name, llm in (("primary", primary), ("fallback", fallback)):
+        def counted(call_next, messages, name=name, **kwargs):
+            calls[name] += 1
+            return call_next(messages, **kwargs)
+        wrap_llm_call(llm, counted)
+    return with_fallback(with_model_health(primary), fallback), calls
+
+
+def test_fallbacks_are_parsed_in_pairs():
+    assert parse_fallbacks("a:b, b : a,broken,:c") == {"a": "b", "b": "a"}
+
+
+def test_healthy_model_serves_its_calls():
+    llm, calls = routed(MockLLM(model="mock/healthy", latency=0.0, tokens_per_second=1e6), "healthy")
+
+    for _ in range(5):
+        assert "Final Answer" in llm.call(MESSAGES)
+
+    assert calls == {"primary": 5, "fallback": 0}
+    assert not get_model_health("healthy").degraded()
+
+
+def test_failed_call_is_retried_on_the_fallback():
+    llm, calls = routed(FailingLLM(model="mock/failing"), "failing")
+
+    assert "Final Answer" in llm.call(MESSAGES)
+
+    assert calls == {"primary": 1, "fallback": 1}
+    assert get_model_health("failing").fallbacks == 1
+
+
+def test_degraded_model_is_bypassed_until_it_is_probed(monkeypatch):
+    llm, calls = routed(MockLLM(model="mock/slow", latency=0.06, tokens_per_second=1e6), "slow")
+
+    for _ in range(3):
+        llm.call(MESSAGES)
+    assert get_model_health("slow").degraded()
+
+    for _ in range(4):
+        llm.call(MESSAGES)
+    assert calls == {"primary": 3, "fallback": 4}
+
+    # Once the probe interval has passed, one call goes back to the primary
+    monkeypatch.setattr(settings, "MODEL_PROBE_INTERVAL", 0)
+    llm.call(MESSAGES)
+    assert calls["primary"] == 4
+
+
+def test_slow_calls_age_out_of_the_window():
+    health = ModelHealth("recovering", window=0.2)
+    for _ in range(3):
+        health.record(1.0, ok=True)
+    assert health.degraded()
+
+    time.sleep(0.25)
+
+    assert health.calls() == 0
+    assert not health.degraded()
+
+
+def test_call_that_streamed_tokens_is_not_retried_on_the_fallback():
+    llm, calls = routed(FailsMidStreamLLM(model="mock/midstream"), "midstream")
+    stream = TokenStream(lambda phase, text: None)
+
+    with stream.phase("research"), pytest.raises(RuntimeError, match="connection reset"):
+        llm.call(MESSAGES)
+
+    assert calls == {"primary": 1, "fallback": 0}
+    assert stream.texts["research"] == "The first half of an answer"
@@ -0,0 +1,99 @@
+import asyncio
+from types import SimpleNamespace
+
+from agents.orchestrator import ResearchOrchestrator
+from benchmarks.mocks import MockLLM, MockSearchTool
+from database.sqlite_client import SQLiteClient
+from utils.streaming import with_streaming
+
+
+def test_single_crew_runs_do_not_share_agents(tmp_path):
+    orchestrator = ResearchOrchestrator(notify=lambda level, message: None,
+                                        llm=MockLLM(latency=0.0, tokens_per_second=1e6),
+                                        db=SQLiteClient(str(tmp_path / "research.db")),
+                                        search_tool=MockSearchTool(latency=0.0), pipeline_mode="single_crew")
+    created = []
+    create_agents = orchestrator._create_agents
+    orchestrator._create_agents = lambda: created.append(create_agents()) or created[-1]
+
+    async def run():
+        return [await orchestrator.execute_research_flow(f"benchmark topic {index}", reuse_similar=False)
+                for index in range(2)]
+
+    results = asyncio.run(run())
+
+    assert [result["status"] for result in results] == ["completed", "completed"]
+    assert all(result["summary"] and result["critique"] for result in results)
+    first, second = created
+    assert all(first[phase] is not second[phase] for phase in first)
+
+
+class FlakyLLM(MockLLM):
+    """MockLLM whose next `failures` calls raise a transient error"""
+
+    failures: int = 0
+
+    def call(self, messages, *args, **kwargs):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("503 model overloaded")
+        return super().call(messages, *args, **kwargs)
+
+
+def test_retry_budget_is_not_used_up_across_single_crew_runs(tmp_path):
+    """Agents count failed attempts for life, so shared agents run out of retries after a few runs"""
+
+    def statuses(share_agents):
+        llm = FlakyLLM(latency=0.0, tokens_per_second=1e6)
+        orchestrator = ResearchOrchestrator(notify=lambda level, message: None, llm=llm,
+                                            db=SQLiteClient(str(tmp_path / f"shared-{share_agents}.db")),
+                                            search_tool=MockSearchTool(latency=0.0), pipeline_mode="single_crew")
+        if share_agents:
+            agents = orchestrator._create_agents()
+            orchestrator._create_agents = lambda: agents
+
+        async def run():
+            results = []
+            for index in range(4):
+                llm.failures = 1  # One transient error per run, well within max_retry_limit
+                results.append(await orchestrator.execute_research_flow(f"benchmark topic {index}",
+                                                                        reuse_similar=False))
+            return [result["status"] for result in results]
+
+        return asyncio.run(run())
+
+    assert statuses(share_agents=False) == ["completed"] * 4
+    assert statuses(share_agents=True) == ["completed", "completed", "failed", "failed"]
+
+
+def make_orchestrator(tmp_path, **kwargs):
+    return ResearchOrchestrator(notify=lambda level, message: None,
+                                llm=with_streaming(MockLLM(latency=0.0, tokens_per_second=1e6)),
+                                db=SQLiteClient(str(tmp_path / "research.db")),
+                                search_tool=MockSearchTool(latency=0.0), **kwargs)
+
+
+def test_subtopics_are_taken_from_list_items_only(tmp_path):
+    orchestrator = make_orchestrator(tmp_path)
+    reply = "Here are 3 subtopics:\n\n1. Battery chemistry\n2) **Manufacturing costs**\n- Battery chemistry\n• Policy\n\nHope this helps!"
+    orchestrator.llm = SimpleNamespace(call=lambda messages: reply)
+
+    assert orchestrator.plan_subtopics("solid-state batteries", 3) == ["Battery chemistry", "Manufacturing costs", "Policy"]
+
+    orchestrator.llm = SimpleNamespace(call=lambda messages: "Sorry, I cannot split this topic.")
+    assert orchestrator.plan_subtopics("solid-state batteries", 3) == ["solid-state batteries"]
+
+
+def test_fanout_streams_only_the_merged_report(tmp_path):
+    orchestrator = make_orchestrator(tmp_path)
+    orchestrator.plan_subtopics = lambda query, count: ["chemistry", "costs", "policy"]
+    streamed = {}
+
+    result = asyncio.run(orchestrator.execute_research_flow(
+        "solid-state batteries", fanout_subtopics=3, reuse_similar=False,
+        on_token=lambda phase, text: streamed.__setitem__(phase, text)
+    ))
+
+    assert result["status"] == "completed"
+    assert streamed["research"].strip() == result["research"].strip()
+    assert "Thought:" not in streamed["research"]
@@ -0,0 +1,270 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from urllib.parse import urlsplit
+
+from tools.page_fetch import PageCache, PageFetcher, TextExtractor, is_public_address
+
+ARTICLE = """<html><head><title>Solid-state
+batteries</title><script>var tracking = "ignore this script text entirely";</script></head>
+<body>
+<nav><a href="/">Home</a> <a href="/news">News and other site sections</a></nav>
+<div>Sidebar teaser with enough words to count as a line of text.</div>
+<main>
+<h1>Solid-state batteries</h1>
+<p>Solid-state batteries replace the liquid electrolyte with a solid one, which raises energy density.</p>
+<p>Manufacturers expect the first vehicles with solid-state packs to reach customers within a few years.</p>
+<p>Short line.</p>
+</main>
+<footer>Copyright notice with several words in it.</footer>
+</body></html>"""
+PARAGRAPH = "<p>" + "Cell makers keep scaling up production of batteries for electric vehicles. " * 5 + "</p>\n"
+
+
+class Site(BaseHTTPRequestHandler):
+    """Test pages; the server object keeps request counts and the peak number of requests in flight"""
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body=b"", content_type="text/html; charset=utf-8", headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        path = self.path.split("?")[0]
+        with server.lock:
+            server.hits[path] = server.hits.get(path, 0) + 1
+            server.in_flight += 1
+            server.peak = max(server.peak, server.in_flight)
+        try:
+            if path == "/article":
+                if self.headers.get("If-None-Match") == '"v1"':
+                    self.send_response(304)
+                    self.send_header("ETag", '"v1"')
+                    self.end_headers()
+                else:
+                    self._send(200, ARTICLE.encode(), headers={"ETag": '"v1"'})
+            elif path == "/slow":
+                time.sleep(0.3)
+                self._send(200, ARTICLE.encode())
+            elif path == "/hang":
+                time.sleep(3)
+                self._send(200, ARTICLE.encode())
+            elif path == "/endless":
+                # Paragraphs outside <main>, streamed until the client hangs up
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html")
+                self.end_headers()
+                try:
+                    self.wfile.write(b"<html><body>")
+                    for _ in range(2000):
+                        self.wfile.write(PARAGRAPH.encode())
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+            elif path == "/redirect":
+                self._send(302, headers={"Location": self.path.split("to=", 1)[1]})
+            elif path == "/image":
+                self._send(200, b"\x89PNG", content_type="image/png")
+            else:
+                self._send(404, b"not found")
+        finally:
+            with server.lock:
+                server.in_flight -= 1
+
+
+@pytest.fixture
+def site():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Site)
+    server.lock = threading.Lock()
+    server.hits = {}
+    server.in_flight = 0
+    server.peak = 0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server, f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_extractor_keeps_main_text_and_drops_chrome():
+    extractor = TextExtractor(max_chars=200)
+    extractor.feed(ARTICLE)
+    text = extractor.text()
+
+    assert " ".join(extractor.title.split()) == "Solid-state batteries"
+    assert text.startswith("Solid-state batteries replace the liquid electrolyte")
+    assert "\nManufacturers expect" in text
+    assert text.endswith(" ...")
+    assert "Sidebar teaser" not in text
+
+
+def test_extractor_falls_back_to_the_whole_page_when_main_is_short():
+    extractor = TextExtractor(max_chars=1000)
+    extractor.feed(ARTICLE)
+    lines = extractor.text().split("\n")
+
+    assert lines[0] == "Sidebar teaser with enough words to count as a line of text."
+    assert lines[1].startswith("Solid-state batteries replace")
+    assert lines[2].startswith("Manufacturers expect")
+    assert len(lines) == 3  # No script, nav, footer or short lines
+
+
+def test_extractor_is_done_once_the_budget_is_filled():
+    extractor = TextExtractor(max_chars=200)
+    extractor.feed("<html><body>")
+    for _ in range(10):
+        extractor.feed(PARAGRAPH)
+        if extractor.done:
+            break
+    assert extractor.done
+    assert len(extractor.text()) <= 200 + len(" ...")
+
+
+def test_stale_pages_are_revalidated_with_their_etag(site):
+    server, base = site
+    fetcher = PageFetcher(cache=PageCache(path="", ttl=-1), allow_private=True)
+
+    [first] = fetcher.fetch([f"{base}/article"])
+    [second] = fetcher.fetch([f"{base}/article"])
+
+    assert first["cache"] == "miss"
+    assert first["etag"] == '"v1"'
+    assert first["title"] == "Solid-state batteries"
+    assert second["cache"] == "revalidated"
+    assert second["text"] == first["text"]
+    assert server.hits["/article"] == 2
+
+
+def test_fresh_pages_are_served_from_the_cache(site):
+    server, base = site
+    fetcher = PageFetcher(cache=PageCache(path=""), allow_private=True)
+
+    fetcher.fetch([f"{base}/article"])
+    [page] = fetcher.fetch([f"{base}/article"])
+
+    assert page["cache"] == "hit"
+    assert server.hits["/article"] == 1
+
+
+def test_requests_to_one_host_are_capped(site):
+    server, base = site
+    fetcher = PageFetcher(cache=PageCache(path=""), per_host=2, allow_private=True)
+
+    pages = fetcher.fetch([f"{base}/slow?page={index}" for index in range(6)])
+
+    assert all(page and page["cache"] == "miss" for page in pages)
+    assert server.hits["/slow"] == 6
+    assert server.peak == 2
+
+
+def test_slow_pages_time_out_without_failing_the_batch(site):
+    _, base = site
+    fetcher = PageFetcher(cache=PageCache(path=""), timeout=0.5, allow_private=True)
+
+    started = time.monotonic()
+    hung, article = fetcher.fetch([f"{base}/hang", f"{base}/article"])
+
+    assert hung is None
+    assert article["title"] == "Solid-state batteries"
+    assert time.monotonic() - started < 2.5
+
+
+def test_reading_stops_at_the_byte_limit(site):
+    _, base = site
+    fetcher = PageFetcher(cache=PageCache(path=""), max_bytes=20_000, max_chars=100_000, allow_private=True)
+
+    [page] = fetcher.fetch([f"{base}/endless"])
+
+    assert page["text"]
+    assert 20_000 <= page["bytes_read"] < 20_000 + 65_536
+
+
+def test_unreadable_responses_are_skipped(site):
+    _, base = site
+    fetcher = PageFetcher(cache=PageCache(path=""), allow_private=True)
+
+    assert fetcher.fetch([f"{base}/image", f"{base}/missing", "ftp://example.com/file"]) == [None, None, None]
+
+
+def test_one_bad_url_does_not_lose_the_batch(site):
+    _, base = site
+    fetcher = PageFetcher(cache=PageCache(path=""), allow_private=True)
+
+    *invalid, article = fetcher.fetch(["http://[::1", "http://exa\x00mple.com/", f"{base}/article"])
+
+    assert invalid == [None, None]
+    assert article["title"] == "Solid-state batteries"
+
+
+class LoopbackIsPublic(PageFetcher):
+    """Treats the test server as a public host, so redirects away from it are checked"""
+
+    async def _check_host(self, url):
+        if urlsplit(url).hostname != "127.0.0.1":
+            await super()._check_host(url)
+
+
+def test_addresses_outside_the_public_internet_are_refused():
+    for address in ("127.0.0.1", "10.1.2.3", "192.168.0.1", "169.254.169.254", "100.64.0.1", "0.0.0.0",
+                    "::1", "fe80::1", "::ffff:127.0.0.1", "224.0.0.1"):
+        assert not is_public_address(address), address
+    assert is_public_address("93.184.216.34")
+    assert is_public_address("2606:2800:220:1:248:1893:25c7:1946")
+
+
+def test_private_hosts_are_not_fetched(site):
+    server, base = site
+
+    assert PageFetcher(cache=PageCache(path="")).fetch([f"{base}/article"]) == [None]
+    assert "/article" not in server.hits
+
+
+def test_redirects_to_private_hosts_are_not_followed(site):
+    server, base = site
+    fetcher = LoopbackIsPublic(cache=PageCache(path=""))
+
+    pages = fetcher.fetch([f"{base}/redirect?to=http://169.254.169.254/latest/meta-data/",
+                           f"{base}/redirect?to=http://localhost:{server.server_address[1]}/article",
+                           f"{base}/redirect?to=/article"])
+
+    assert pages[:2] == [None, None]
+    assert pages[2]["title"] == "Solid-state batteries"
+    assert server.hits["/article"] == 1
+
+
+class RecordingCache(PageCache):
+    """Records the thread of every cache access"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.threads = set()
+
+    def get(self, url):
+        self.threads.add(threading.current_thread())
+        return super().get(url)
+
+    def set(self, page):
+        self.threads.add(threading.current_thread())
+        super().set(page)
+
+
+def test_the_cache_is_not_touched_on_the_shared_loop(site, tmp_path):
+    _, base = site
+    cache = RecordingCache(path=str(tmp_path / "pages.db"), ttl=-1)
+    fetcher = PageFetcher(cache=cache, allow_private=True)
+
+    fetcher.fetch([f"{base}/article", f"{base}/article"])
+    [page] = fetcher.fetch([f"{base}/article"])
+
+    assert page["cache"] == "revalidated"
+    assert cache.threads == {threading.current_thread()}
@@ -0,0 +1,38 @@
+from utils import precritic
+
+RESEARCH = " ".join([
+    "Solid-state batteries replace the liquid electrolyte with a ceramic or polymer electrolyte.",
+    "Toyota plans solid-state batteries for hybrid vehicles by 2027, with energy density near 400 Wh/kg.",
+    "QuantumScape reports ceramic separators that survived 800 charging cycles in testing.",
+    "Manufacturing costs remain the main obstacle, since ceramic electrolyte layers are hard to produce at scale.",
+    "Analysts expect costs to fall as production of solid-state batteries scales up after 2027.",
+    "Electrolyte stability and charging speed are the main advantages over lithium-ion batteries.",
+    "Energy density gains would extend vehicle range, while ceramic electrolyte cracking limits charging cycles.",
+] * 2)
+GOOD = ("Solid-state batteries swap the liquid electrolyte for a ceramic or polymer electrolyte, raising energy "
+        "density toward 400 Wh/kg. Toyota targets hybrid vehicles by 2027 and QuantumScape reports 800 charging "
+        "cycles, but manufacturing costs and ceramic cracking remain obstacles until production scales.")
+
+
+def test_faithful_summary_passes():
+    assessment = precritic.assess(GOOD, RESEARCH)
+
+    assert precritic.passes(assessment, threshold=0.7)
+    assert assessment["unsupported_numbers"] == []
+    assert "Overall rating" in precritic.format_critique(assessment)
+
+
+def test_invented_figures_and_names_are_flagged():
+    summary = GOOD.replace("800", "1,500").replace("QuantumScape", "Northvolt")
+    assessment = precritic.assess(summary, RESEARCH)
+
+    assert assessment["unsupported_numbers"] == ["1500"]
+    assert assessment["unsupported_entities"] == ["Northvolt"]
+    assert not precritic.passes(assessment, threshold=0.0)
+    assert "figures not found in the research: 1500" in precritic.findings(assessment)
+
+
+def test_entities_skip_sentence_starts_and_labels():
+    assert precritic.entities("**Key findings:** The Toyota plan works. However, McKinsey disagrees.") == {
+        "Toyota", "McKinsey"
+    }
@@ -0,0 +1,35 @@
+from utils.query_index import QueryIndex, query_terms
+
+
+def test_query_terms_drop_stopwords_and_plurals():
+    assert query_terms("What are the latest trends in solar panels?") == {"solar", "panel"}
+
+
+def test_near_duplicates_are_found_and_unrelated_queries_are_not():
+    index = QueryIndex()
+    index.add("s1", "impact of remote work on productivity")
+    index.add("s2", "history of the roman empire")
+
+    assert index.find("remote work impact on productivity", threshold=0.8) == ("s1", 1.0)
+    assert index.find("solid-state battery manufacturing", threshold=0.5) is None
+
+
+def test_old_and_removed_sessions_are_not_served():
+    index = QueryIndex()
+    index.add("old", "impact of remote work on productivity", created_at=0)
+    assert index.find("impact of remote work on productivity", threshold=0.8, max_age=3600) is None
+
+    index.add("new", "impact of remote work on productivity")
+    index.remove("new")
+    assert index.find("impact of remote work on productivity", threshold=0.8, max_age=3600) is None
+    assert len(index) == 1
+
+
+def test_queries_without_content_words_never_match():
+    index = QueryIndex()
+    index.add("s1", "Latest trends")
+    index.add("s2", "impact of remote work on productivity")
+
+    assert len(index) == 1
+    assert index.find("Recent trends", threshold=0.85) is None
+    assert index.find("What is new?", threshold=0.85) is None
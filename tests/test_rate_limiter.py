@@ -0,0 +1,39 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.mocks import MockLLM
+from utils.rate_limiter import AdaptiveRateLimiter, TokenBucketLimiter, is_rate_limit_error, with_rate_limit
+
+
+def test_requests_beyond_the_quota_have_to_wait():
+    limiter = TokenBucketLimiter(requests_per_minute=2, tokens_per_minute=1000)
+
+    assert limiter.try_acquire(10) == 0
+    assert limiter.try_acquire(10) == 0
+    assert 29 < limiter.try_acquire(10) <= 30
+
+
+def test_token_quota_is_enforced_and_refilled():
+    limiter = TokenBucketLimiter(requests_per_minute=1000, tokens_per_minute=60_000)
+
+    assert limiter.try_acquire(60_000) == 0
+    assert limiter.try_acquire(100) > 0
+    time.sleep(0.15)
+    assert limiter.try_acquire(100) == 0
+
+
+def test_quota_errors_are_recognised():
+    assert is_rate_limit_error(RuntimeError("429 Too Many Requests"))
+    assert is_rate_limit_error(RuntimeError("RESOURCE_EXHAUSTED: quota"))
+    assert not is_rate_limit_error(RuntimeError("500 internal error"))
+
+
+def test_calls_sharing_an_llm_are_charged_only_their_own_tokens():
+    limiter = AdaptiveRateLimiter(requests_per_minute=1000, tokens_per_minute=10_000_000)
+    llm = with_rate_limit(MockLLM(latency=0.2), limiter)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        list(pool.map(llm.call, [f"Question {index}: " + "context " * 50 * index for index in range(1, 9)]))
+
+    assert limiter.requests == 8
+    assert limiter.tokens_used == llm.get_token_usage_summary().total_tokens
@@ -0,0 +1,76 @@
+import contextvars
+import threading
+
+from config.settings import settings
+from tools.result_store import SearchResultStore, canonicalize_url, current_result_store, result_store_session
+
+
+def result(href, title, body):
+    return {"href": href, "title": title, "body": body}
+
+
+def test_urls_are_canonicalized():
+    assert canonicalize_url("https://www.Example.com:443/news/index.html?utm_source=x&b=2&a=1#top") == \
+        "example.com/news?a=1&b=2"
+    assert canonicalize_url("http://example.com//news/?gclid=abc") == "example.com/news"
+    assert canonicalize_url("https://example.com:8080/news") == "example.com:8080/news"
+
+
+def test_seen_urls_and_near_identical_snippets_are_dropped():
+    store = SearchResultStore(threshold=0.6)
+    body = "Solid-state batteries replace the liquid electrolyte with a solid one, raising energy density."
+    first, dropped = store.filter([result("https://example.com/a", "Batteries", body),
+                                   result("https://example.org/b", "Wind", "Offshore wind farms keep growing.")])
+    assert (len(first), dropped) == (2, 0)
+
+    later, dropped = store.filter([
+        result("https://www.example.com/a/?utm_campaign=x", "Other title", "Different text"),  # Same page
+        result("https://news.example.net/c", "Batteries", body + " (Reuters)"),  # Syndicated copy
+        result("https://example.net/d", "Recycling", "Panel recycling plants open in Europe."),
+    ])
+
+    assert [item["href"] for item in later] == ["https://example.net/d"]
+    assert dropped == 2
+    stats = store.stats()
+    assert (stats["results_seen"], stats["results_dropped"]) == (5, 2)
+    assert stats["tokens_saved"] > 0
+
+
+def test_one_store_is_shared_by_the_threads_of_a_run(monkeypatch):
+    monkeypatch.setattr(settings, "SEARCH_DEDUP_ENABLED", True)
+    seen = []
+
+    with result_store_session() as store:
+        context = contextvars.copy_context()
+        worker = threading.Thread(target=context.run, args=(lambda: seen.append(current_result_store()),))
+        worker.start()
+        worker.join()
+
+    assert seen == [store]
+    assert current_result_store() is None
+
+    monkeypatch.setattr(settings, "SEARCH_DEDUP_ENABLED", False)
+    with result_store_session() as store:
+        assert store is None and current_result_store() is None
+
+
+def test_the_search_tool_only_passes_on_new_results(monkeypatch):
+    from agents.researcher import ResearcherAgent
+    from tools import research_tools
+
+    monkeypatch.setattr(settings, "SEARCH_DEDUP_ENABLED", True)
+    monkeypatch.setattr(settings, "PAGE_FETCH_ENABLED", False)
+    monkeypatch.setattr(research_tools, "search_web", lambda query, max_results: [
+        result("https://example.com/a", "Batteries", "Solid-state cells raise energy density."),
+        result(f"https://example.com/{query}", query.title(), f"Coverage of {query} from another angle."),
+    ])
+    tool = ResearcherAgent().tools.get_search_tool()
+
+    with result_store_session():
+        first = tool._run("batteries")
+        second = tool._run("recycling")
+        repeated = tool._run("recycling")
+
+    assert "example.com/a" in first and "example.com/a" not in second
+    assert "(1 results already returned by earlier searches were omitted)" in second
+    assert repeated.startswith("No new results for query: recycling")
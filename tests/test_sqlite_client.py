@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+from database.sqlite_client import SQLiteClient
+
+
+@pytest.fixture
+def client(tmp_path):
+    return SQLiteClient(path=str(tmp_path / "research.db"))
+
+
+def save(client, session_id, query, summary="", research=""):
+    asyncio.run(client.save_research_session({"session_id": session_id, "query": query,
+                                              "summary": summary, "research": research}))
+
+
+def test_listing_pages_through_every_session_newest_first(client):
+    for index in range(5):
+        save(client, f"s{index}", f"query {index}", summary="x" * (150 + 25 * index))
+
+    pages, cursor = [], None
+    while True:
+        rows, cursor = asyncio.run(client.list_sessions(limit=2, cursor=cursor))
+        pages.append([row["session_id"] for row in rows])
+        if cursor is None:
+            break
+
+    assert pages == [["s4", "s3"], ["s2", "s1"], ["s0"]]
+    rows, _ = asyncio.run(client.list_sessions(limit=5))
+    assert "research_output" not in rows[0]
+    assert [bool(row["summary_truncated"]) for row in rows] == [True, True, False, False, False]
+    assert all(len(row["summary_preview"]) <= 200 for row in rows)
+
+
+def test_search_ranks_matches_and_follows_updates_and_deletes(client):
+    save(client, "batteries", "solid-state batteries", summary="Solid-state batteries raise energy density.")
+    save(client, "solar", "solar panel recycling", research="Panels also store energy in home batteries.")
+    save(client, "wind", "offshore wind farms")
+
+    assert [row["session_id"] for row in asyncio.run(client.search_sessions("battery"))] == ["batteries", "solar"]
+    [match] = asyncio.run(client.search_sessions("recycling panels"))
+    assert match["session_id"] == "solar"
+    assert "**" in match["match_snippet"]
+
+    asyncio.run(client.update_research_session("wind", {"summary_output": "Turbines paired with batteries"}))
+    asyncio.run(client.delete_research_session("batteries"))
+
+    assert {row["session_id"] for row in asyncio.run(client.search_sessions("batteries"))} == {"solar", "wind"}
+
+
+def test_search_input_is_not_parsed_as_fts_syntax(client):
+    save(client, "s1", "grid storage")
+
+    assert asyncio.run(client.search_sessions('grid" OR NEAR(storage')) == []
+    assert [row["session_id"] for row in asyncio.run(client.search_sessions("grid: storage*"))] == ["s1"]
+    assert asyncio.run(client.search_sessions("?!")) == []
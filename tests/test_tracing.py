@@ -0,0 +1,38 @@
+import json
+import threading
+
+from utils.tracing import TraceExporter, Tracer
+
+
+def test_spans_are_exported_off_the_calling_thread(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    tracer = Tracer(enabled=True, export_path=str(path))
+    writers = set()
+    write = tracer.exporter._write
+    tracer.exporter._write = lambda records: (writers.add(threading.current_thread()), write(records))
+
+    with tracer.span("research", kind="phase"):
+        with tracer.span("researcher", kind="llm", model="mock"):
+            pass
+    tracer.exporter.flush()
+
+    assert [json.loads(line)["name"] for line in path.read_text().splitlines()] == ["researcher", "research"]
+    assert writers and threading.current_thread() not in writers
+
+
+def test_export_file_is_rotated_at_the_size_limit(tmp_path):
+    path = tmp_path / "traces.jsonl"
+    exporter = TraceExporter(str(path), max_bytes=1000)
+
+    for index in range(30):
+        exporter.export({"name": f"span-{index}", "padding": "x" * 80})
+        exporter.flush()
+
+    def index(line):
+        return int(json.loads(line)["name"].split("-")[1])
+
+    rotated = (tmp_path / "traces.jsonl.1").read_text().splitlines()
+    current = path.read_text().splitlines()
+    assert path.stat().st_size < 1000 + 120
+    assert index(current[-1]) == 29
+    assert index(rotated[-1]) + 1 == index(current[0])
@@ -0,0 +1,186 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from database.supabase_client import SupabaseClient
+from database.write_behind import WriteBehindStore
+
+
+class FakePostgrest:
+    """Records PostgREST requests; `fail` maps an HTTP method to the status to answer with"""
+
+    def __init__(self):
+        self.requests = []
+        self.fail = {}
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content) if request.content else None
+        self.requests.append({
+            "method": request.method,
+            "path": request.url.path,
+            "params": dict(request.url.params),
+            "prefer": request.headers.get("Prefer"),
+            "json": body,
+        })
+        return httpx.Response(self.fail.get(request.method, 201))
+
+
+@pytest.fixture
+def postgrest(monkeypatch):
+    monkeypatch.setenv("SUPABASE_URL", "https://example.supabase.co")
+    monkeypatch.setenv("SUPABASE_KEY", "test-key")
+    return FakePostgrest()
+
+
+@pytest.fixture
+def store(postgrest, tmp_path):
+    client = SupabaseClient()
+    client._http = httpx.AsyncClient(base_url=client.rest_url, transport=httpx.MockTransport(postgrest))
+    store = WriteBehindStore(client, batch_size=1000, flush_interval=3600,
+                             journal_path=str(tmp_path / "journal.jsonl"))
+    yield store
+    store.close()
+
+
+def journaled(store):
+    try:
+        with open(store.journal_path, encoding="utf-8") as f:
+            return [json.loads(line) for line in f]
+    except FileNotFoundError:
+        return []
+
+
+def test_new_session_and_updates_are_coalesced_into_one_upsert(store, postgrest):
+    async def run():
+        await store.save_research_session({"session_id": "s1", "query": "solar", "status": "in_progress"})
+        await store.update_research_session("s1", {"research_output": "findings"})
+        await store.update_research_session("s1", {"status": "completed"})
+        await store.flush_now()
+
+    asyncio.run(run())
+
+    assert len(postgrest.requests) == 1
+    request = postgrest.requests[0]
+    assert request["method"] == "POST"
+    assert request["path"] == "/rest/v1/research_sessions"
+    assert request["params"] == {"on_conflict": "session_id"}
+    assert "resolution=merge-duplicates" in request["prefer"]
+    [row] = request["json"]
+    assert row["query"] == "solar"
+    assert row["research_output"] == "findings"
+    assert row["status"] == "completed"
+
+
+def test_updates_to_flushed_sessions_are_patched_not_upserted(store, postgrest):
+    async def run():
+        await store.save_research_session({"session_id": "s1", "query": "solar", "status": "in_progress"})
+        await store.flush_now()
+        await store.update_research_session("s1", {"status": "completed", "research_output": "findings"})
+        await store.flush_now()
+
+    asyncio.run(run())
+
+    patch = postgrest.requests[-1]
+    assert patch["method"] == "PATCH"
+    assert patch["params"] == {"session_id": "eq.s1"}
+    assert patch["json"] == {"status": "completed", "research_output": "findings"}
+    assert sum(request["method"] == "POST" for request in postgrest.requests) == 1
+
+
+def test_transient_failures_are_journaled_and_retried(store, postgrest):
+    async def run():
+        await store.save_research_session({"session_id": "s1", "query": "solar"})
+        await store.save_agent_output({"session_id": "s1", "agent_type": "researcher", "output": "x"})
+        postgrest.fail["POST"] = 503
+        await store.flush_now()
+        assert {entry["table"] for entry in journaled(store)} == {"research_sessions", "agent_outputs"}
+
+        postgrest.fail.clear()
+        await store.flush_now()
+
+    asyncio.run(run())
+
+    assert journaled(store) == []
+    paths = [request["path"] for request in postgrest.requests[-2:]]
+    assert paths == ["/rest/v1/research_sessions", "/rest/v1/agent_outputs"]
+
+
+def test_rejected_rows_are_dropped_instead_of_retried_forever(store, postgrest):
+    async def run():
+        await store.save_research_session({"session_id": "s1", "query": "solar"})
+        await store.flush_now()
+        await store.update_research_session("s1", {"status": "completed"})
+        postgrest.fail["PATCH"] = 400
+        await store.flush_now()
+        await store.flush_now()
+
+    asyncio.run(run())
+
+    assert journaled(store) == []
+    assert sum(request["method"] == "PATCH" for request in postgrest.requests) == 1
+
+
+def test_rows_journaled_by_a_previous_run_are_replayed_with_queued_updates(postgrest, tmp_path):
+    journal = tmp_path / "journal.jsonl"
+    client = SupabaseClient()
+    client._http = httpx.AsyncClient(base_url=client.rest_url, transport=httpx.MockTransport(postgrest))
+
+    # The first process cannot reach the backend and journals its queue at exit
+    postgrest.fail["POST"] = 503
+    first = WriteBehindStore(client, batch_size=1000, flush_interval=3600, journal_path=str(journal))
+    asyncio.run(first.save_research_session({"session_id": "s1", "query": "solar", "status": "in_progress"}))
+    asyncio.run(first.save_agent_output({"session_id": "s1", "agent_type": "researcher", "output": "x"}))
+    first.close()
+    assert len(journaled(first)) == 2
+
+    postgrest.fail.clear()
+    postgrest.requests.clear()
+    second = WriteBehindStore(client, batch_size=1000, flush_interval=3600, journal_path=str(journal))
+
+    async def run():
+        await second.update_research_session("s1", {"status": "completed"})
+        await second.flush_now()
+
+    asyncio.run(run())
+    second.close()
+
+    assert not journal.exists()
+    sessions, outputs = postgrest.requests
+    assert sessions["method"] == "POST"
+    [row] = sessions["json"]
+    assert (row["query"], row["status"]) == ("solar", "completed")
+    assert outputs["path"] == "/rest/v1/agent_outputs"
+
+
+class HangingClient:
+    """Backend whose writes never finish"""
+
+    async def upsert_research_sessions(self, rows):
+        await asyncio.sleep(3600)
+
+    patch_research_sessions = insert_agent_outputs = upsert_research_sessions
+
+
+def test_rows_of_a_flush_cut_off_at_close_are_journaled(tmp_path):
+    store = WriteBehindStore(HangingClient(), batch_size=1000, flush_interval=3600,
+                             journal_path=str(tmp_path / "journal.jsonl"))
+    asyncio.run(store.save_research_session({"session_id": "s1", "query": "solar"}))
+    asyncio.run(store.save_agent_output({"session_id": "s1", "agent_type": "researcher", "output": "x"}))
+
+    store.close(timeout=0.2)
+
+    assert [(entry["table"], entry["row"]["session_id"]) for entry in journaled(store)] == \
+        [("research_sessions", "s1"), ("agent_outputs", "s1")]
+
+
+def test_replays_left_by_a_crashed_process_are_picked_up(store, postgrest, tmp_path):
+    orphan = tmp_path / "journal.jsonl.4242-deadbeef.replaying"
+    orphan.write_text(json.dumps({"table": "research_sessions", "row": {"session_id": "s1", "query": "solar"}}) + "\n")
+    store._journal("agent_outputs", [{"session_id": "s1", "agent_type": "researcher", "output": "x"}])
+
+    asyncio.run(store.flush_now())
+
+    assert [request["path"] for request in postgrest.requests] == ["/rest/v1/research_sessions", "/rest/v1/agent_outputs"]
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["journal.jsonl.lock"]
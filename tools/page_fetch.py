@@ -0,0 +1,396 @@
+# tools/page_fetch.py
+"""Fetch search result pages concurrently and extract their main text.
+
+Pages are downloaded over one pooled keep-alive httpx client on the shared
+background loop, at most PAGE_FETCH_PER_HOST at a time per host, and fed
+to a streaming HTML parser that stops reading once it has enough text.
+Extracted documents are cached by URL; stale entries are revalidated with
+If-None-Match / If-Modified-Since so unchanged pages cost a 304. The cache
+(SQLite on disk) is read and written on the calling thread, before and
+after the downloads, never on the shared loop.
+
+Search results are untrusted input, so redirects are followed by hand and
+every hop's host must resolve to public addresses only: loopback, private,
+link-local (cloud metadata) and other non-global addresses are refused.
+"""
+import asyncio
+import ipaddress
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from html.parser import HTMLParser
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from config.settings import settings
+from utils.async_runner import get_background_loop
+from utils.cassette import fingerprint, get_cassette
+from utils.tracing import span
+
+# Content that is never part of a page's main text
+SKIP_TAGS = {"script", "style", "noscript", "svg", "template", "iframe", "nav", "header", "footer",
+             "aside", "form", "button", "select"}
+BLOCK_TAGS = {"p", "div", "li", "br", "tr", "td", "dd", "dt", "pre", "blockquote", "section", "article",
+              "main", "h1", "h2", "h3", "h4", "h5", "h6", "table", "ul", "ol"}
+MAIN_TAGS = {"main", "article"}
+# Lines shorter than this are mostly menus, buttons and bylines
+MIN_LINE_WORDS = 4
+MAX_REDIRECTS = 5
+
+
+class BlockedURL(ValueError):
+    """A URL whose host is not a public internet address"""
+
+
+def is_public_address(address: str) -> bool:
+    ip = ipaddress.ip_address(address.split("%", 1)[0])
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+class TextExtractor(HTMLParser):
+    """Incremental main-text extraction; feed() chunks and stop once `done`"""
+
+    def __init__(self, max_chars: int):
+        super().__init__(convert_charrefs=True)
+        self.max_chars = max_chars
+        self.title = ""
+        self.done = False
+        self._skip_depth = 0
+        self._main_depth = 0
+        self._in_title = False
+        self._lines: List[str] = []
+        self._main_lines: List[str] = []
+        self._line: List[str] = []
+        self._in_main_line = False
+        self._chars = 0
+        self._main_chars = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag == "title":
+            self._in_title = True
+        if tag in MAIN_TAGS:
+            self._main_depth += 1
+        if tag in BLOCK_TAGS:
+            self._end_line()
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS and self._skip_depth:
+            self._skip_depth -= 1
+        elif tag == "title":
+            self._in_title = False
+        if tag in BLOCK_TAGS:
+            self._end_line()
+        if tag in MAIN_TAGS and self._main_depth:
+            self._main_depth -= 1
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+            return
+        if self._skip_depth:
+            return
+        text = " ".join(data.split())
+        if text:
+            self._line.append(text)
+            self._in_main_line = self._in_main_line or self._main_depth > 0
+
+    def _end_line(self):
+        line = " ".join(self._line)
+        self._line = []
+        in_main, self._in_main_line = self._in_main_line, False
+        if len(line.split()) < MIN_LINE_WORDS:
+            return
+        self._lines.append(line)
+        self._chars += len(line) + 1
+        if in_main:
+            self._main_lines.append(line)
+            self._main_chars += len(line) + 1
+        # Enough text once <main>/<article> alone fills the budget, or the page does without one
+        if self._main_chars >= self.max_chars or (not self._main_lines and self._chars >= self.max_chars * 2):
+            self.done = True
+
+    def text(self) -> str:
+        self._end_line()
+        lines = self._main_lines if self._main_chars >= min(300, self.max_chars) else self._lines
+        return truncate_sentences("\n".join(lines), self.max_chars)
+
+
+def truncate_sentences(text: str, max_chars: int) -> str:
+    """Cut at the last sentence end before max_chars (hard cut when there is none)"""
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars]
+    end = max(cut.rfind(". "), cut.rfind(".\n"), cut.rfind("? "), cut.rfind("! "))
+    return (cut[:end + 1] if end > max_chars // 2 else cut.rstrip()) + " ..."
+
+
+class PageCache:
+    """Two-tier (memory LRU + SQLite) cache of extracted pages keyed by URL"""
+
+    def __init__(self, path: Optional[str] = None, ttl: Optional[int] = None, max_memory_entries: int = 256):
+        self.path = path if path is not None else settings.PAGE_CACHE_PATH
+        self.ttl = ttl if ttl is not None else settings.PAGE_CACHE_TTL
+        self.max_memory_entries = max_memory_entries
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        """Open the disk tier lazily; an empty path disables it"""
+        if self._conn is None and self.path:
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("CREATE TABLE IF NOT EXISTS page_cache (url TEXT PRIMARY KEY, page TEXT NOT NULL)")
+                conn.commit()
+                self._conn = conn
+            except sqlite3.Error as e:
+                print(f"Page cache disk tier unavailable: {e}")
+                self.path = ""
+        return self._conn
+
+    def _remember(self, page: Dict[str, Any]):
+        self._memory[page["url"]] = page
+        self._memory.move_to_end(page["url"])
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        """The cached page, fresh or stale (callers check is_fresh)"""
+        with self._lock:
+            page = self._memory.get(url)
+            if page is not None:
+                self._memory.move_to_end(url)
+                return page
+            conn = self._connect()
+            if conn is None:
+                return None
+            try:
+                row = conn.execute("SELECT page FROM page_cache WHERE url = ?", (url,)).fetchone()
+            except sqlite3.Error as e:
+                print(f"Error reading page cache: {e}")
+                return None
+            if row is None:
+                return None
+            page = json.loads(row[0])
+            self._remember(page)
+            return page
+
+    def is_fresh(self, page: Dict[str, Any]) -> bool:
+        return time.time() - page["fetched_at"] <= self.ttl
+
+    def set(self, page: Dict[str, Any]):
+        with self._lock:
+            self._remember(page)
+            conn = self._connect()
+            if conn is None:
+                return
+            try:
+                conn.execute("INSERT OR REPLACE INTO page_cache (url, page) VALUES (?, ?)",
+                             (page["url"], json.dumps(page)))
+                conn.commit()
+            except sqlite3.Error as e:
+                print(f"Error writing page cache: {e}")
+
+
+class PageFetcher:
+    """Concurrent, per-host limited page downloads with streaming extraction"""
+
+    def __init__(self, cache: Optional[PageCache] = None, max_connections: Optional[int] = None,
+                 per_host: Optional[int] = None, timeout: Optional[float] = None,
+                 max_bytes: Optional[int] = None, max_chars: Optional[int] = None,
+                 allow_private: bool = False):
+        self.cache = cache if cache is not None else PageCache()
+        self.max_connections = max_connections or settings.PAGE_FETCH_MAX_CONNECTIONS
+        self.per_host = per_host or settings.PAGE_FETCH_PER_HOST
+        self.timeout = timeout or settings.PAGE_FETCH_TIMEOUT
+        self.max_bytes = max_bytes or settings.PAGE_FETCH_MAX_BYTES
+        self.max_chars = max_chars or settings.PAGE_FETCH_MAX_CHARS
+        # Only for tests and intranet deployments: skips the public-address check
+        self.allow_private = allow_private
+        self._loop = get_background_loop()
+        self._http: Optional[httpx.AsyncClient] = None
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+
+    def _client(self) -> httpx.AsyncClient:
+        # Created lazily on the background loop, which owns its connections
+        if self._http is None:
+            self._http = httpx.AsyncClient(
+                headers={"User-Agent": "Mozilla/5.0 (compatible; research-team/1.0)",
+                         "Accept": "text/html,application/xhtml+xml,text/plain;q=0.9"},
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections),
+                timeout=httpx.Timeout(self.timeout, connect=min(self.timeout, 5.0)),
+                follow_redirects=False  # Followed in _open, which checks every hop
+            )
+        return self._http
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlsplit(url).netloc.lower()
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host)
+        return self._host_limits[host]
+
+    async def _check_host(self, url: str):
+        """Raise BlockedURL unless every address the URL's host resolves to is public"""
+        if self.allow_private:
+            return
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise BlockedURL(f"Not an http(s) URL: {url}")
+        try:
+            ipaddress.ip_address(parts.hostname.split("%", 1)[0])
+            addresses = [parts.hostname]
+        except ValueError:
+            port = parts.port or (443 if parts.scheme == "https" else 80)
+            infos = await asyncio.get_running_loop().getaddrinfo(parts.hostname, port)
+            addresses = [info[4][0] for info in infos]
+        blocked = [address for address in addresses if not is_public_address(address)]
+        if blocked or not addresses:
+            raise BlockedURL(f"{parts.hostname} does not resolve to public addresses only ({', '.join(blocked)})")
+
+    async def _open(self, url: str, headers: Dict[str, str]) -> httpx.Response:
+        """Send GET, following up to MAX_REDIRECTS redirects, each to a checked host"""
+        client = self._client()
+        request = client.build_request("GET", url, headers=headers)
+        for _ in range(MAX_REDIRECTS + 1):
+            await self._check_host(str(request.url))
+            response = await client.send(request, stream=True)
+            if not response.is_redirect or response.next_request is None:
+                return response
+            await response.aclose()
+            request = response.next_request
+        raise httpx.TooManyRedirects(f"More than {MAX_REDIRECTS} redirects", request=request)
+
+    async def _download(self, url: str, cached: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        headers = {}
+        if cached and cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached and cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+        async with self._host_limit(url):
+            response = await self._open(url, headers)
+            try:
+                if response.status_code == 304 and cached:
+                    return {**cached, "fetched_at": time.time(), "cache": "revalidated"}
+                content_type = response.headers.get("content-type", "")
+                if response.status_code != 200 or not content_type.startswith(("text/html", "application/xhtml", "text/plain")):
+                    return None
+                extractor = TextExtractor(self.max_chars)
+                received = 0
+                if content_type.startswith("text/plain"):
+                    text = ""
+                    async for chunk in response.aiter_text():
+                        text += chunk
+                        received += len(chunk)
+                        if received >= self.max_chars * 2 or received >= self.max_bytes:
+                            break
+                    text = truncate_sentences(" ".join(text.split()), self.max_chars)
+                else:
+                    # Stop reading as soon as the extractor has enough main text
+                    async for chunk in response.aiter_text():
+                        extractor.feed(chunk)
+                        received += len(chunk)
+                        if extractor.done or received >= self.max_bytes:
+                            break
+                    text = extractor.text()
+                return {
+                    "url": url,
+                    "final_url": str(response.url),
+                    "title": " ".join(extractor.title.split()),
+                    "text": text,
+                    "etag": response.headers.get("etag"),
+                    "last_modified": response.headers.get("last-modified"),
+                    "fetched_at": time.time(),
+                    "bytes_read": received,
+                    "cache": "miss"
+                }
+            finally:
+                await response.aclose()
+
+    async def _fetch_one(self, url: str, cached: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        if urlsplit(url).scheme not in ("http", "https"):
+            return None
+        try:
+            page = await self._download(url, cached)
+        except Exception as e:  # Invalid URL, network, decoding or parser error: lose this page only
+            print(f"Error fetching {url}: {type(e).__name__}: {e}")
+            page = None
+        if page is None:
+            return {**cached, "cache": "stale"} if cached else None
+        return page
+
+    async def _fetch_all(self, urls: List[str], cached: Dict[str, Dict[str, Any]]) -> List[Optional[Dict[str, Any]]]:
+        pages = await asyncio.gather(*(self._fetch_one(url, cached.get(url)) for url in urls), return_exceptions=True)
+        for url, page in zip(urls, pages):
+            if isinstance(page, Exception):
+                print(f"Error fetching {url}: {type(page).__name__}: {page}")
+        return [None if isinstance(page, Exception) else page for page in pages]
+
+    def _fetch_batch(self, urls: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """Serve fresh pages from the cache, download the rest on the loop, then cache them"""
+        cached = {url: page for url in dict.fromkeys(urls) if (page := self.cache.get(url)) is not None}
+        pages: List[Optional[Dict[str, Any]]] = [
+            {**cached[url], "cache": "hit"} if url in cached and self.cache.is_fresh(cached[url]) else None
+            for url in urls
+        ]
+        missing = [url for url, page in zip(urls, pages) if page is None]
+        if missing:
+            downloaded = iter(self._loop.run(self._fetch_all(missing, cached)))
+            pages = [page if page is not None else next(downloaded) for page in pages]
+        for page in pages:
+            if page is not None and page["cache"] in ("miss", "revalidated") and page["text"]:
+                self.cache.set({key: value for key, value in page.items() if key != "cache"})
+        return pages
+
+    def fetch(self, urls: List[str]) -> List[Optional[Dict[str, Any]]]:
+        """Fetch and extract `urls` concurrently; None for pages that could not be read"""
+        with span("page_fetch", kind="search", urls=len(urls)) as active:
+            cassette = get_cassette()
+            if cassette is None:
+                pages = self._fetch_batch(urls)
+            else:
+                key = fingerprint("pages", urls)
+                pages = cassette.play("pages", key, " ".join(urls), lambda: self._fetch_batch(urls))["response"]
+            active.set(
+                fetched=sum(page is not None for page in pages),
+                cache_hit=bool(pages) and all(page is not None and page["cache"] == "hit" for page in pages),
+                cached=sum(page is not None and page["cache"] in ("hit", "revalidated") for page in pages)
+            )
+            return pages
+
+    async def close(self):
+        """Close pooled connections"""
+        if self._http is not None:
+            http, self._http = self._http, None
+            await self._loop.run_async(http.aclose())
+
+
+_page_fetcher: Optional[PageFetcher] = None
+_page_fetcher_lock = threading.Lock()
+
+
+def get_page_fetcher() -> PageFetcher:
+    """Return the process-wide page fetcher shared by every WebSearchTool"""
+    global _page_fetcher
+    with _page_fetcher_lock:
+        if _page_fetcher is None:
+            _page_fetcher = PageFetcher()
+        return _page_fetcher
+
+
+def fetch_pages(urls: List[str]) -> List[Optional[Dict[str, Any]]]:
+    return get_page_fetcher().fetch(urls)
@@ -1,43 +1,73 @@
 # tools/research_tools.py
 from crewai.tools import BaseTool
 from pydantic import BaseModel, Field
-from typing import Type, List, Dict
-try:
-    from ddgs import DDGS  # Use the new package name
-except ImportError:
-    from duckduckgo_search import DDGS  # Fallback to old name
+from typing import Any, Dict, List, Type
+
+from config.settings import settings
+from tools.page_fetch import fetch_pages
+from tools.result_store import current_result_store
+from tools.web_search import search_web
 
 # Define input schema for search tool
 class SearchInput(BaseModel):
-    query: str = Field(..., description="Search query to look up")
-    max_results: int = Field(default=5, description="Maximum number of search results")
+    query: str = Field(..., description="Search query")
+    max_results: int = Field(default=3, description="Maximum number of results")
 
 class WebSearchTool(BaseTool):
+    """Web search for the research agents: skips results already returned in the run and inlines page text"""
     name: str = "web_search"
     description: str = "Search the web for current information and news"
     args_schema: Type[BaseModel] = SearchInput
 
-    def _run(self, query: str, max_results: int = 5) -> str:
-        """Perform web search and return formatted results"""
+    def _run(self, query: str, max_results: int = 3) -> str:
         try:
-            search_client = DDGS()
-            results = search_client.text(query, max_results=max_results)
+            results = search_web(query, max_results=max_results)
             
             if not results:
                 return f"No results found for query: {query}"
             
-            # Format results as string for the agent
-            result_text = f"Search results for '{query}':\n\n"
+            # Only pass on results earlier searches in this research run have not returned yet
+            skipped = 0
+            store = current_result_store()
+            if store is not None:
+                results, skipped = store.filter(results)
+                if not results:
+                    return (f"No new results for query: {query} (all {skipped} results were already "
+                            f"returned by earlier searches; try a different angle)")
+            
+            pages = self._fetch_pages(results)
+            
+            result_text = f"Search results for: {query}\n\n"
             for i, result in enumerate(results, 1):
-                result_text += f"--- Result {i} ---\n"
-                result_text += f"Title: {result.get('title', 'N/A')}\n"
-                result_text += f"URL: {result.get('href', 'N/A')}\n"
-                result_text += f"Snippet: {result.get('body', 'N/A')}\n\n"
+                result_text += f"[{i}] {result.get('title', 'N/A')}\n"
+                result_text += f"   URL: {result.get('href', 'N/A')}\n"
+                page = pages.get(result.get('href'))
+                if page:
+                    result_text += f"   Content: {page['text']}\n\n"
+                    continue
+                snippet = result.get('body', 'N/A')
+                if len(snippet) > 200:
+                    snippet = snippet[:200] + "..."
+                result_text += f"   Info: {snippet}\n\n"
+            if skipped:
+                result_text += f"({skipped} results already returned by earlier searches were omitted)\n"
             
             return result_text
             
         except Exception as e:
             return f"Search error: {str(e)}"
+    
+    def _fetch_pages(self, results: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Extracted text of the top results by URL (empty when page fetching is off or fails)"""
+        if not settings.PAGE_FETCH_ENABLED:
+            return {}
+        urls = [result["href"] for result in results[:settings.PAGE_FETCH_TOP_K] if result.get("href")]
+        try:
+            pages = fetch_pages(urls)
+        except Exception as e:
+            print(f"Error fetching result pages: {e}")
+            return {}
+        return {url: page for url, page in zip(urls, pages) if page and page.get("text")}
 
 class ResearchTools:
     def __init__(self):
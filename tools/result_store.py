@@ -0,0 +1,111 @@
+# tools/result_store.py
+"""Per-run memory of search results already shown to the agents.
+
+Overlapping searches in one research run tend to return the same pages
+under slightly different URLs and near-identical snippets. The store
+canonicalizes URLs and compares snippets by word shingles so later
+searches only pass new evidence into the prompt, and it counts the
+tokens that skipping the rest saved.
+"""
+import contextvars
+import re
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from config.settings import settings
+from utils.query_index import jaccard
+from utils.rate_limiter import estimate_tokens
+
+_current_store: contextvars.ContextVar = contextvars.ContextVar("search_result_store", default=None)
+
+TRACKING_PARAMS = {"gclid", "fbclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid", "ref", "ref_src", "_ga", "_hsenc", "_hsmi"}
+SHINGLE_SIZE = 3
+
+
+def canonicalize_url(url: str) -> str:
+    """Scheme-less, lowercase-host URL without www, default ports, fragments, tracking params or trailing slash"""
+    parts = urlsplit(url.strip())
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+    path = re.sub(r"/{2,}", "/", parts.path).rstrip("/")
+    if path.endswith(("/index.html", "/index.htm", "/index.php")):
+        path = path.rsplit("/", 1)[0]
+    params = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    )
+    query = f"?{urlencode(params)}" if params else ""
+    return f"{host}{path}{query}"
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> FrozenSet[str]:
+    """Word n-grams of the text, lowercased (the words themselves for very short texts)"""
+    words = re.findall(r"\w+", text.lower())
+    if len(words) < size:
+        return frozenset(words)
+    return frozenset(" ".join(words[i:i + size]) for i in range(len(words) - size + 1))
+
+
+def result_tokens(result: Dict[str, Any]) -> int:
+    """Prompt tokens a result takes in WebSearchTool's formatted output"""
+    return estimate_tokens(f"{result.get('title', '')} {result.get('href', '')} {(result.get('body') or '')[:200]}") + 8
+
+
+class SearchResultStore:
+    """Results seen so far in one research run; thread-safe, shared by fan-out workers"""
+
+    def __init__(self, threshold: Optional[float] = None):
+        self.threshold = settings.SEARCH_DEDUP_THRESHOLD if threshold is None else threshold
+        self._urls: set = set()
+        self._snippets: List[FrozenSet[str]] = []
+        self._lock = threading.Lock()
+        self.results_seen = 0
+        self.results_dropped = 0
+        self.tokens_saved = 0
+
+    def _is_duplicate_snippet(self, snippet: FrozenSet[str]) -> bool:
+        return bool(snippet) and any(jaccard(snippet, seen) >= self.threshold for seen in self._snippets)
+
+    def filter(self, results: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int]:
+        """Keep results with an unseen URL and a non-duplicate snippet; returns (new results, dropped count)"""
+        new = []
+        with self._lock:
+            for result in results:
+                self.results_seen += 1
+                url = canonicalize_url(result.get("href") or "")
+                snippet = shingles(f"{result.get('title', '')} {result.get('body') or ''}")
+                if (url and url in self._urls) or self._is_duplicate_snippet(snippet):
+                    self.results_dropped += 1
+                    self.tokens_saved += result_tokens(result)
+                    continue
+                if url:
+                    self._urls.add(url)
+                if snippet:
+                    self._snippets.append(snippet)
+                new.append(result)
+        return new, len(results) - len(new)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"results_seen": self.results_seen, "results_dropped": self.results_dropped,
+                    "tokens_saved": self.tokens_saved}
+
+
+@contextmanager
+def result_store_session(threshold: Optional[float] = None):
+    """Give searches in this context (and threads started from it) one shared result store"""
+    store = SearchResultStore(threshold) if settings.SEARCH_DEDUP_ENABLED else None
+    token = _current_store.set(store)
+    try:
+        yield store
+    finally:
+        _current_store.reset(token)
+
+
+def current_result_store() -> Optional[SearchResultStore]:
+    return _current_store.get()
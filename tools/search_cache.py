@@ -0,0 +1,143 @@
+# tools/search_cache.py
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.settings import settings
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a search query so trivially different spellings share a cache entry"""
+    return " ".join(query.lower().split())
+
+
+class SearchCache:
+    """Two-tier (memory LRU + SQLite) cache for raw web search results"""
+
+    def __init__(self, path: Optional[str] = None, ttl: Optional[int] = None,
+                 max_memory_entries: Optional[int] = None, max_disk_entries: Optional[int] = None):
+        self.path = path if path is not None else settings.SEARCH_CACHE_PATH
+        self.ttl = ttl if ttl is not None else settings.SEARCH_CACHE_TTL
+        self.max_memory_entries = max_memory_entries if max_memory_entries is not None else settings.SEARCH_CACHE_MAX_ENTRIES
+        self.max_disk_entries = max_disk_entries if max_disk_entries is not None else settings.SEARCH_CACHE_DISK_MAX_ENTRIES
+
+        self._memory: "OrderedDict[str, Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(query: str, max_results: int) -> str:
+        return f"{normalize_query(query)}|{max_results}"
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        """Open the disk tier lazily; an empty path disables it"""
+        if self._conn is None and self.path:
+            try:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS search_cache ("
+                    "key TEXT PRIMARY KEY, results TEXT NOT NULL, created_at REAL NOT NULL)"
+                )
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_search_cache_created ON search_cache(created_at)")
+                conn.commit()
+                self._conn = conn
+            except sqlite3.Error as e:
+                print(f"Search cache disk tier unavailable: {e}")
+                self.path = ""
+        return self._conn
+
+    def _remember(self, key: str, created_at: float, results: List[Dict[str, Any]]):
+        self._memory[key] = (created_at, results)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def get(self, query: str, max_results: int) -> Optional[List[Dict[str, Any]]]:
+        """Return cached results, or None when missing or older than the TTL"""
+        key = self.make_key(query, max_results)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if now - entry[0] <= self.ttl:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._memory[key]
+
+            conn = self._connect()
+            if conn is not None:
+                try:
+                    row = conn.execute(
+                        "SELECT results, created_at FROM search_cache WHERE key = ?", (key,)
+                    ).fetchone()
+                    if row and now - row[1] <= self.ttl:
+                        results = json.loads(row[0])
+                        self._remember(key, row[1], results)
+                        self.hits += 1
+                        return results
+                except sqlite3.Error as e:
+                    print(f"Error reading search cache: {e}")
+
+            self.misses += 1
+            return None
+
+    def set(self, query: str, max_results: int, results: List[Dict[str, Any]]):
+        """Store results in both tiers, evicting the oldest disk rows past the size limit"""
+        key = self.make_key(query, max_results)
+        now = time.time()
+        with self._lock:
+            self._remember(key, now, results)
+
+            conn = self._connect()
+            if conn is None:
+                return
+            try:
+                conn.execute(
+                    "INSERT OR REPLACE INTO search_cache (key, results, created_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(results), now)
+                )
+                conn.execute("DELETE FROM search_cache WHERE created_at < ?", (now - self.ttl,))
+                conn.execute(
+                    "DELETE FROM search_cache WHERE key IN ("
+                    "SELECT key FROM search_cache ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                    (self.max_disk_entries,)
+                )
+                conn.commit()
+            except sqlite3.Error as e:
+                print(f"Error writing search cache: {e}")
+
+    def clear(self):
+        """Drop every cached result from both tiers"""
+        with self._lock:
+            self._memory.clear()
+            conn = self._connect()
+            if conn is not None:
+                conn.execute("DELETE FROM search_cache")
+                conn.commit()
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "memory_entries": len(self._memory)}
+
+
+_search_cache: Optional[SearchCache] = None
+_search_cache_lock = threading.Lock()
+
+
+def get_search_cache() -> SearchCache:
+    """Return the process-wide search cache shared by every WebSearchTool"""
+    global _search_cache
+    with _search_cache_lock:
+        if _search_cache is None:
+            _search_cache = SearchCache()
+        return _search_cache
@@ -0,0 +1,59 @@
+# tools/web_search.py
+from typing import Any, Dict, List
+
+from config.settings import settings
+from tools.search_cache import get_search_cache, normalize_query
+from utils.cassette import fingerprint, get_cassette
+from utils.rate_limiter import get_rate_limiter, is_rate_limit_error
+from utils.tracing import span
+
+
+def _ddgs_search(query: str, max_results: int) -> List[Dict[str, Any]]:
+    try:
+        from ddgs import DDGS  # Use the new package name
+    except ImportError:
+        from duckduckgo_search import DDGS  # Fallback to old name
+
+    limiter = get_rate_limiter("ddgs")
+    limiter.acquire()
+    try:
+        search_client = DDGS()
+        results = list(search_client.text(query, max_results=max_results) or [])
+    except Exception as e:
+        if is_rate_limit_error(e):
+            limiter.backoff()
+        raise
+    limiter.record_usage(1)
+    return results
+
+
+def _fetch(query: str, max_results: int) -> List[Dict[str, Any]]:
+    """DDGS search, recorded to or replayed from the active cassette"""
+    cassette = get_cassette()
+    if cassette is None:
+        return _ddgs_search(query, max_results)
+    key = fingerprint(normalize_query(query), max_results)
+    return cassette.play("search", key, query, lambda: _ddgs_search(query, max_results))["response"]
+
+
+def search_web(query: str, max_results: int = 5) -> List[Dict[str, Any]]:
+    """Run a DuckDuckGo text search, serving repeated queries from the search cache"""
+    with span("web_search", kind="search", query=query, max_results=max_results) as active:
+        if not settings.SEARCH_CACHE_ENABLED:
+            results = _fetch(query, max_results)
+            active.set(cache_hit=False, results=len(results))
+            return results
+
+        cache = get_search_cache()
+        results = cache.get(query, max_results)
+        active.set(cache_hit=results is not None)
+        if results is not None:
+            active.set(results=len(results))
+            return results
+
+        results = _fetch(query, max_results)
+        active.set(results=len(results))
+        # Empty result sets are usually transient (rate limiting), so don't pin them
+        if results:
+            cache.set(query, max_results, results)
+        return results
@@ -0,0 +1,52 @@
+# utils/async_runner.py
+import asyncio
+import threading
+from typing import Any, Awaitable, Optional
+
+
+class BackgroundLoop:
+    """A long-lived event loop on a daemon thread.
+
+    Streamlit reruns and worker threads each create short-lived loops via
+    asyncio.run; resources bound to a loop (HTTP connection pools) live here
+    instead so they survive across those loops and are shared by them.
+    """
+
+    def __init__(self, name: str = "background-loop"):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def in_loop(self) -> bool:
+        return threading.current_thread() is self._thread
+
+    def run(self, coro: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+        """Run a coroutine on the loop and block the calling thread for its result"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result(timeout)
+
+    async def run_async(self, coro: Awaitable[Any]) -> Any:
+        """Await a coroutine on the loop from any other event loop without blocking it"""
+        if self.in_loop():
+            return await coro
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self.loop))
+
+
+_background_loop: Optional[BackgroundLoop] = None
+_background_loop_lock = threading.Lock()
+
+
+def get_background_loop() -> BackgroundLoop:
+    global _background_loop
+    with _background_loop_lock:
+        if _background_loop is None:
+            _background_loop = BackgroundLoop()
+        return _background_loop
+
+
+def run_async(coro: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+    """Synchronously run a coroutine on the shared background loop"""
+    return get_background_loop().run(coro, timeout)
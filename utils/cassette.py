@@ -0,0 +1,225 @@
+# utils/cassette.py
+"""Record Gemini and web search traffic to a cassette and replay it offline.
+
+    CASSETTE_MODE=record streamlit run app.py    # capture a real session
+    CASSETTE_MODE=replay CASSETTE_SPEED=1 python batch_research.py queries.jsonl
+    python -m utils.cassette .cache/cassette.jsonl.gz   # summarize a cassette
+
+A cassette is gzip-compressed JSON lines, one entry per LLM call or search.
+Replay serves entries by request fingerprint, falling back to recorded
+order when a prompt differs (e.g. it embeds a fresh session id), and
+sleeps for the recorded duration divided by CASSETTE_SPEED (0 = instant).
+"""
+import atexit
+import gzip
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+from config.settings import settings
+from utils.llm_middleware import USAGE_KEYS, call_usage, track_call_usage, wrap_llm_call
+
+
+class CassetteMiss(LookupError):
+    """Replay found no recorded interaction to serve"""
+
+
+def fingerprint(*parts: Any) -> str:
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+class Cassette:
+    """Recorded LLM and search interactions, either being captured or replayed"""
+
+    def __init__(self, path: str, mode: str, speed: float = 0.0, flush_every: int = 20,
+                 recycle: bool = False):
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown cassette mode {mode!r} (expected 'record' or 'replay')")
+        self.path = path
+        self.mode = mode
+        self.speed = speed
+        self.flush_every = flush_every
+        # Replay: start over once every entry of a kind has been served
+        self.recycle = recycle
+        self._lock = threading.Lock()
+        self._pending: List[Dict[str, Any]] = []
+        self.served = {"matched": 0, "in_order": 0}
+
+        if mode == "replay":
+            self._entries = list(load_entries(path))
+            self._rewind()
+        else:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            atexit.register(self.flush)
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == "replay"
+
+    # Recording
+
+    def _record(self, kind: str, key: str, preview: str, response: Any, elapsed: float,
+                usage: Optional[Dict[str, int]] = None):
+        entry = {"kind": kind, "key": key, "preview": preview[:200], "response": response,
+                 "elapsed": round(elapsed, 4)}
+        if usage:
+            entry["usage"] = usage
+        with self._lock:
+            self._pending.append(entry)
+            if len(self._pending) >= self.flush_every:
+                self._write(self._pending)
+                self._pending = []
+
+    def _write(self, entries: List[Dict[str, Any]]):
+        # Each flush appends one gzip member; gzip readers concatenate them
+        with gzip.open(self.path, "at", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry, default=str) + "\n")
+
+    def flush(self):
+        """Write buffered recordings to disk"""
+        with self._lock:
+            if self._pending:
+                self._write(self._pending)
+                self._pending = []
+
+    # Replay
+
+    def _rewind(self):
+        self._by_key: Dict[str, deque] = {}
+        self._in_order: Dict[str, deque] = {}
+        for index, entry in enumerate(self._entries):
+            self._by_key.setdefault(entry["key"], deque()).append(index)
+            self._in_order.setdefault(entry["kind"], deque()).append(index)
+        self._used = set()
+
+    def _take(self, kind: str, key: str) -> Dict[str, Any]:
+        with self._lock:
+            if self.recycle and all(index in self._used for index in self._in_order.get(kind, ())):
+                self._rewind()
+            indices = self._by_key.get(key)
+            while indices and indices[0] in self._used:
+                indices.popleft()
+            if indices:
+                index = indices.popleft()
+                self.served["matched"] += 1
+            else:
+                in_order = self._in_order.get(kind, deque())
+                while in_order and in_order[0] in self._used:
+                    in_order.popleft()
+                if not in_order:
+                    raise CassetteMiss(f"No recorded {kind} interaction left in {self.path}")
+                index = in_order.popleft()
+                self.served["in_order"] += 1
+            self._used.add(index)
+            entry = self._entries[index]
+        if self.speed > 0:
+            time.sleep(entry["elapsed"] / self.speed)
+        return entry
+
+    # Interactions
+
+    def play(self, kind: str, key: str, preview: str, perform: Callable[[], Any],
+             usage_of: Optional[Callable[[], Optional[Dict[str, int]]]] = None) -> Dict[str, Any]:
+        """Record `perform()` or replay its recorded entry; returns the entry"""
+        if self.replaying:
+            return self._take(kind, key)
+        before = usage_of() if usage_of else None
+        started = time.perf_counter()
+        response = perform()
+        elapsed = time.perf_counter() - started
+        usage = None
+        after = usage_of() if usage_of else None
+        if before is not None and after is not None:
+            usage = {name: max(0, after[name] - before[name]) for name in after}
+        self._record(kind, key, preview, response, elapsed, usage)
+        return {"response": response, "usage": usage}
+
+
+def load_entries(path: str):
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue  # Truncated last line from a killed recording
+
+
+_cassette: Optional[Cassette] = None
+_cassette_loaded = False
+_cassette_lock = threading.Lock()
+
+
+def get_cassette() -> Optional[Cassette]:
+    """Return the process-wide cassette configured by CASSETTE_MODE, or None when off"""
+    global _cassette, _cassette_loaded
+    with _cassette_lock:
+        if not _cassette_loaded:
+            mode = settings.CASSETTE_MODE.lower()
+            if mode not in ("", "off"):
+                _cassette = Cassette(settings.CASSETTE_PATH, mode, settings.CASSETTE_SPEED)
+            _cassette_loaded = True
+        return _cassette
+
+
+def set_cassette(cassette: Optional[Cassette]):
+    """Install a cassette for this process (overrides CASSETTE_MODE)"""
+    global _cassette, _cassette_loaded
+    with _cassette_lock:
+        _cassette = cassette
+        _cassette_loaded = True
+
+
+def replaying() -> bool:
+    cassette = get_cassette()
+    return cassette is not None and cassette.replaying
+
+
+def with_cassette(llm, cassette: Optional[Cassette] = None):
+    """Record or replay every call on this LLM (no-op without a cassette).
+
+    Install it innermost so recordings hold real API responses. Replayed
+    calls also replay token usage, so tracing and quota accounting see the
+    recorded numbers.
+    """
+    cassette = cassette if cassette is not None else get_cassette()
+    if cassette is None:
+        return llm
+    track_call_usage(llm)
+
+    def cassette_call(call_next, messages, **kwargs):
+        tools = [getattr(tool, "name", None) or str(tool) for tool in (kwargs.get("tools") or [])]
+        key = fingerprint(llm.model, messages, tools)
+        preview = messages if isinstance(messages, str) else str((messages or [{}])[-1].get("content", ""))
+        with call_usage() as usage:
+            entry = cassette.play("llm", key, preview, lambda: call_next(messages, **kwargs),
+                                  lambda: {name: usage[name] for name in USAGE_KEYS})
+        if cassette.replaying and entry.get("usage"):
+            llm._track_token_usage_internal(entry["usage"])
+        return entry["response"]
+
+    return wrap_llm_call(llm, cassette_call)
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else settings.CASSETTE_PATH
+    totals: Dict[str, Dict[str, float]] = {}
+    for entry in load_entries(path):
+        kind = totals.setdefault(entry["kind"], {"count": 0, "seconds": 0.0, "tokens": 0})
+        kind["count"] += 1
+        kind["seconds"] += entry["elapsed"]
+        kind["tokens"] += (entry.get("usage") or {}).get("total_tokens", 0)
+    for name, kind in sorted(totals.items()):
+        print(f"{name:<8} {kind['count']:>6} calls {kind['seconds']:>9.2f} s recorded {kind['tokens']:>9} tokens")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,133 @@
+# utils/compaction.py
+import re
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from utils.rate_limiter import estimate_tokens
+
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+(?=[\"'(\[*]?[A-Z0-9])")
+_HEADING = re.compile(r"^\s*(#{1,6}\s|\*\*[^*]+\*\*:?\s*$|[A-Z][^.!?]{0,60}:\s*$)")
+_LIST_MARKER = re.compile(r"^\s*(?:\d+[.)]|[-*•])\s+")
+_TERM = re.compile(r"[a-z0-9]{3,}")
+_GAP = "[...]"
+
+
+def split_units(text: str) -> List[Tuple[int, str, bool]]:
+    """Split text into (line number, sentence, is_heading) units, keeping line structure"""
+    units = []
+    for line_no, line in enumerate(text.splitlines()):
+        if not line.strip():
+            continue
+        if _HEADING.match(line):
+            units.append((line_no, line.rstrip(), True))
+            continue
+        # Keep "1." / "-" markers on the first sentence rather than splitting after them
+        marker = _LIST_MARKER.match(line)
+        prefix = marker.group(0).strip() + " " if marker else ""
+        body = line[marker.end():] if marker else line
+        for sentence in _SENTENCE_BOUNDARY.split(body.strip()):
+            if sentence:
+                units.append((line_no, prefix + sentence, False))
+                prefix = ""
+    return units
+
+
+def rank_sentences(sentences: List[str], damping: float = 0.85, iterations: int = 30) -> np.ndarray:
+    """TextRank scores over TF-IDF cosine similarity between sentences"""
+    vocabulary: Dict[str, int] = {}
+    rows, cols = [], []
+    for row, sentence in enumerate(sentences):
+        for term in _TERM.findall(sentence.lower()):
+            rows.append(row)
+            cols.append(vocabulary.setdefault(term, len(vocabulary)))
+
+    n = len(sentences)
+    if n == 0:
+        return np.zeros(0)
+    counts = np.zeros((n, max(1, len(vocabulary))))
+    np.add.at(counts, (rows, cols), 1.0)
+
+    document_frequency = np.count_nonzero(counts, axis=0)
+    idf = np.log((1 + n) / (1 + document_frequency)) + 1.0
+    weights = np.log1p(counts) * idf
+    norms = np.linalg.norm(weights, axis=1, keepdims=True)
+    weights = np.divide(weights, norms, out=np.zeros_like(weights), where=norms > 0)
+
+    similarity = weights @ weights.T
+    np.fill_diagonal(similarity, 0.0)
+    out_degree = similarity.sum(axis=1, keepdims=True)
+    transition = np.divide(similarity, out_degree, out=np.full_like(similarity, 1.0 / n), where=out_degree > 0)
+
+    scores = np.full(n, 1.0 / n)
+    for _ in range(iterations):
+        scores = (1 - damping) / n + damping * (transition.T @ scores)
+    return scores
+
+
+def compact_text(text: str, max_tokens: int) -> Tuple[str, int, int]:
+    """Keep the highest-ranked sentences of `text` within `max_tokens`.
+
+    Sentences are scored with TextRank and picked greedily until the budget
+    is spent, then emitted in their original order with "[...]" marking
+    omissions, so content from anywhere in the text (not just its start)
+    survives. Headings are kept alongside any sentence selected under them.
+    Returns (compacted text, tokens before, tokens after).
+    """
+    tokens_before = estimate_tokens(text)
+    if tokens_before <= max_tokens:
+        return text, tokens_before, tokens_before
+
+    units = split_units(text)
+    heading_of: List[Optional[int]] = []
+    current = None
+    for index, (_, _, is_heading) in enumerate(units):
+        if is_heading:
+            current = index
+        heading_of.append(current)
+
+    sentence_indices = [index for index, unit in enumerate(units) if not unit[2]]
+    scores = rank_sentences([units[index][1] for index in sentence_indices])
+    # Favour both ends: reports open with a summary and close with conclusions
+    position = np.arange(len(scores))
+    scores = scores * (1.0 + 1.0 / (1.0 + np.minimum(position, len(scores) - 1 - position)))
+
+    def cost_of(unit_index: int) -> int:
+        # Unit text plus its separator and a possible "[...]" marker
+        return (len(units[unit_index][1]) + len(_GAP) + 2) // 4 + 1
+
+    selected = set()
+    budget = max_tokens
+    for ranked in np.argsort(-scores, kind="stable"):
+        index = sentence_indices[ranked]
+        cost = cost_of(index)
+        heading = heading_of[index]
+        if heading is not None and heading not in selected:
+            cost += cost_of(heading)
+        if cost > budget:
+            continue
+        selected.add(index)
+        if heading is not None:
+            selected.add(heading)
+        budget -= cost
+
+    lines: List[str] = []
+    previous_line, previous_index = None, -1
+    for index in sorted(selected):
+        line_no, sentence, _ = units[index]
+        if index != previous_index + 1:
+            lines.append(_GAP)
+            previous_line = None
+        if line_no == previous_line:
+            lines[-1] += " " + sentence
+        else:
+            lines.append(sentence)
+        previous_line, previous_index = line_no, index
+    if previous_index != len(units) - 1:
+        lines.append(_GAP)
+    if not selected:
+        # Nothing fits (e.g. one enormous sentence): fall back to a hard cut
+        lines = [text[:max(0, max_tokens * 4 - 8)], _GAP]
+
+    compacted = "\n".join(lines)
+    return compacted, tokens_before, estimate_tokens(compacted)
@@ -1,28 +1,100 @@
 # utils/gemini_helpers.py
+import asyncio
 import google.generativeai as genai
+from concurrent.futures import ThreadPoolExecutor
 from config.settings import settings
-from typing import List, Dict
+from utils.llm_cache import get_llm_cache
+from utils.rate_limiter import estimate_tokens, get_gemini_limiter, is_rate_limit_error
+from utils.tracing import span
+from typing import List, Dict, Optional
 
 class GeminiHelpers:
     def __init__(self):
         genai.configure(api_key=settings.GOOGLE_API_KEY)
-        self.model = genai.GenerativeModel('gemini-pro')
-    
+        self.model_name = 'gemini-pro'
+        self.model = genai.GenerativeModel(self.model_name)
+        self.cache = get_llm_cache()
+        self.limiter = get_gemini_limiter()
+
+    def _cached(self, prompt: str):
+        """Return (cache key, cached response) for a prompt"""
+        if self.cache is None:
+            return None, None
+        key = self.cache.make_key(self.model_name, None, prompt)
+        return key, self.cache.get(key)
+
+    def _remember(self, key: Optional[str], text: str):
+        if key is not None and text:
+            self.cache.set(key, text)
+
+    @staticmethod
+    def _record_usage(active, response) -> Optional[int]:
+        """Put the response's token counts on the span; returns its total (None when not reported)"""
+        usage = getattr(response, "usage_metadata", None)
+        if usage is None:
+            return None
+        active.set(prompt_tokens=getattr(usage, "prompt_token_count", 0) or 0,
+                   completion_tokens=getattr(usage, "candidates_token_count", 0) or 0)
+        return getattr(usage, "total_token_count", None) or None
+
     def generate_content(self, prompt: str) -> str:
         """Generate content using Gemini"""
-        try:
-            response = self.model.generate_content(prompt)
-            return response.text
-        except Exception as e:
-            return f"Error generating content: {str(e)}"
-    
-    def batch_process(self, prompts: List[str]) -> List[str]:
-        """Process multiple prompts in sequence"""
-        results = []
-        for prompt in prompts:
-            results.append(self.generate_content(prompt))
-        return results
-    
+        with span("gemini_helpers", kind="llm", model=self.model_name) as active:
+            key, cached = self._cached(prompt)
+            active.set(cache_hit=cached is not None)
+            if cached is not None:
+                return cached
+            try:
+                estimated = estimate_tokens(prompt)
+                self.limiter.acquire(estimated)
+                response = self.model.generate_content(prompt)
+                self.limiter.record_usage(estimated, self._record_usage(active, response))
+                self._remember(key, response.text)
+                return response.text
+            except Exception as e:
+                if is_rate_limit_error(e):
+                    self.limiter.backoff()
+                active.error = f"{type(e).__name__}: {e}"
+                return f"Error generating content: {str(e)}"
+
+    async def agenerate_content(self, prompt: str) -> str:
+        """Generate content using Gemini without blocking the event loop"""
+        with span("gemini_helpers", kind="llm", model=self.model_name) as active:
+            key, cached = self._cached(prompt)
+            active.set(cache_hit=cached is not None)
+            if cached is not None:
+                return cached
+            try:
+                estimated = estimate_tokens(prompt)
+                await self.limiter.acquire_async(estimated)
+                response = await self.model.generate_content_async(prompt)
+                self.limiter.record_usage(estimated, self._record_usage(active, response))
+                self._remember(key, response.text)
+                return response.text
+            except Exception as e:
+                if is_rate_limit_error(e):
+                    self.limiter.backoff()
+                active.error = f"{type(e).__name__}: {e}"
+                return f"Error generating content: {str(e)}"
+
+    def batch_process(self, prompts: List[str], max_workers: Optional[int] = None) -> List[str]:
+        """Process multiple prompts concurrently on a thread pool, preserving input order"""
+        if not prompts:
+            return []
+        max_workers = max_workers or settings.GEMINI_BATCH_CONCURRENCY
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(prompts))) as executor:
+            return list(executor.map(self.generate_content, prompts))
+
+    async def abatch_process(self, prompts: List[str], max_concurrency: Optional[int] = None) -> List[str]:
+        """Process multiple prompts concurrently on the event loop, preserving input order"""
+        semaphore = asyncio.Semaphore(max_concurrency or settings.GEMINI_BATCH_CONCURRENCY)
+
+        async def run(prompt: str) -> str:
+            async with semaphore:
+                return await self.agenerate_content(prompt)
+
+        return list(await asyncio.gather(*(run(prompt) for prompt in prompts)))
+
     def structured_analysis(self, content: str, analysis_type: str) -> Dict:
         """Perform structured analysis on content"""
         prompts = {
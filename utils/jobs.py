@@ -0,0 +1,156 @@
+# utils/jobs.py
+"""In-process background jobs for research flows.
+
+The Streamlit script submits a flow and gets a job id back immediately;
+the flow runs on a bounded worker pool that outlives script reruns and
+browser reconnects, and the UI polls the job for status and progress.
+"""
+import asyncio
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from config.settings import settings
+
+# run(notify, on_token) -> coroutine returning the result dict
+JobFunction = Callable[[Callable[[str, str], None], Callable[[str, str], None]], Awaitable[Dict[str, Any]]]
+
+FINISHED = ("completed", "failed", "cancelled")
+
+
+class Job:
+    """One submitted flow and everything the UI shows about it while it runs"""
+
+    def __init__(self, kind: str, label: str, job_id: Optional[str] = None):
+        self.id = job_id or uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.label = label
+        self.status = "queued"
+        self.phase: Optional[str] = None
+        self.messages: List[Dict[str, str]] = []
+        self.tokens: Dict[str, str] = {}  # Latest streamed text per phase
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.future: Optional[Future] = None
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED
+
+    def notify(self, level: str, message: str):
+        with self._lock:
+            self.messages.append({"level": level, "message": message})
+
+    def on_token(self, phase: str, text: str):
+        with self._lock:
+            self.phase = phase
+            self.tokens[phase] = text
+
+    def snapshot(self) -> Dict[str, Any]:
+        """A consistent copy of the job's state for rendering"""
+        with self._lock:
+            now = self.finished_at or time.time()
+            return {
+                "id": self.id,
+                "kind": self.kind,
+                "label": self.label,
+                "status": self.status,
+                "phase": self.phase,
+                "messages": list(self.messages),
+                "tokens": dict(self.tokens),
+                "result": self.result,
+                "error": self.error,
+                "created_at": self.created_at,
+                "elapsed_seconds": round(now - (self.started_at or now), 1),
+            }
+
+
+class JobManager:
+    """Runs jobs on a bounded thread pool, each flow on its own event loop.
+
+    Finished jobs are kept (oldest dropped first) so a reconnecting browser
+    can still collect its result.
+    """
+
+    def __init__(self, workers: Optional[int] = None, history_size: Optional[int] = None):
+        self.workers = workers or settings.JOB_WORKERS
+        self.history_size = history_size or settings.JOB_HISTORY_SIZE
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="research-job")
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, label: str, run: JobFunction, job_id: Optional[str] = None) -> str:
+        """Queue `run(notify, on_token)` and return the job id"""
+        job = Job(kind, label, job_id)
+        with self._lock:
+            self._jobs.pop(job.id, None)  # A resubmitted id (e.g. a resumed session) moves to the end
+            self._jobs[job.id] = job
+            self._prune()
+        job.future = self._executor.submit(self._execute, job, run)
+        return job.id
+
+    def _execute(self, job: Job, run: JobFunction):
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            result = asyncio.run(run(job.notify, job.on_token))
+            job.result = result
+            job.status = "completed" if result.get("status") == "completed" else "failed"
+        except Exception as e:
+            job.error = str(e)
+            job.status = "failed"
+            job.notify("error", f"Job failed: {e}")
+        finally:
+            job.finished_at = time.time()
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(self._jobs) - self.history_size)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def status(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self.get(job_id)
+        return job.snapshot() if job else None
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a job that has not started yet; running flows cannot be interrupted"""
+        job = self.get(job_id)
+        if job is None or job.future is None or not job.future.cancel():
+            return False
+        job.status = "cancelled"
+        job.finished_at = time.time()
+        return True
+
+    def jobs(self, active_only: bool = False) -> List[Dict[str, Any]]:
+        """Snapshots of known jobs, newest first"""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [job.snapshot() for job in reversed(jobs) if not (active_only and job.finished)]
+
+    def queue_depth(self) -> int:
+        with self._lock:
+            return sum(job.status == "queued" for job in self._jobs.values())
+
+
+_job_manager: Optional[JobManager] = None
+_job_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> JobManager:
+    """Return the process-wide job manager"""
+    global _job_manager
+    with _job_manager_lock:
+        if _job_manager is None:
+            _job_manager = JobManager()
+        return _job_manager
@@ -0,0 +1,190 @@
+# utils/llm_cache.py
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from config.settings import settings
+from utils.llm_middleware import agent_role, wrap_llm_call
+from utils.tracing import annotate
+
+
+class MemoryCacheBackend:
+    """In-process LRU store for LLM responses"""
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: str):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class DiskCacheBackend:
+    """SQLite store for LLM responses that survives restarts"""
+
+    def __init__(self, path: str, ttl: int = 0):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=5)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            "key TEXT PRIMARY KEY, response TEXT NOT NULL, created_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT response, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if not row:
+            return None
+        if self.ttl and time.time() - row[1] > self.ttl:
+            return None
+        return row[0]
+
+    def set(self, key: str, value: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, response, created_at) VALUES (?, ?, ?)",
+                (key, value, time.time())
+            )
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+
+class LLMCache:
+    """Exact-match response cache keyed on model, generation settings, messages and tools"""
+
+    def __init__(self, backend=None):
+        self.backend = backend if backend is not None else MemoryCacheBackend()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(model: str, temperature: Optional[float], messages: Any, tools: Any = None, **extra) -> str:
+        payload = {
+            "model": model,
+            "temperature": temperature,
+            "messages": messages,
+            "tools": tools,
+            "extra": extra
+        }
+        encoded = json.dumps(payload, sort_keys=True, default=str)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            print(f"Error reading LLM cache: {e}")
+            value = None
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def set(self, key: str, value: str):
+        try:
+            self.backend.set(key, value)
+        except Exception as e:
+            print(f"Error writing LLM cache: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+
+_llm_cache: Optional[LLMCache] = None
+_llm_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMCache]:
+    """Return the process-wide LLM cache, or None when caching is disabled"""
+    global _llm_cache
+    backend_name = settings.LLM_CACHE_BACKEND.lower()
+    if backend_name == "none":
+        return None
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            if backend_name == "disk":
+                backend = DiskCacheBackend(settings.LLM_CACHE_PATH, ttl=settings.LLM_CACHE_TTL)
+            else:
+                backend = MemoryCacheBackend(settings.LLM_CACHE_MAX_ENTRIES)
+            _llm_cache = LLMCache(backend)
+        return _llm_cache
+
+
+def with_response_cache(llm, cache: Optional[LLMCache] = None):
+    """Serve repeated identical calls on this LLM from the response cache.
+
+    Agents whose role is listed in Settings.LLM_CACHE_OPT_OUT always hit the
+    API. Only plain-text answers are cached; tool-call results pass through.
+    """
+    cache = cache if cache is not None else get_llm_cache()
+    if cache is None:
+        return llm
+    opt_out = {role.lower() for role in settings.LLM_CACHE_OPT_OUT}
+
+    def cached_call(call_next, messages, **kwargs):
+        if agent_role(kwargs).lower() in opt_out:
+            return call_next(messages, **kwargs)
+
+        response_model = kwargs.get("response_model")
+        key = cache.make_key(
+            llm.model,
+            llm.temperature,
+            messages,
+            kwargs.get("tools"),
+            stop=llm.stop,
+            # Gemini keeps the output budget in max_output_tokens (max_tokens stays None)
+            max_tokens=getattr(llm, "max_output_tokens", None) or getattr(llm, "max_tokens", None),
+            response_model=getattr(response_model, "__name__", None)
+        )
+        cached = cache.get(key)
+        annotate(cache_hit=cached is not None)
+        if cached is not None:
+            return cached
+
+        response = call_next(messages, **kwargs)
+        if isinstance(response, str) and response:
+            cache.set(key, response)
+        return response
+
+    return wrap_llm_call(llm, cached_call)
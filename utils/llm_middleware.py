@@ -0,0 +1,86 @@
+# utils/llm_middleware.py
+import contextvars
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator
+
+# A middleware receives the next callable in the chain plus the arguments
+# CrewAI passed to LLM.call, and returns the (possibly short-circuited) answer.
+LLMMiddleware = Callable[..., Any]
+
+
+def wrap_llm_call(llm, middleware: LLMMiddleware):
+    """Install middleware around llm.call on this instance only.
+
+    CrewAI LLMs are pydantic models and agents accept them only as BaseLLM
+    instances, so instead of wrapping the object we shadow its bound `call`
+    method. Middlewares stack: the last one installed runs first.
+    """
+    call_next = llm.call
+
+    def call(messages, tools=None, callbacks=None, available_functions=None, **kwargs):
+        return middleware(
+            call_next,
+            messages,
+            tools=tools,
+            callbacks=callbacks,
+            available_functions=available_functions,
+            **kwargs
+        )
+
+    object.__setattr__(llm, "call", call)
+    return llm
+
+
+def agent_role(kwargs) -> str:
+    """Role of the agent that issued an LLM call, or '' for direct calls"""
+    agent = kwargs.get("from_agent")
+    return getattr(agent, "role", "") or ""
+
+
+_usage_sinks: contextvars.ContextVar = contextvars.ContextVar("llm_call_usage", default=())
+USAGE_KEYS = ("prompt_tokens", "completion_tokens", "total_tokens")
+
+
+def track_call_usage(llm):
+    """Report this LLM's token usage to the call_usage() blocks open where it is recorded.
+
+    CrewAI only keeps lifetime totals per LLM instance, and the difference
+    of those totals around a call also counts the calls other threads make
+    on the same instance meanwhile. Safe to install more than once.
+    """
+    track = llm._track_token_usage_internal
+    if getattr(track, "reports_call_usage", False):
+        return llm
+
+    def tracked(usage_data):
+        track(usage_data)
+        sinks = _usage_sinks.get()
+        if not sinks:
+            return
+        from crewai.types.usage_metrics import UsageMetrics
+        metrics = UsageMetrics.from_provider_dict(usage_data)
+        if metrics is None:
+            return
+        for usage in sinks:
+            for key in USAGE_KEYS:
+                usage[key] += getattr(metrics, key)
+            usage["reports"] += 1
+
+    tracked.reports_call_usage = True
+    object.__setattr__(llm, "_track_token_usage_internal", tracked)
+    return llm
+
+
+@contextmanager
+def call_usage() -> Iterator[Dict[str, int]]:
+    """Token usage recorded by LLMs with track_call_usage inside the block, in this context only.
+
+    "reports" counts the usage records; 0 means the provider reported none.
+    """
+    usage = dict.fromkeys(USAGE_KEYS, 0)
+    usage["reports"] = 0
+    token = _usage_sinks.set(_usage_sinks.get() + (usage,))
+    try:
+        yield usage
+    finally:
+        _usage_sinks.reset(token)
@@ -0,0 +1,189 @@
+# utils/model_router.py
+"""Per-role model selection with latency- and error-aware fallback.
+
+Each agent role gets a model profile (model, temperature, max output
+tokens) from settings. Every call records its latency and outcome in a
+per-model window of the last MODEL_HEALTH_WINDOW seconds; while a model's
+p95 latency or error rate is over its threshold, calls go to the role's
+fallback model instead, with an occasional probe of the primary. Old
+samples age out of the window, so a recovered model is picked up again
+within a window. A call that fails on the primary is retried on the
+fallback unless it already streamed tokens.
+"""
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from config.settings import settings
+from utils.llm_middleware import wrap_llm_call
+from utils.streaming import current_stream
+
+
+class ModelProfile:
+    """Generation settings for one agent role"""
+
+    def __init__(self, model: str, temperature: float, max_tokens: Optional[int], fallback: Optional[str]):
+        self.model = model
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.fallback = fallback if fallback != model else None
+
+    def key(self) -> tuple:
+        return (self.model, self.temperature, self.max_tokens)
+
+    def __repr__(self) -> str:
+        return f"ModelProfile({self.model!r}, temperature={self.temperature}, max_tokens={self.max_tokens}, fallback={self.fallback!r})"
+
+
+def parse_fallbacks(spec: str) -> Dict[str, str]:
+    """"a:b,b:a" -> {"a": "b", "b": "a"}"""
+    fallbacks = {}
+    for pair in spec.split(","):
+        if ":" in pair:
+            primary, fallback = (part.strip() for part in pair.split(":", 1))
+            if primary and fallback:
+                fallbacks[primary] = fallback
+    return fallbacks
+
+
+def role_profile(role: str) -> ModelProfile:
+    """The configured profile for an agent role ("research", "summary" or "critique")"""
+    prefix = {"research": "RESEARCHER", "summary": "SUMMARIZER", "critique": "CRITIC"}[role]
+    model = getattr(settings, f"{prefix}_MODEL") or settings.MODEL
+    return ModelProfile(model, getattr(settings, f"{prefix}_TEMPERATURE"),
+                        getattr(settings, f"{prefix}_MAX_TOKENS") or None,
+                        parse_fallbacks(settings.MODEL_FALLBACKS).get(model))
+
+
+class ModelHealth:
+    """Latency and error statistics for one model over the last `window` seconds"""
+
+    def __init__(self, model: str, window: Optional[float] = None):
+        self.model = model
+        self.window = window or settings.MODEL_HEALTH_WINDOW
+        self._samples: deque = deque()
+        self._lock = threading.Lock()
+        self._last_probe = time.monotonic()
+        self.fallbacks = 0
+
+    def _recent(self) -> List[tuple]:
+        """(seconds, ok) of the calls inside the window; caller holds the lock"""
+        horizon = time.monotonic() - self.window
+        while self._samples and self._samples[0][0] < horizon:
+            self._samples.popleft()
+        return [(seconds, ok) for _, seconds, ok in self._samples]
+
+    def record(self, seconds: float, ok: bool):
+        with self._lock:
+            self._samples.append((time.monotonic(), seconds, ok))
+            self._recent()
+
+    def calls(self) -> int:
+        with self._lock:
+            return len(self._recent())
+
+    def p95(self) -> float:
+        with self._lock:
+            latencies = sorted(seconds for seconds, ok in self._recent() if ok)
+        if not latencies:
+            return 0.0
+        return latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))]
+
+    def error_rate(self) -> float:
+        with self._lock:
+            samples = self._recent()
+        if not samples:
+            return 0.0
+        return sum(not ok for _, ok in samples) / len(samples)
+
+    def degraded(self) -> bool:
+        """Over a threshold with at least MODEL_MIN_SAMPLES calls in the window"""
+        return self.calls() >= settings.MODEL_MIN_SAMPLES and (
+            self.p95() > settings.MODEL_P95_THRESHOLD or self.error_rate() > settings.MODEL_ERROR_RATE_THRESHOLD)
+
+    def should_probe(self) -> bool:
+        """True at most once per MODEL_PROBE_INTERVAL, to let a degraded model prove it recovered"""
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_probe >= settings.MODEL_PROBE_INTERVAL:
+                self._last_probe = now
+                return True
+            return False
+
+    def summary(self) -> Dict[str, Any]:
+        return {"model": self.model, "calls": self.calls(), "p95_s": round(self.p95(), 2),
+                "error_rate": round(self.error_rate(), 3), "degraded": self.degraded(),
+                "fallbacks": self.fallbacks}
+
+
+_health: Dict[str, ModelHealth] = {}
+_health_lock = threading.Lock()
+
+
+def get_model_health(model: str) -> ModelHealth:
+    with _health_lock:
+        if model not in _health:
+            _health[model] = ModelHealth(model)
+        return _health[model]
+
+
+def model_health_summary() -> List[Dict[str, Any]]:
+    """Health of every model used so far, for diagnostics"""
+    with _health_lock:
+        health = list(_health.values())
+    return [model.summary() for model in sorted(health, key=lambda model: model.model)]
+
+
+def model_name(llm) -> str:
+    """Model name without the provider prefix ("gemini/gemini-2.0-flash" -> "gemini-2.0-flash")"""
+    return str(getattr(llm, "model", "")).split("/", 1)[-1]
+
+
+def with_model_health(llm):
+    """Record the latency and outcome of every provider call on this LLM.
+
+    Install it innermost, so cache hits and rate-limit waits do not count
+    towards the model's latency.
+    """
+    health = get_model_health(model_name(llm))
+
+    def measured_call(call_next, messages, **kwargs):
+        started = time.perf_counter()
+        try:
+            response = call_next(messages, **kwargs)
+        except Exception:
+            health.record(time.perf_counter() - started, ok=False)
+            raise
+        health.record(time.perf_counter() - started, ok=True)
+        return response
+
+    return wrap_llm_call(llm, measured_call)
+
+
+def with_fallback(llm, fallback):
+    """Send calls on this LLM to `fallback` while its model is degraded, or when a call fails.
+
+    Install it outermost, so a diverted call runs through the fallback's
+    own middleware chain (rate limit, cache, tracing, streaming). A call
+    that fails after streaming tokens is not retried, as the fallback's
+    answer would be appended to the partial one.
+    """
+    health = get_model_health(model_name(llm))
+
+    def routed_call(call_next, messages, **kwargs):
+        if health.degraded() and not health.should_probe():
+            health.fallbacks += 1
+            return fallback.call(messages, **kwargs)
+        stream = current_stream()
+        chunks_before = stream.chunk_count if stream is not None else 0
+        try:
+            return call_next(messages, **kwargs)
+        except Exception as e:
+            if stream is not None and stream.chunk_count != chunks_before:
+                raise
+            print(f"Model {health.model} failed ({e}); retrying on {model_name(fallback)}")
+            health.fallbacks += 1
+            return fallback.call(messages, **kwargs)
+
+    return wrap_llm_call(llm, routed_call)
@@ -0,0 +1,211 @@
+# utils/precritic.py
+"""CPU-only quality check of a summary against the research it came from.
+
+The checks mirror what the critic agent is asked to judge: coverage of
+the research's key terms (completeness), summary terms, figures and
+named entities that the research does not contain (accuracy), and length
+(clarity). A summary that scores at or above PRECRITIC_THRESHOLD with no
+unsupported figures gets a structured critique built from the checks
+instead of an LLM critique.
+"""
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional, Set
+
+from config.settings import settings
+from utils.compaction import split_units
+
+_WORD = re.compile(r"[a-z][a-z0-9'-]{2,}")
+_NUMBER = re.compile(r"(?<![\w.])\d[\d,]*(?:\.\d+)?")
+_NAME = r"(?:[A-Z][a-z][a-zA-Z0-9]*|[A-Z]{2,}[a-z0-9]*)"
+_ENTITY = re.compile(rf"\b{_NAME}(?:[ -]{_NAME}|[ -](?:of|for|de) {_NAME})*")
+_LEADING_MARKUP = re.compile(r"^(?:\s*(?:\d+[.)]|[-*•#>]+)\s*|\*\*|__)+")
+# "**Key findings:**" style labels start a new sentence
+_LABEL = re.compile(r"\*\*[^*\n]{1,60}?(?::\*\*|\*\*:)")
+
+STOPWORDS = frozenset("""
+the and for are but not you all any can had her was one our out has have his how its may new now
+who did get let she too use that this with from they will would there their what about which when
+make like than them then these some into more other such only also been were being over very just
+most many much each both between through during before after above below while where why here
+however therefore thus although though because since until upon within without across among per
+could should might must shall does doing done include includes including based using
+used key well way ways overall several various significant significantly major important
+""".split())
+# Summary figures at or below this are usually counts of the summary's own points
+SMALL_NUMBER = 10
+SUMMARY_TARGET_WORDS = 200
+SUMMARY_MIN_WORDS = 40
+WEIGHTS = {"coverage": 0.35, "support": 0.25, "numbers": 0.2, "entities": 0.1, "length": 0.1}
+
+
+def stem(word: str) -> str:
+    """Strip common English suffixes so "energies"/"energy" and "costs"/"cost" match"""
+    for suffix, replacement in (("ies", "y"), ("ing", ""), ("ed", ""), ("es", ""), ("s", ""), ("ly", "")):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 4 and not word.endswith("ss"):
+            return word[:-len(suffix)] + replacement
+    return word
+
+
+def content_terms(text: str) -> List[str]:
+    return [stem(word) for word in _WORD.findall(text.lower()) if word not in STOPWORDS]
+
+
+def key_terms(research: str, limit: int) -> Dict[str, str]:
+    """The research's most widespread content terms (in the most sentences, then most often), stem -> word"""
+    sentence_counts: Counter = Counter()
+    counts: Counter = Counter()
+    words: Dict[str, str] = {}
+    for _, sentence, _ in split_units(research):
+        terms = []
+        for word in _WORD.findall(sentence.lower()):
+            if word not in STOPWORDS:
+                terms.append(stem(word))
+                words.setdefault(terms[-1], word)
+        counts.update(terms)
+        sentence_counts.update(set(terms))
+    ranked = sorted((term for term, spread in sentence_counts.items() if spread >= 2),
+                    key=lambda term: (-sentence_counts[term], -counts[term], term))
+    return {term: words[term] for term in ranked[:limit]}
+
+
+def numbers(text: str) -> Set[str]:
+    """Figures in the text, normalized ("1,200" -> "1200", "3.50" -> "3.5")"""
+    found = set()
+    for match in _NUMBER.findall(text):
+        value = match.replace(",", "")
+        if "." in value:
+            value = value.rstrip("0").rstrip(".")
+        found.add(value)
+    return found
+
+
+def entities(text: str) -> Set[str]:
+    """Capitalized names and acronyms, ignoring headings and the first word of each sentence"""
+    found = set()
+    for _, sentence, is_heading in split_units(_LABEL.sub("\n", text)):
+        if is_heading:
+            continue
+        sentence = _LEADING_MARKUP.sub("", sentence)
+        for match in _ENTITY.finditer(sentence):
+            name = match.group(0)
+            if match.start() == 0:
+                # "The", "However", ...: drop the sentence-initial word, keep any name after it
+                rest = _ENTITY.search(name.partition(" ")[2])
+                name = rest.group(0) if rest else ""
+            if name and name.lower() not in STOPWORDS:
+                found.add(name)
+    return found
+
+
+def length_score(words: int) -> float:
+    if words < SUMMARY_MIN_WORDS:
+        return words / SUMMARY_MIN_WORDS
+    if words > SUMMARY_TARGET_WORDS:
+        return max(0.0, 1.0 - (words - SUMMARY_TARGET_WORDS) / SUMMARY_TARGET_WORDS)
+    return 1.0
+
+
+def assess(summary: str, research: str) -> Dict[str, Any]:
+    """Score a summary against its research report (score in 0-1, plus the findings behind it)"""
+    research_lower = research.lower()
+    research_stems = set(content_terms(research))
+    summary_terms = content_terms(summary)
+    summary_stems = set(summary_terms)
+
+    terms = key_terms(research, settings.PRECRITIC_KEY_TERMS)
+    missing_terms = [word for term, word in terms.items() if term not in summary_stems]
+    coverage = 1 - len(missing_terms) / len(terms) if terms else 0.0
+    support = sum(term in research_stems for term in summary_terms) / len(summary_terms) if summary_terms else 0.0
+
+    research_numbers = numbers(research)
+    figures = {value for value in numbers(summary) if "." in value or int(value) > SMALL_NUMBER}
+    unsupported_numbers = sorted(figures - research_numbers)
+    names = entities(summary)
+    unsupported_entities = sorted(name for name in names if name.lower() not in research_lower)
+
+    words = len(summary.split())
+    scores = {
+        "coverage": coverage,
+        "support": support,
+        "numbers": 1 - len(unsupported_numbers) / len(figures) if figures else 1.0,
+        "entities": 1 - len(unsupported_entities) / len(names) if names else 1.0,
+        "length": length_score(words) if words < len(research.split()) else 0.0,
+    }
+    score = sum(WEIGHTS[name] * value for name, value in scores.items())
+    return {
+        "score": round(score, 3),
+        "checks": {name: round(value, 3) for name, value in scores.items()},
+        "key_terms": len(terms),
+        "missing_terms": missing_terms,
+        "figures": len(figures),
+        "unsupported_numbers": unsupported_numbers,
+        "entities": len(names),
+        "unsupported_entities": unsupported_entities,
+        "words": words,
+        "research_words": len(research.split()),
+    }
+
+
+def passes(assessment: Dict[str, Any], threshold: Optional[float] = None) -> bool:
+    """Good enough to skip the LLM critique: at or over the threshold, every figure supported, enough research"""
+    threshold = settings.PRECRITIC_THRESHOLD if threshold is None else threshold
+    return (assessment["score"] >= threshold and not assessment["unsupported_numbers"]
+            and assessment["research_words"] >= settings.PRECRITIC_MIN_RESEARCH_WORDS)
+
+
+def findings(assessment: Dict[str, Any]) -> str:
+    """The checks' red flags as hints for the critic agent ("" when there are none)"""
+    flags = []
+    if assessment["unsupported_numbers"]:
+        flags.append(f"figures not found in the research: {', '.join(assessment['unsupported_numbers'][:5])}")
+    if assessment["unsupported_entities"]:
+        flags.append(f"names not found in the research: {', '.join(assessment['unsupported_entities'][:5])}")
+    if assessment["missing_terms"]:
+        flags.append(f"key research terms the summary omits: {', '.join(assessment['missing_terms'][:5])}")
+    if assessment["words"] > SUMMARY_TARGET_WORDS:
+        flags.append(f"{assessment['words']} words, over the {SUMMARY_TARGET_WORDS}-word target")
+    return "; ".join(flags)
+
+
+def format_critique(assessment: Dict[str, Any]) -> str:
+    """A critique in the critic agent's format (accuracy, completeness, clarity, suggestions, rating)"""
+    checks = assessment["checks"]
+    covered = assessment["key_terms"] - len(assessment["missing_terms"])
+
+    accuracy = f"{checks['support']:.0%} of the summary's terms appear in the research"
+    if assessment["figures"]:
+        accuracy += f"; {assessment['figures'] - len(assessment['unsupported_numbers'])}/{assessment['figures']} figures match it"
+    if assessment["unsupported_entities"]:
+        accuracy += f"; not found in the research: {', '.join(assessment['unsupported_entities'][:3])}"
+    completeness = f"Covers {covered}/{assessment['key_terms']} key research terms"
+    if assessment["missing_terms"]:
+        completeness += f"; missing: {', '.join(assessment['missing_terms'][:5])}"
+    clarity = f"{assessment['words']} words"
+    clarity += (f", over the {SUMMARY_TARGET_WORDS}-word target" if assessment["words"] > SUMMARY_TARGET_WORDS
+                else f", within the {SUMMARY_TARGET_WORDS}-word target")
+
+    suggestions = []
+    if assessment["missing_terms"]:
+        suggestions.append(f"Mention {', '.join(assessment['missing_terms'][:3])} from the research.")
+    if assessment["unsupported_entities"]:
+        suggestions.append(f"Check {assessment['unsupported_entities'][0]} against the sources.")
+    if assessment["words"] > SUMMARY_TARGET_WORDS:
+        suggestions.append("Tighten the summary.")
+    if not suggestions:
+        suggestions.append("None needed.")
+
+    stars = max(1, min(5, round(1 + 4 * assessment["score"])))
+    lines = [
+        f"**Automated quality check** (score {assessment['score']:.2f})",
+        "",
+        f"- **Accuracy:** {accuracy}.",
+        f"- **Completeness:** {completeness}.",
+        f"- **Clarity:** {clarity}.",
+        "",
+        "**Suggestions:**",
+        *(f"{number}. {suggestion}" for number, suggestion in enumerate(suggestions[:2], 1)),
+        "",
+        f"**Overall rating:** {'⭐' * stars} ({stars}/5)",
+    ]
+    return "\n".join(lines)
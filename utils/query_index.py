@@ -0,0 +1,133 @@
+# utils/query_index.py
+import hashlib
+import random
+import re
+import threading
+import time
+from datetime import datetime
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+STOPWORDS = frozenset("""
+a an and are as at be by for from how in into is it of on or the to what when where which who why
+with about latest recent current new trend trends overview
+""".split())
+
+_MERSENNE_PRIME = (1 << 61) - 1
+
+
+def query_terms(query: str) -> FrozenSet[str]:
+    """Content words of a query, lowercased and lightly stemmed"""
+    terms = set()
+    for word in re.findall(r"\w+", query.lower()):
+        if word in STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        terms.add(word)
+    return frozenset(terms)
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def parse_timestamp(value) -> float:
+    """Epoch seconds from a created_at column (ISO string or number); 0 if unparseable"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return 0.0
+
+
+class QueryIndex:
+    """MinHash/LSH index of past queries for near-duplicate lookup.
+
+    Each query is reduced to its set of content words and a MinHash
+    signature; signatures are split into `bands` buckets so lookups only
+    compare against queries sharing a bucket, and candidates are then
+    scored by exact Jaccard similarity of their word sets.
+    """
+
+    def __init__(self, num_perm: int = 64, bands: int = 32):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        # Fixed seed so signatures are stable across processes
+        rng = random.Random(1)
+        self._perms = [(rng.randrange(1, _MERSENNE_PRIME), rng.randrange(_MERSENNE_PRIME)) for _ in range(num_perm)]
+        # session_id -> (query, terms, created_at, band keys)
+        self._entries: Dict[str, Tuple[str, FrozenSet[str], float, List[Tuple[int, ...]]]] = {}
+        self._buckets: List[Dict[Tuple[int, ...], set]] = [{} for _ in range(bands)]
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _signature(self, terms: FrozenSet[str]) -> List[int]:
+        hashes = [int.from_bytes(hashlib.blake2b(term.encode(), digest_size=8).digest(), "big") for term in terms]
+        if not hashes:
+            return [_MERSENNE_PRIME] * self.num_perm
+        return [min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in self._perms]
+
+    def _band_keys(self, terms: FrozenSet[str]) -> List[Tuple[int, ...]]:
+        signature = self._signature(terms)
+        return [tuple(signature[band * self.rows:(band + 1) * self.rows]) for band in range(self.bands)]
+
+    def add(self, session_id: str, query: str, created_at: Optional[float] = None):
+        """Index a completed session's query (re-adding a session_id replaces it)
+
+        Queries without content words ("What is new?") are not indexed:
+        they say nothing about the topic, so nothing may be served for them.
+        """
+        terms = query_terms(query)
+        if not terms:
+            self.remove(session_id)
+            return
+        keys = self._band_keys(terms)
+        with self._lock:
+            self._remove(session_id)
+            self._entries[session_id] = (query, terms, created_at if created_at is not None else time.time(), keys)
+            for bucket, key in zip(self._buckets, keys):
+                bucket.setdefault(key, set()).add(session_id)
+
+    def _remove(self, session_id: str):
+        entry = self._entries.pop(session_id, None)
+        if entry is None:
+            return
+        for bucket, key in zip(self._buckets, entry[3]):
+            ids = bucket.get(key)
+            if ids is not None:
+                ids.discard(session_id)
+                if not ids:
+                    del bucket[key]
+
+    def remove(self, session_id: str):
+        with self._lock:
+            self._remove(session_id)
+
+    def find(self, query: str, threshold: float, max_age: Optional[float] = None) -> Optional[Tuple[str, float]]:
+        """Best (session_id, similarity) at or above `threshold` no older than `max_age` seconds"""
+        terms = query_terms(query)
+        if not terms:
+            return None
+        keys = self._band_keys(terms)
+        oldest = time.time() - max_age if max_age else None
+        best = None
+        with self._lock:
+            candidates = set()
+            for bucket, key in zip(self._buckets, keys):
+                candidates |= bucket.get(key, set())
+            for session_id in candidates:
+                _, candidate_terms, created_at, _ = self._entries[session_id]
+                if oldest is not None and created_at < oldest:
+                    continue
+                score = jaccard(terms, candidate_terms)
+                if score >= threshold and (best is None or (score, created_at) > (best[1], best[2])):
+                    best = (session_id, score, created_at)
+        return (best[0], best[1]) if best else None
@@ -0,0 +1,189 @@
+# utils/rate_limiter.py
+import asyncio
+import json
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from config.settings import settings
+from utils.llm_middleware import call_usage, track_call_usage, wrap_llm_call
+from utils.tracing import annotate
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) used for quota accounting"""
+    return max(1, len(text) // 4)
+
+
+class TokenBucketLimiter:
+    """Thread-safe token buckets enforcing requests-per-minute and tokens-per-minute quotas"""
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._request_allowance = float(requests_per_minute)
+        self._token_allowance = float(tokens_per_minute)
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self._request_allowance = min(
+            self.requests_per_minute, self._request_allowance + elapsed * self.requests_per_minute / 60
+        )
+        self._token_allowance = min(
+            self.tokens_per_minute, self._token_allowance + elapsed * self.tokens_per_minute / 60
+        )
+
+    def _reserve(self, tokens: int) -> float:
+        """Take one request and `tokens` tokens if available, else return seconds to wait"""
+        tokens = min(tokens, self.tokens_per_minute)
+        with self._lock:
+            self._refill(time.monotonic())
+            if self._request_allowance >= 1 and self._token_allowance >= tokens:
+                self._request_allowance -= 1
+                self._token_allowance -= tokens
+                return 0.0
+            request_wait = max(0.0, (1 - self._request_allowance) * 60 / self.requests_per_minute)
+            token_wait = max(0.0, (tokens - self._token_allowance) * 60 / self.tokens_per_minute)
+            return max(request_wait, token_wait)
+
+    def try_acquire(self, tokens: int = 1) -> float:
+        """Take the quota without blocking; returns 0 on success, else seconds until it would fit"""
+        return self._reserve(tokens)
+
+    def acquire(self, tokens: int = 1) -> float:
+        """Block until the request fits in the quota; returns seconds spent waiting"""
+        waited = 0.0
+        while True:
+            wait = self._reserve(tokens)
+            if wait <= 0:
+                return waited
+            time.sleep(wait)
+            waited += wait
+
+    async def acquire_async(self, tokens: int = 1) -> float:
+        """Asyncio variant of acquire that yields to the event loop while waiting"""
+        waited = 0.0
+        while True:
+            wait = self._reserve(tokens)
+            if wait <= 0:
+                return waited
+            await asyncio.sleep(wait)
+            waited += wait
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """True for 429 / ResourceExhausted style quota errors from Gemini or DDGS"""
+    text = f"{type(error).__name__} {error}".lower()
+    return any(marker in text for marker in ("429", "resourceexhausted", "resource_exhausted", "ratelimit", "rate limit"))
+
+
+class AdaptiveRateLimiter(TokenBucketLimiter):
+    """Token-bucket limiter that tracks real usage and backs off after quota errors.
+
+    With quota available acquire() returns immediately. Each rate-limit error
+    doubles a process-wide cool-down (capped at max_backoff) that every caller
+    waits out; the next success resets it.
+    """
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int,
+                 initial_backoff: float = 1.0, max_backoff: float = 60.0):
+        super().__init__(requests_per_minute, tokens_per_minute)
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self._backoff = 0.0
+        self._blocked_until = 0.0
+        self.requests = 0
+        self.tokens_used = 0
+        self.rate_limited = 0
+
+    def _reserve(self, tokens: int) -> float:
+        blocked = self._blocked_until - time.monotonic()
+        if blocked > 0:
+            return blocked
+        return super()._reserve(tokens)
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: Optional[int] = None):
+        """Charge the difference between the reserved estimate and the real token count"""
+        with self._lock:
+            self.requests += 1
+            if actual_tokens is None:
+                actual_tokens = estimated_tokens
+            self.tokens_used += actual_tokens
+            self._token_allowance -= actual_tokens - estimated_tokens
+            self._backoff = 0.0
+
+    def backoff(self) -> float:
+        """Register a quota error and return the cool-down every caller now waits out"""
+        with self._lock:
+            self.rate_limited += 1
+            self._backoff = min(self.max_backoff, self._backoff * 2 if self._backoff else self.initial_backoff)
+            self._blocked_until = max(self._blocked_until, time.monotonic() + self._backoff)
+            return self._backoff
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "tokens_used": self.tokens_used,
+            "rate_limited": self.rate_limited,
+            "current_backoff": self._backoff
+        }
+
+
+_limiters: Dict[str, AdaptiveRateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(name: str) -> AdaptiveRateLimiter:
+    """Return the process-wide limiter for a backend ("gemini" or "ddgs")"""
+    with _limiters_lock:
+        if name not in _limiters:
+            if name == "gemini":
+                _limiters[name] = AdaptiveRateLimiter(
+                    settings.GEMINI_RPM, settings.GEMINI_TPM, max_backoff=settings.RATE_LIMIT_MAX_BACKOFF
+                )
+            elif name == "ddgs":
+                # Search is billed per request only, so the token bucket never binds
+                _limiters[name] = AdaptiveRateLimiter(
+                    settings.DDGS_RPM, 10 ** 9, max_backoff=settings.RATE_LIMIT_MAX_BACKOFF
+                )
+            else:
+                raise ValueError(f"Unknown rate limiter: {name}")
+        return _limiters[name]
+
+
+def get_gemini_limiter() -> AdaptiveRateLimiter:
+    """Return the limiter shared by every Gemini caller in this process"""
+    return get_rate_limiter("gemini")
+
+
+def with_rate_limit(llm, limiter: Optional[AdaptiveRateLimiter] = None):
+    """Route every call on this LLM through the shared Gemini limiter
+
+    Each call is charged the token usage its own response reported (the
+    estimate when it reported none), also when other threads share the LLM.
+    """
+    limiter = limiter if limiter is not None else get_gemini_limiter()
+    track_call_usage(llm)
+
+    def limited_call(call_next, messages, **kwargs):
+        estimated = estimate_tokens(json.dumps(messages, default=str))
+        attempt = 0
+        while True:
+            limiter.acquire(estimated)
+            try:
+                with call_usage() as usage:
+                    response = call_next(messages, **kwargs)
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt >= settings.RATE_LIMIT_MAX_RETRIES:
+                    raise
+                attempt += 1
+                annotate(retries=attempt)
+                print(f"Gemini rate limited, backing off {limiter.backoff():.1f}s")
+                continue
+            limiter.record_usage(estimated, usage["total_tokens"] or None)
+            return response
+
+    return wrap_llm_call(llm, limited_call)
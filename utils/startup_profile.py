@@ -0,0 +1,65 @@
+# utils/startup_profile.py
+"""Where cold-start time goes: heavy imports and one-time initialization.
+
+    python -m utils.startup_profile
+
+runs the same startup the Streamlit app performs on its first request and
+prints each stage; the app shows the same numbers in its sidebar.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+
+
+class StartupProfile:
+    """Records wall-clock time of named startup stages, in order"""
+
+    def __init__(self):
+        self._stages: List[Dict[str, float]] = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._stages.append({"stage": name, "seconds": time.perf_counter() - started})
+
+    def report(self) -> List[Dict[str, float]]:
+        with self._lock:
+            stages = list(self._stages)
+        if stages:
+            stages.append({"stage": "total", "seconds": sum(stage["seconds"] for stage in stages)})
+        return stages
+
+
+# Process-wide profile, shared by the app and the CLI below
+startup_profile = StartupProfile()
+
+
+def main():
+    with startup_profile.stage("import crewai"):
+        import crewai  # noqa: F401
+    with startup_profile.stage("import httpx"):
+        import httpx  # noqa: F401
+    with startup_profile.stage("import ddgs"):
+        try:
+            import ddgs  # noqa: F401
+        except ImportError:
+            import duckduckgo_search  # noqa: F401
+    with startup_profile.stage("import agents.orchestrator"):
+        from agents.orchestrator import ResearchOrchestrator, get_gemini_llm
+    with startup_profile.stage("build Gemini LLM"):
+        get_gemini_llm()
+    with startup_profile.stage("create ResearchOrchestrator"):
+        ResearchOrchestrator()
+
+    for stage in startup_profile.report():
+        print(f"{stage['stage']:<32} {stage['seconds'] * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
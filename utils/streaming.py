@@ -0,0 +1,167 @@
+# utils/streaming.py
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Optional
+
+from utils.llm_middleware import wrap_llm_call
+
+try:
+    from crewai.events import crewai_event_bus, LLMStreamChunkEvent
+except ImportError:  # CrewAI < 1.0
+    from crewai.utilities.events import crewai_event_bus, LLMStreamChunkEvent
+
+_active_stream: contextvars.ContextVar = contextvars.ContextVar("active_token_stream", default=None)
+_handler_registered = False
+_handler_lock = threading.Lock()
+
+
+class TokenStream:
+    """Accumulates streamed LLM tokens per phase and forwards them to a renderer.
+
+    `on_update(phase, text_so_far)` is called from the thread that runs the
+    crew, at most once every `min_interval` seconds per phase plus once when
+    the phase ends. Time-to-first-token is recorded per phase in `ttft`.
+    A disabled stream leaves LLM calls non-streaming and records nothing.
+    """
+
+    def __init__(self, on_update: Callable[[str, str], None], min_interval: float = 0.05,
+                 enabled: bool = True):
+        self.on_update = on_update
+        self.enabled = enabled
+        self.min_interval = min_interval
+        self.texts: Dict[str, str] = {}
+        self.ttft: Dict[str, float] = {}
+        self.current_phase: Optional[str] = None
+        self._phase_started = 0.0
+        self._last_render = 0.0
+        self._chunks_in_call = 0
+
+    @contextmanager
+    def phase(self, name: str):
+        """Route tokens emitted inside the block to `name`"""
+        if not self.enabled:
+            yield self
+            return
+        _ensure_handler()
+        self.current_phase = name
+        self.texts.setdefault(name, "")
+        self._phase_started = time.perf_counter()
+        token = _active_stream.set(self)
+        try:
+            yield self
+        finally:
+            _active_stream.reset(token)
+            self._render(force=True)
+            self.current_phase = None
+
+    def switch(self, name: str):
+        """Route further tokens to `name` inside an open phase() block (one crew running several phases)"""
+        if not self.enabled or self.current_phase is None:
+            return
+        self._render(force=True)
+        self.current_phase = name
+        self.texts.setdefault(name, "")
+        self._phase_started = time.perf_counter()
+
+    @property
+    def chunk_count(self) -> int:
+        """Chunks pushed so far; lets callers tell whether a call has streamed anything"""
+        return self._chunks_in_call
+
+    def push(self, chunk: str):
+        if self.current_phase is None or not chunk:
+            return
+        if self.current_phase not in self.ttft:
+            self.ttft[self.current_phase] = time.perf_counter() - self._phase_started
+        self._chunks_in_call += 1
+        self.texts[self.current_phase] += chunk
+        self._render()
+
+    def _render(self, force: bool = False):
+        if self.current_phase is None or not self.texts[self.current_phase]:
+            return
+        now = time.perf_counter()
+        if force or now - self._last_render >= self.min_interval:
+            self._last_render = now
+            try:
+                self.on_update(self.current_phase, self.texts[self.current_phase])
+            except Exception as e:
+                print(f"Error rendering streamed tokens: {e}")
+
+
+def current_stream() -> Optional[TokenStream]:
+    return _active_stream.get()
+
+
+@contextmanager
+def suspended():
+    """Route no tokens to the active TokenStream inside the block.
+
+    TokenStream is not thread-safe: concurrent crews (fan-out workers copy
+    this context) would interleave their tokens into one phase's text.
+    """
+    token = _active_stream.set(None)
+    try:
+        yield
+    finally:
+        _active_stream.reset(token)
+
+
+def _on_stream_chunk(source, event):
+    stream = current_stream()
+    if stream is not None:
+        stream.push(event.chunk)
+
+
+def _ensure_handler():
+    """Register one global chunk listener; the active TokenStream is looked up per event"""
+    global _handler_registered
+    with _handler_lock:
+        if not _handler_registered:
+            crewai_event_bus.on(LLMStreamChunkEvent)(_on_stream_chunk)
+            _handler_registered = True
+
+
+@contextmanager
+def _streaming_enabled(llm):
+    try:
+        from crewai.llms.base_llm import call_stream_override
+    except ImportError:
+        call_stream_override = None
+
+    if call_stream_override is not None:
+        with call_stream_override(llm, True):
+            yield
+        return
+
+    previous = llm.stream
+    llm.stream = True
+    try:
+        yield
+    finally:
+        llm.stream = previous
+
+
+def with_streaming(llm):
+    """Stream this LLM's tokens into the active TokenStream, if there is one.
+
+    Answers that arrive without chunks (cache hits, replayed or non-streaming
+    responses) are pushed as a single chunk so the UI still shows them.
+    """
+
+    def streaming_call(call_next, messages, **kwargs):
+        stream = current_stream()
+        if stream is None:
+            return call_next(messages, **kwargs)
+
+        chunks_before = stream._chunks_in_call
+        with _streaming_enabled(llm):
+            response = call_next(messages, **kwargs)
+        if stream._chunks_in_call == chunks_before and isinstance(response, str):
+            stream.push(response)
+        stream.push("\n\n")
+        return response
+
+    return wrap_llm_call(llm, streaming_call)
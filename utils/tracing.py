@@ -0,0 +1,327 @@
+# utils/tracing.py
+"""Structured spans for research phases, LLM calls, web searches and DB calls.
+
+Finished spans are kept in a bounded in-memory buffer (for the Streamlit
+diagnostics panel), folded into cumulative metrics that render in the
+Prometheus text format and, with TRACE_EXPORT_PATH set, appended to a
+size-rotated JSON lines file by a background thread:
+
+    python -m utils.tracing .cache/traces.jsonl     # metrics from a trace file
+"""
+import atexit
+import contextvars
+import functools
+import inspect
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional
+
+from config.settings import settings
+from utils.llm_middleware import agent_role, call_usage, track_call_usage, wrap_llm_call
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+# Histogram bucket upper bounds, in seconds
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+# Span attributes summed into counters
+COUNTED_ATTRIBUTES = ("prompt_tokens", "completion_tokens", "retries")
+
+
+class Span:
+    """One timed operation; attributes can be added until it ends"""
+
+    def __init__(self, name: str, kind: str, parent: Optional["Span"], attributes: Dict[str, Any]):
+        self.name = name
+        self.kind = kind
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex[:16]
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.attributes = dict(attributes)
+        self.start = time.time()
+        self.duration = 0.0
+        self.error: Optional[str] = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start": self.start,
+            "duration_ms": round(self.duration * 1000, 3),
+            "error": self.error,
+            "attributes": self.attributes
+        }
+
+
+class Metrics:
+    """Cumulative per-(kind, name) span counts, latency histograms and counters"""
+
+    def __init__(self):
+        self._series: Dict[tuple, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, span: Dict[str, Any]):
+        seconds = span["duration_ms"] / 1000
+        attributes = span.get("attributes") or {}
+        with self._lock:
+            series = self._series.setdefault((span["kind"], span["name"]), {
+                "count": 0, "errors": 0, "seconds": 0.0, "cache_hits": 0,
+                "buckets": [0] * len(LATENCY_BUCKETS),
+                "counters": dict.fromkeys(COUNTED_ATTRIBUTES, 0)
+            })
+            series["count"] += 1
+            series["seconds"] += seconds
+            series["errors"] += 1 if span.get("error") else 0
+            series["cache_hits"] += 1 if attributes.get("cache_hit") else 0
+            for index, bound in enumerate(LATENCY_BUCKETS):
+                if seconds <= bound:
+                    series["buckets"][index] += 1
+            for name in COUNTED_ATTRIBUTES:
+                series["counters"][name] += int(attributes.get(name) or 0)
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """One row per span kind and name, for tables"""
+        with self._lock:
+            return [{
+                "kind": kind,
+                "name": name,
+                "count": series["count"],
+                "errors": series["errors"],
+                "avg_ms": round(series["seconds"] * 1000 / series["count"], 1),
+                "total_s": round(series["seconds"], 2),
+                "cache_hits": series["cache_hits"],
+                **series["counters"]
+            } for (kind, name), series in sorted(self._series.items())]
+
+    def prometheus(self) -> str:
+        """Render as Prometheus text exposition format"""
+        lines = [
+            "# HELP research_span_duration_seconds Wall time of traced operations",
+            "# TYPE research_span_duration_seconds histogram"
+        ]
+        with self._lock:
+            series_items = sorted(self._series.items())
+            for (kind, name), series in series_items:
+                labels = f'kind="{kind}",name="{_escape(name)}"'
+                for bound, count in zip(LATENCY_BUCKETS, series["buckets"]):
+                    lines.append(f'research_span_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'research_span_duration_seconds_bucket{{{labels},le="+Inf"}} {series["count"]}')
+                lines.append(f"research_span_duration_seconds_sum{{{labels}}} {series['seconds']:.6f}")
+                lines.append(f"research_span_duration_seconds_count{{{labels}}} {series['count']}")
+            for metric, key, help_text in (
+                ("research_span_errors_total", "errors", "Traced operations that raised"),
+                ("research_cache_hits_total", "cache_hits", "Traced operations served from a cache"),
+            ):
+                lines += [f"# HELP {metric} {help_text}", f"# TYPE {metric} counter"]
+                for (kind, name), series in series_items:
+                    lines.append(f'{metric}{{kind="{kind}",name="{_escape(name)}"}} {series[key]}')
+            for counter in COUNTED_ATTRIBUTES:
+                metric = f"research_{counter}_total"
+                lines += [f"# HELP {metric} Sum of {counter} over traced operations", f"# TYPE {metric} counter"]
+                for (kind, name), series in series_items:
+                    lines.append(f'{metric}{{kind="{kind}",name="{_escape(name)}"}} {series["counters"][counter]}')
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+class TraceExporter:
+    """Appends span records to a JSON lines file from a background thread.
+
+    Once the file reaches `max_bytes` it is moved to `<path>.1` (replacing
+    the previous one). Records arriving while `max_queue` are still waiting
+    to be written are dropped and counted rather than slowing the caller.
+    """
+
+    def __init__(self, path: str, max_bytes: Optional[int] = None, max_queue: int = 10_000):
+        self.path = path
+        self.max_bytes = max_bytes or settings.TRACE_EXPORT_MAX_BYTES
+        self.dropped = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._drain, name="trace-export", daemon=True)
+        self._thread.start()
+        atexit.register(self.flush)
+
+    def export(self, record: Dict[str, Any]):
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+    def flush(self):
+        """Wait until every queued record is written"""
+        self._queue.join()
+
+    def _drain(self):
+        while True:
+            records = [self._queue.get()]
+            while True:
+                try:
+                    records.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._write(records)
+            for _ in records:
+                self._queue.task_done()
+
+    def _write(self, records: List[Dict[str, Any]]):
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            if os.path.exists(self.path) and os.path.getsize(self.path) >= self.max_bytes:
+                os.replace(self.path, f"{self.path}.1")
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(record, default=str) + "\n" for record in records))
+        except OSError as e:
+            print(f"Error exporting trace spans: {e}")
+
+
+class Tracer:
+    """Creates spans, keeps the most recent ones and exports them as they finish"""
+
+    def __init__(self, enabled: Optional[bool] = None, export_path: Optional[str] = None,
+                 buffer_size: Optional[int] = None):
+        self.enabled = settings.TRACING_ENABLED if enabled is None else enabled
+        self.export_path = settings.TRACE_EXPORT_PATH if export_path is None else export_path
+        self.spans: deque = deque(maxlen=buffer_size or settings.TRACE_BUFFER_SIZE)
+        self.metrics = Metrics()
+        self.exporter = TraceExporter(self.export_path) if self.enabled and self.export_path else None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name: str, kind: str = "internal", **attributes):
+        if not self.enabled:
+            yield Span(name, kind, None, attributes)
+            return
+        span = Span(name, kind, _current_span.get(), attributes)
+        token = _current_span.set(span)
+        started = time.perf_counter()
+        try:
+            yield span
+        except BaseException as e:
+            span.error = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.duration = time.perf_counter() - started
+            _current_span.reset(token)
+            self._finish(span)
+
+    def _finish(self, span: Span):
+        record = span.to_dict()
+        self.metrics.observe(record)
+        with self._lock:
+            self.spans.append(record)
+        if self.exporter is not None:
+            self.exporter.export(record)
+
+    def recent(self, trace_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Buffered spans, oldest first, optionally for one trace"""
+        with self._lock:
+            spans = list(self.spans)
+        return [span for span in spans if trace_id is None or span["trace_id"] == trace_id]
+
+
+_tracer: Optional[Tracer] = None
+_tracer_lock = threading.Lock()
+
+
+def get_tracer() -> Tracer:
+    """Return the process-wide tracer"""
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            _tracer = Tracer()
+        return _tracer
+
+
+def span(name: str, kind: str = "internal", **attributes):
+    """Open a span on the process-wide tracer, nested under the current one"""
+    return get_tracer().span(name, kind, **attributes)
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+def annotate(**attributes):
+    """Add attributes to the current span, if any (used by inner middlewares)"""
+    active = _current_span.get()
+    if active is not None:
+        active.set(**attributes)
+
+
+def with_tracing(llm):
+    """Record a span for every call on this LLM.
+
+    Token counts are the usage reported for this call (see
+    track_call_usage). Inner middlewares add cache_hit and retries through
+    annotate().
+    """
+    track_call_usage(llm)
+
+    def traced_call(call_next, messages, **kwargs):
+        with span(agent_role(kwargs) or "direct", kind="llm", model=getattr(llm, "model", "")) as active:
+            with call_usage() as usage:
+                response = call_next(messages, **kwargs)
+            if usage["reports"]:
+                active.set(prompt_tokens=usage["prompt_tokens"], completion_tokens=usage["completion_tokens"])
+            return response
+
+    return wrap_llm_call(llm, traced_call)
+
+
+class TracedStore:
+    """Wraps a storage backend so every coroutine method call is a "db" span"""
+
+    def __init__(self, store):
+        self.store = store
+
+    def __getattr__(self, name):
+        if name == "store":
+            raise AttributeError(name)
+        attribute = getattr(self.store, name)
+        if not inspect.iscoroutinefunction(attribute):
+            return attribute
+
+        @functools.wraps(attribute)
+        async def traced(*args, **kwargs):
+            with span(name, kind="db", backend=type(self.store).__name__):
+                return await attribute(*args, **kwargs)
+
+        return traced
+
+
+def load_spans(path: str) -> Iterable[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+def main():
+    path = sys.argv[1] if len(sys.argv) > 1 else settings.TRACE_EXPORT_PATH
+    metrics = Metrics()
+    for record in load_spans(path):
+        metrics.observe(record)
+    sys.stdout.write(metrics.prometheus())
+
+
+if __name__ == "__main__":
+    main()